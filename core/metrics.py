@@ -0,0 +1,235 @@
+"""
+Per-view request metrics, exposed in the Prometheus text format.
+
+``MetricsMiddleware`` records the latency, SQL query count, SQL time and
+response size of every request under the URL name of the view which
+served it, and ``metrics_view`` renders the aggregated histograms for
+Prometheus to scrape.
+
+Both are switched on with the ``METRICS_ENABLED`` setting. When it is off
+the middleware removes itself from the stack by raising
+MiddlewareNotUsed and no query hook is installed, so there is no cost at
+all.
+
+Histograms live in the memory of each process, so a deployment with
+several workers reports one set per worker.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+# Upper bounds of the histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+UNRESOLVED = "<unresolved>"
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+
+
+# Stats of the request being handled, which the query hook adds to. Context
+# variables follow the request into the threads sync_to_async runs the ORM
+# in, so queries made by async views are counted too.
+current_stats = ContextVar("current_stats", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_time += time.perf_counter() - start
+
+
+def add_query_hook(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_hook():
+    """Time the queries of every database connection, open or yet to open."""
+    connection_created.connect(add_query_hook, dispatch_uid="core.metrics")
+    for connection in connections.all(initialized_only=True):
+        add_query_hook(connection)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # Label values mapped to per-bucket counts, then the sum and count
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self, label_names):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            label_text = ",".join(
+                f'{name}="{escape_label(value)}"'
+                for name, value in zip(label_names, labels)
+            )
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Registry:
+    label_names = ("view", "method")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.duration = Histogram(
+            "kanban_request_duration_seconds",
+            "Time taken to respond to a request.",
+            DURATION_BUCKETS,
+        )
+        self.queries = Histogram(
+            "kanban_request_queries",
+            "SQL queries made while handling a request.",
+            QUERY_BUCKETS,
+        )
+        self.sql_duration = Histogram(
+            "kanban_request_sql_duration_seconds",
+            "Time spent in SQL queries while handling a request.",
+            DURATION_BUCKETS,
+        )
+        self.response_size = Histogram(
+            "kanban_response_size_bytes",
+            "Size of response bodies, excluding streaming responses.",
+            SIZE_BUCKETS,
+        )
+        # (view, method, status) mapped to a count
+        self.responses = {}
+
+    def record(self, request, response, stats, duration):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else UNRESOLVED
+        labels = (view, request.method)
+        with self.lock:
+            self.duration.observe(labels, duration)
+            self.queries.observe(labels, stats.queries)
+            self.sql_duration.observe(labels, stats.sql_time)
+            if not response.streaming:
+                self.response_size.observe(labels, len(response.content))
+            key = (*labels, response.status_code)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for histogram in (
+                self.duration,
+                self.queries,
+                self.sql_duration,
+                self.response_size,
+            ):
+                lines += histogram.render(self.label_names)
+            lines += [
+                "# HELP kanban_responses_total Responses sent, by status code.",
+                "# TYPE kanban_responses_total counter",
+            ]
+            for (view, method, status), count in sorted(self.responses.items()):
+                lines.append(
+                    f'kanban_responses_total{{view="{escape_label(view)}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class MetricsMiddleware:
+    """
+    Record request metrics. Put it first in MIDDLEWARE so the latency
+    covers the rest of the stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_query_hook()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        registry.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        registry.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+
+def metrics_view(request):
+    if not getattr(settings, "METRICS_ENABLED", False):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
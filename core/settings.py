@@ -92,6 +92,7 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = (
 CRISPY_TEMPLATE_PACK = "gds"
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -119,6 +120,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
+
+# Broker relaying live board changes to open board pages
+KANBAN_EVENTS_BACKEND = "kanban.events.InProcessBroker"
+
+# Record per-view request metrics and serve them at /metrics
+METRICS_ENABLED = bool(os.environ.get("METRICS_ENABLED"))
 
 
 # Database
@@ -132,6 +140,23 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# Rendered board fragments are cached until the board changes, so the cache
+# must be shared by every server process. Without REDIS_URL a local-memory
+# cache is used, which suits only a single process such as runserver.
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -20,11 +20,13 @@ from django.urls import path
 from django.conf.urls.static import static
 from django.conf import settings
 from core import views
+from core.metrics import metrics_view
 from kanban import views as kanban_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", views.HomeView.as_view(), name="index"),
+    path("metrics", metrics_view, name="metrics"),
     path("boards/create/", kanban_views.CreateBoardView.as_view(), name="board-create"),
     path(
         "boards/<int:pk>/tickets/create/",
@@ -80,16 +82,61 @@ urlpatterns = [
     path(
         "boards/<int:pk>/edit/", kanban_views.EditBoardView.as_view(), name="board-edit"
     ),
+    path(
+        "boards/<int:pk>/import-tickets/",
+        kanban_views.ImportTicketsView.as_view(),
+        name="board-import-tickets",
+    ),
+    path(
+        "boards/<int:pk>/events/",
+        kanban_views.BoardEventsView.as_view(),
+        name="board-events",
+    ),
+    path(
+        "boards/<int:pk>/changes/",
+        kanban_views.BoardChangesView.as_view(),
+        name="board-changes",
+    ),
+    path(
+        "boards/<int:pk>/analytics/",
+        kanban_views.BoardAnalyticsView.as_view(),
+        name="board-analytics",
+    ),
+    path(
+        "boards/<int:pk>/search/",
+        kanban_views.SearchView.as_view(),
+        name="board-search",
+    ),
     path(
         "boards/<int:pk>/backlog/",
         kanban_views.BacklogView.as_view(),
         name="board-backlog",
     ),
+    path(
+        "boards/<int:pk>/backlog/tickets/",
+        kanban_views.BacklogTicketsView.as_view(),
+        name="board-backlog-tickets",
+    ),
     path(
         "boards/<int:pk>/archive/",
         kanban_views.ArchiveView.as_view(),
         name="board-archive",
     ),
+    path(
+        "sprints/<int:pk>/tickets/",
+        kanban_views.SprintTicketsView.as_view(),
+        name="sprint-tickets",
+    ),
+    path(
+        "sprints/<int:pk>/burndown/",
+        kanban_views.SprintBurndownView.as_view(),
+        name="sprint-burndown",
+    ),
+    path(
+        "sprints/<int:pk>/burndown/data/",
+        kanban_views.SprintBurndownDataView.as_view(),
+        name="sprint-burndown-data",
+    ),
     path("tickets/<int:pk>/", kanban_views.TicketView.as_view(), name="ticket-detail"),
     path(
         "tickets/<int:pk>/edit/",
@@ -101,6 +148,11 @@ urlpatterns = [
         kanban_views.UpdateTicketStatusAJAXView.as_view(),
         name="ajax-ticket-update-status",
     ),
+    path(
+        "ajax/tickets/update-sprint/",
+        kanban_views.UpdateTicketSprintAJAXView.as_view(),
+        name="ajax-ticket-update-sprint",
+    ),
     path(
         "ajax/tickets/bulk-update-status/",
         kanban_views.BulkUpdateTicketStatusAJAXView.as_view(),
@@ -111,6 +163,11 @@ urlpatterns = [
         kanban_views.BulkUpdateTicketSprintAJAXView.as_view(),
         name="ajax-ticket-bulk-update-sprint",
     ),
+    path(
+        "ajax/statuses/update-order/",
+        kanban_views.UpdateBoardStatusOrderAJAXView.as_view(),
+        name="ajax-status-update-order",
+    ),
     path(
         "ajax/statuses/bulk-update/",
         kanban_views.BulkUpdateBoardStatusesAJAXView.as_view(),
@@ -1,13 +1,126 @@
+from django.core.cache import cache
+from django.db.models import Q
 from django.views.generic import TemplateView
 
+from kanban.cache import BOARD_LIST_TIMEOUT, aget_board_list_version
 from kanban.models import Board
+from kanban.pagination import decode_cursor, encode_cursor
 
 
 class HomeView(TemplateView):
+    """
+    The user's boards and all boards, each a page at a time in name order
+    with keyset cursors. Boards are listed with their ticket counts, active
+    sprint and member count, all fetched in one query per list, and pages
+    are cached under the board list version.
+    """
+
     template_name = "core/index.html"
+    page_size = 20
+
+    def get_cursors(self, prefix):
+        return (
+            parse_name_cursor(self.request.GET.get(f"{prefix}_after")),
+            parse_name_cursor(self.request.GET.get(f"{prefix}_before")),
+        )
+
+    async def aget_page(self, queryset, after, before):
+        """
+        Return the boards on the requested page along with cursors for the
+        pages either side of it, which are None at either end.
+        """
+        queryset = queryset.with_summaries()
+        if before:
+            name, pk = before
+            boards = [
+                board
+                async for board in queryset.filter(
+                    Q(name__lt=name) | Q(name=name, pk__lt=pk)
+                ).order_by("-name", "-pk")[: self.page_size + 1]
+            ]
+            has_previous = len(boards) > self.page_size
+            has_next = True
+            boards = boards[: self.page_size][::-1]
+        else:
+            if after:
+                name, pk = after
+                queryset = queryset.filter(Q(name__gt=name) | Q(name=name, pk__gt=pk))
+            boards = [
+                board
+                async for board in queryset.order_by("name", "pk")[: self.page_size + 1]
+            ]
+            has_previous = after is not None
+            has_next = len(boards) > self.page_size
+            boards = boards[: self.page_size]
+
+        previous_cursor = next_cursor = None
+        if boards and has_previous:
+            previous_cursor = encode_cursor(boards[0].name, boards[0].pk)
+        if boards and has_next:
+            next_cursor = encode_cursor(boards[-1].name, boards[-1].pk)
+        return boards, previous_cursor, next_cursor
+
+    async def aget_cached_page(self, prefix, queryset, owner, version):
+        """
+        Return a page from the cache, fetching it on a miss. ``owner`` keys
+        lists which differ between users; counts may be up to
+        ``BOARD_LIST_TIMEOUT`` seconds out of date.
+        """
+        after, before = self.get_cursors(prefix)
+        key = ":".join(
+            [
+                "kanban:board-list",
+                prefix,
+                str(owner),
+                str(version),
+                encode_cursor(*after) if after else "",
+                encode_cursor(*before) if before else "",
+            ]
+        )
+        page = await cache.aget(key)
+        if page is None:
+            page = await self.aget_page(queryset, after, before)
+            await cache.aset(key, page, BOARD_LIST_TIMEOUT)
+        boards, previous_cursor, next_cursor = page
+        return {
+            "boards": boards,
+            "previous_url": previous_cursor
+            and self.page_url(prefix, "before", previous_cursor),
+            "next_url": next_cursor and self.page_url(prefix, "after", next_cursor),
+        }
+
+    def page_url(self, prefix, direction, cursor):
+        """Link to another page of one list, keeping the other list's page."""
+        query = self.request.GET.copy()
+        query.pop(f"{prefix}_after", None)
+        query.pop(f"{prefix}_before", None)
+        query[f"{prefix}_{direction}"] = cursor
+        return f"?{query.urlencode()}"
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        version = await aget_board_list_version()
+        your_boards = None
+        if user.is_authenticated:
+            your_boards = await self.aget_cached_page(
+                "yours", Board.objects.filter(members__user=user), user.pk, version
+            )
+        context = self.get_context_data(
+            # Every user sees the same list of all boards, so it is cached once
+            all_boards=await self.aget_cached_page(
+                "all", Board.objects.all(), "any", version
+            ),
+            your_boards=your_boards,
+        )
+        return self.render_to_response(context)
+
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["all_boards"] = Board.objects.all()
-        context["your_boards"] = Board.objects.filter(members__user=self.request.user)
-        return context
+def parse_name_cursor(cursor):
+    """Return the board name and id held in a board list cursor, or None."""
+    values = decode_cursor(cursor)
+    if not values or len(values) != 2:
+        return None
+    name, pk = values
+    if not isinstance(name, str) or not isinstance(pk, int):
+        return None
+    return name, pk
@@ -0,0 +1,75 @@
+"""
+The current user's access to a board.
+
+A board's members are read with a single query and cached across requests
+until one of its memberships changes. Within a request the resolved access
+is kept on the request, so views and forms share one lookup.
+"""
+
+from django.core.cache import cache
+
+from kanban.cache import MEMBERS, aget_board_version, get_board_version
+from kanban.models import BoardMembership
+
+MEMBERS_TIMEOUT = 60 * 60
+
+
+def get_board_members(board_id):
+    """Return a dict mapping the user id of each member to whether they own the board."""
+    key = f"kanban:board-members:{board_id}:{get_board_version(board_id, MEMBERS)}"
+    members = cache.get(key)
+    if members is None:
+        members = dict(
+            BoardMembership.objects.filter(board_id=board_id).values_list(
+                "user_id", "is_owner"
+            )
+        )
+        cache.set(key, members, MEMBERS_TIMEOUT)
+    return members
+
+
+async def aget_board_members(board_id):
+    version = await aget_board_version(board_id, MEMBERS)
+    key = f"kanban:board-members:{board_id}:{version}"
+    members = await cache.aget(key)
+    if members is None:
+        members = {
+            user_id: is_owner
+            async for user_id, is_owner in BoardMembership.objects.filter(
+                board_id=board_id
+            ).values_list("user_id", "is_owner")
+        }
+        await cache.aset(key, members, MEMBERS_TIMEOUT)
+    return members
+
+
+class BoardAccess:
+    def __init__(self, board_id, user, members):
+        self.board_id = board_id
+        self.members = members
+        self.is_member = user.id in members
+        self.is_owner = members.get(user.id, False)
+
+    @property
+    def member_ids(self):
+        return list(self.members)
+
+
+def get_board_access(request, board_id):
+    """Return the BoardAccess of ``request.user``, resolving it once per request."""
+    accesses = request.__dict__.setdefault("_board_access", {})
+    if board_id not in accesses:
+        accesses[board_id] = BoardAccess(
+            board_id, request.user, get_board_members(board_id)
+        )
+    return accesses[board_id]
+
+
+async def aget_board_access(request, board_id):
+    """Like get_board_access, for async views."""
+    accesses = request.__dict__.setdefault("_board_access", {})
+    if board_id not in accesses:
+        accesses[board_id] = BoardAccess(
+            board_id, await request.auser(), await aget_board_members(board_id)
+        )
+    return accesses[board_id]
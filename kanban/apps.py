@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class KanbanConfig(AppConfig):
     name = 'kanban'
+
+    def ready(self):
+        from kanban import signals  # noqa: F401
+        from kanban.cache import check_shared_cache
+
+        checks.register(check_shared_cache, checks.Tags.caches, deploy=True)
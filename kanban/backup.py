@@ -0,0 +1,419 @@
+"""
+Export and import of single boards as JSON Lines, for backups and for
+moving a board between installs.
+
+An export holds one JSON object per line, each with a ``type``: the board
+first, then the users it refers to, its statuses, sprints and memberships,
+and finally its tickets, each followed by its comments. Rows are read with
+``iterator`` and written as they arrive, so exporting a board of any size
+takes constant memory.
+
+Importing always creates a new board. Rows are inserted with
+``bulk_create`` in batches and the ids in the file are mapped to the new
+ones as they go. Statuses, sprints and users are few, so their maps are
+kept whole; tickets are mapped a batch at a time, which works because
+comments follow their ticket. Users are matched by username, and those
+missing are either created without a usable password or left out, with
+their tickets and comments keeping no author or assignee.
+
+``bulk_create`` skips ``save``, so the rich text of tickets and comments
+is cleaned with ``richtext.process`` here and the plain text, excerpt and
+word count worked out again rather than trusted from the file. It sets
+``created_at`` and ``updated_at`` to the time of the insert, so the
+exported times are written back to each batch afterwards, and sends no
+signals, so imported tickets are added to the search index here. The
+status transition log and burndown snapshots are not exported; the
+active sprint's burndown starts again from the import.
+"""
+
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from kanban import burndown, richtext, search
+from kanban.cache import bump_board_list_version
+from kanban.models import Board, BoardMembership, Comment, Sprint, Ticket, TicketStatus
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+FORMAT_VERSION = 1
+
+# Fields exported for each type of row. Foreign keys hold the exported ids.
+BOARD_FIELDS = ("id", "name", "active_sprint", "created_at", "updated_at")
+USER_FIELDS = ("id", "username", "email", "first_name", "last_name")
+STATUS_FIELDS = ("id", "name", "order", "colour", "created_at", "updated_at")
+SPRINT_FIELDS = (
+    "id",
+    "name",
+    "start_date",
+    "completed_date",
+    "created_at",
+    "updated_at",
+)
+MEMBERSHIP_FIELDS = ("user", "is_owner")
+TICKET_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "description_plain",
+    "description_excerpt",
+    "description_word_count",
+    "status",
+    "order",
+    "author",
+    "assignee",
+    "sprint",
+    "created_at",
+    "updated_at",
+)
+COMMENT_FIELDS = ("ticket", "text", "text_plain", "author", "created_at", "updated_at")
+
+DATETIME_FIELDS = {"start_date", "completed_date", "created_at", "updated_at"}
+TIMESTAMPS = ("created_at", "updated_at")
+
+
+def no_progress(label, done):
+    pass
+
+
+def encode_value(value):
+    # Datetimes keep their full precision, which DjangoJSONEncoder would not
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def dump(kind, row):
+    return json.dumps({"type": kind, **row}, default=encode_value) + "\n"
+
+
+def ticket_rows(board_id):
+    """Yield the board's tickets in id order, each followed by its comments."""
+    tickets = (
+        Ticket.objects.filter(board_id=board_id)
+        .order_by("id")
+        .values(*TICKET_FIELDS)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    comments = (
+        Comment.objects.filter(ticket__board_id=board_id)
+        .order_by("ticket_id", "created_at", "id")
+        .values(*COMMENT_FIELDS)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    comment = next(comments, None)
+    for ticket in tickets:
+        yield "ticket", ticket
+        while comment is not None and comment["ticket"] == ticket["id"]:
+            yield "comment", comment
+            comment = next(comments, None)
+
+
+def export_board(board_id, out, progress=no_progress):
+    """
+    Write the board with ``board_id`` to the text stream ``out`` and return
+    the number of rows written.
+    """
+    tickets = Ticket.objects.filter(board_id=board_id).order_by()
+    # Subqueries rather than joins, which would multiply the tickets by
+    # their comments
+    users = User.objects.filter(
+        Q(pk__in=BoardMembership.objects.filter(board_id=board_id).values("user"))
+        | Q(pk__in=tickets.values("author"))
+        | Q(pk__in=tickets.values("assignee"))
+        | Q(
+            pk__in=Comment.objects.filter(ticket__board_id=board_id)
+            .order_by()
+            .values("author")
+        )
+    )
+    rows = 1
+    # One transaction, so the rows are read from one snapshot of the board
+    with transaction.atomic():
+        board = Board.objects.values(*BOARD_FIELDS).get(pk=board_id)
+        out.write(dump("board", {**board, "format": FORMAT_VERSION}))
+        for kind, queryset, fields in (
+            ("user", users, USER_FIELDS),
+            ("status", TicketStatus.objects.filter(board_id=board_id), STATUS_FIELDS),
+            ("sprint", Sprint.objects.filter(board_id=board_id), SPRINT_FIELDS),
+            (
+                "membership",
+                BoardMembership.objects.filter(board_id=board_id),
+                MEMBERSHIP_FIELDS,
+            ),
+        ):
+            for row in queryset.order_by("id").values(*fields).iterator():
+                out.write(dump(kind, row))
+                rows += 1
+        for kind, row in ticket_rows(board_id):
+            out.write(dump(kind, row))
+            rows += 1
+            if rows % BATCH_SIZE == 0:
+                progress("rows", rows)
+    progress("rows", rows)
+    return rows
+
+
+def parse(line):
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError("Not a JSON object")
+    for field in DATETIME_FIELDS.intersection(row):
+        if row[field] is not None:
+            value = parse_datetime(row[field])
+            if value is None:
+                raise ValueError(f"Invalid {field} {row[field]!r}")
+            row[field] = value
+    return row
+
+
+def restore_timestamps(model, objects, timestamps):
+    """
+    Put back the exported times that ``bulk_create`` overwrote. A keyed
+    UPDATE per row, as bulk_update's CASE expressions grow with the batch.
+    """
+    fields = [model._meta.get_field(name) for name in TIMESTAMPS]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {model._meta.db_table} SET "
+            + ", ".join(f"{field.column} = %s" for field in fields)
+            + " WHERE id = %s",
+            [
+                [
+                    *(
+                        field.get_db_prep_value(value, connection)
+                        for field, value in zip(fields, values)
+                    ),
+                    obj.pk,
+                ]
+                for obj, values in zip(objects, timestamps)
+            ],
+        )
+
+
+def create(model, objects):
+    """Bulk create ``objects``, keeping the times they were exported with."""
+    timestamps = [[getattr(obj, name) for name in TIMESTAMPS] for obj in objects]
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+    restore_timestamps(model, objects, timestamps)
+    return objects
+
+
+class Importer:
+    """
+    Build a new board from the rows of an export. Rows must arrive in the
+    order ``export_board`` writes them.
+
+    Each row is turned into an unsaved object as it is read, so a bad row
+    is reported on its own line, and objects are inserted once the next
+    kind of row starts or a batch fills up.
+    """
+
+    def __init__(self, name=None, create_users=False, progress=no_progress):
+        self.name = name
+        self.create_users = create_users
+        self.progress = progress
+        self.board = None
+        self.active_sprint = None
+        # Exported ids mapped to new ones
+        self.users = {}
+        self.statuses = {}
+        self.sprints = {}
+        # Kind of the rows being read, and their exported ids and objects
+        self.kind = None
+        self.pending = []
+        # Tickets with their exported ids, then their comments with the
+        # exported ids of their tickets
+        self.tickets = []
+        self.comments = []
+        self.ticket_count = 0
+        self.comment_count = 0
+
+    def build_user(self, row):
+        return User(
+            username=row["username"],
+            email=row["email"],
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            password="!",
+        )
+
+    def build_status(self, row):
+        return TicketStatus(
+            board=self.board,
+            name=row["name"],
+            order=row["order"],
+            colour=row["colour"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def build_sprint(self, row):
+        return Sprint(
+            board=self.board,
+            name=row["name"],
+            start_date=row["start_date"],
+            completed_date=row["completed_date"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def build_membership(self, row):
+        return BoardMembership(
+            board=self.board,
+            user_id=self.users.get(row["user"]),
+            is_owner=row["is_owner"],
+        )
+
+    def build_ticket(self, row):
+        description, plain = richtext.process(row["description"])
+        return Ticket(
+            board=self.board,
+            title=row["title"],
+            description=description,
+            description_plain=plain,
+            description_excerpt=richtext.excerpt(plain),
+            description_word_count=richtext.word_count(plain),
+            status_id=self.statuses.get(row["status"]),
+            order=row["order"],
+            author_id=self.users.get(row["author"]),
+            assignee_id=self.users.get(row["assignee"]),
+            sprint_id=self.sprints.get(row["sprint"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def build_comment(self, row):
+        if not self.tickets or self.tickets[-1][0] != row["ticket"]:
+            raise ValueError(f"Comment does not follow ticket {row['ticket']}")
+        text, plain = richtext.process(row["text"])
+        return Comment(
+            text=text,
+            text_plain=plain,
+            author_id=self.users.get(row["author"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def flush(self):
+        """Insert the objects of the kind read since the previous flush."""
+        ids = [exported_id for exported_id, _ in self.pending]
+        objects = [obj for _, obj in self.pending]
+        if self.kind == "user":
+            self.users = self.add_users(ids, objects)
+        elif self.kind == "status":
+            create(TicketStatus, objects)
+            self.statuses = {pk: obj.id for pk, obj in zip(ids, objects)}
+        elif self.kind == "sprint":
+            create(Sprint, objects)
+            self.sprints = {pk: obj.id for pk, obj in zip(ids, objects)}
+            if self.active_sprint in self.sprints:
+                self.board.active_sprint_id = self.sprints[self.active_sprint]
+                Board.objects.filter(pk=self.board.pk).update(
+                    active_sprint_id=self.board.active_sprint_id
+                )
+        elif self.kind == "membership":
+            BoardMembership.objects.bulk_create(
+                obj for obj in objects if obj.user_id is not None
+            )
+        self.kind, self.pending = None, []
+
+    def add_users(self, ids, users):
+        """Return exported user ids mapped to the users with their usernames."""
+        existing = dict(
+            User.objects.filter(
+                username__in=[user.username for user in users]
+            ).values_list("username", "id")
+        )
+        missing = [user for user in users if user.username not in existing]
+        if missing and self.create_users:
+            User.objects.bulk_create(missing)
+            existing.update((user.username, user.id) for user in missing)
+        return {
+            pk: existing[user.username]
+            for pk, user in zip(ids, users)
+            if user.username in existing
+        }
+
+    def flush_tickets(self):
+        if not self.tickets:
+            return
+        tickets = create(Ticket, [ticket for _, ticket in self.tickets])
+        ticket_ids = {pk: ticket.id for (pk, _), ticket in zip(self.tickets, tickets)}
+        comments = []
+        for ticket_id, comment in self.comments:
+            comment.ticket_id = ticket_ids[ticket_id]
+            comments.append(comment)
+        create(Comment, comments)
+        search.index_tickets(ticket_ids.values())
+        self.ticket_count += len(tickets)
+        self.comment_count += len(comments)
+        self.progress("tickets", self.ticket_count)
+        self.tickets, self.comments = [], []
+
+    def add(self, row):
+        kind = row.pop("type", None)
+        if kind == "board":
+            if self.board is not None:
+                raise ValueError("More than one board in the file")
+            if row.get("format") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported format {row.get('format')!r}")
+            self.board = Board.objects.create(name=self.name or row["name"])
+            self.active_sprint = row["active_sprint"]
+            return
+        if self.board is None:
+            raise ValueError("The file does not start with a board")
+        if kind not in ("user", "status", "sprint", "membership", "ticket", "comment"):
+            raise ValueError(f"Unknown row type {kind!r}")
+        if kind != self.kind and self.pending:
+            # Each kind refers only to the kinds before it
+            self.flush()
+
+        if kind == "ticket":
+            # Only between tickets, once every comment of the batch is in
+            if len(self.tickets) >= BATCH_SIZE or len(self.comments) >= BATCH_SIZE:
+                self.flush_tickets()
+            self.tickets.append((row["id"], self.build_ticket(row)))
+        elif kind == "comment":
+            self.comments.append((row["ticket"], self.build_comment(row)))
+        else:
+            self.kind = kind
+            build = getattr(self, f"build_{kind}")
+            self.pending.append((row.get("id"), build(row)))
+
+    def finish(self):
+        if self.board is None:
+            raise ValueError("The file does not start with a board")
+        if self.pending:
+            self.flush()
+        self.flush_tickets()
+        if self.board.active_sprint_id:
+            burndown.take_snapshot(self.board.active_sprint_id)
+        bump_board_list_version()
+
+
+def import_board(lines, name=None, create_users=False, progress=no_progress):
+    """
+    Create a board from the lines of an export and return the Importer,
+    whose ``board`` is the new board. ``name`` replaces the exported name.
+
+    Raises ValueError, naming the line, if the file is not a valid export,
+    in which case nothing is created.
+    """
+    importer = Importer(name, create_users, progress)
+    number = 0
+    with transaction.atomic():
+        try:
+            for number, line in enumerate(lines, start=1):
+                if line.strip():
+                    importer.add(parse(line))
+            importer.finish()
+        except KeyError as error:
+            raise ValueError(f"Line {number}: missing field {error}") from error
+        except (ValueError, TypeError) as error:
+            raise ValueError(f"Line {number}: {error}") from error
+    return importer
@@ -0,0 +1,141 @@
+"""
+Daily snapshots of the number of tickets in each status of a sprint, from
+which burndown charts are drawn without reading the tickets themselves.
+
+Snapshots are kept up to date incrementally. Ticket moves recorded with
+``kanban.history.record_moves`` are passed on to ``record_moves`` here,
+which adds the differences to today's counts of the active sprints
+involved. The first move of a day counts the sprint in full
+instead, as do starting and completing it, so any drift from changes made
+elsewhere lasts a day at most.
+
+Days without a move have no rows; ``get_burndown`` carries the previous
+day's counts forward.
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from kanban.constants import BasicStatuses
+from kanban.models import Sprint, SprintSnapshot, Ticket
+
+
+def take_snapshot(sprint_id, date=None):
+    """Replace a sprint's counts for a day with a full count of its tickets."""
+    date = date or timezone.localdate()
+    counts = (
+        Ticket.objects.filter(sprint_id=sprint_id, status__isnull=False)
+        .order_by()
+        .values_list("status")
+        .annotate(Count("id"))
+    )
+    SprintSnapshot.objects.filter(sprint_id=sprint_id, date=date).delete()
+    SprintSnapshot.objects.bulk_create(
+        SprintSnapshot(
+            sprint_id=sprint_id, status_id=status_id, date=date, ticket_count=count
+        )
+        for status_id, count in counts
+    )
+
+
+def record_moves(moves):
+    """
+    Add ticket moves to today's snapshots. ``moves`` holds a pair of
+    (sprint id, status id) tuples for each ticket, from before and after
+    the move. Call it in the transaction which moves the tickets, once the
+    move is saved.
+    """
+    deltas = defaultdict(Counter)
+    for (old_sprint, old_status), (new_sprint, new_status) in moves:
+        if (old_sprint, old_status) == (new_sprint, new_status):
+            continue
+        if old_sprint and old_status:
+            deltas[old_sprint][old_status] -= 1
+        if new_sprint and new_status:
+            deltas[new_sprint][new_status] += 1
+    if not deltas:
+        return
+
+    today = timezone.localdate()
+    active = list(
+        Sprint.objects.filter(
+            pk__in=deltas, start_date__isnull=False, completed_date__isnull=True
+        ).values_list("pk", flat=True)
+    )
+    counted = set(
+        SprintSnapshot.objects.filter(sprint_id__in=active, date=today).values_list(
+            "sprint_id", flat=True
+        )
+    )
+    for sprint_id in active:
+        if sprint_id not in counted:
+            # The full count already includes these moves
+            take_snapshot(sprint_id, today)
+            continue
+        for status_id, delta in deltas[sprint_id].items():
+            if not delta:
+                continue
+            updated = SprintSnapshot.objects.filter(
+                sprint_id=sprint_id, date=today, status_id=status_id
+            ).update(ticket_count=F("ticket_count") + delta)
+            if not updated:
+                SprintSnapshot.objects.create(
+                    sprint_id=sprint_id,
+                    date=today,
+                    status_id=status_id,
+                    ticket_count=delta,
+                )
+
+
+def get_burndown(sprint, statuses):
+    """
+    Return the counts of a started sprint for each day from its start to
+    its completion, or today, as a dict ready to be sent as JSON.
+
+    ``statuses`` are the board's statuses in column order. Each day lists
+    its count in each of them, the total and the number remaining, which
+    is every ticket not yet done.
+    """
+    end = sprint.completed_date or timezone.now()
+    start_date = timezone.localdate(sprint.start_date)
+    end_date = timezone.localdate(end)
+
+    counts_by_date = defaultdict(dict)
+    snapshots = SprintSnapshot.objects.filter(
+        sprint=sprint, date__lte=end_date
+    ).values_list("date", "status_id", "ticket_count")
+    for date, status_id, count in snapshots:
+        counts_by_date[date][status_id] = count
+    done_ids = {status.id for status in statuses if status.name == BasicStatuses.DONE}
+
+    days = []
+    counts = {}
+    date = start_date
+    while date <= end_date:
+        # Days without a snapshot had no moves
+        counts = counts_by_date.get(date, counts)
+        total = sum(counts.values())
+        days.append(
+            {
+                "date": date,
+                "counts": [counts.get(status.id, 0) for status in statuses],
+                "total": total,
+                "remaining": total
+                - sum(counts.get(status_id, 0) for status_id in done_ids),
+            }
+        )
+        date += timedelta(days=1)
+
+    return {
+        "sprint": {
+            "id": sprint.id,
+            "name": sprint.name,
+            "start_date": sprint.start_date,
+            "completed_date": sprint.completed_date,
+        },
+        "statuses": [{"id": status.id, "name": status.name} for status in statuses],
+        "days": days,
+    }
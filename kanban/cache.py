@@ -0,0 +1,147 @@
+"""
+Versioned caching of rendered board fragments.
+
+Each board has a version number in the cache which is bumped whenever one
+of its tickets, statuses, sprints or memberships changes. Fragments are
+cached under the current version, so a bump makes every fragment of that
+board stale at once without having to find and delete them.
+
+Data which changes less often than the board's content, such as its list
+of members, is versioned separately under its own ``scope``.
+
+The list of boards on the home page spans every board, so it has a single
+version of its own, bumped when a board, membership or sprint changes.
+Ticket counts shown there are not worth a bump on every ticket move and
+are left to expire after ``BOARD_LIST_TIMEOUT`` instead.
+
+Versions only invalidate fragments in the cache they are bumped in, so
+the cache must be shared by every server process. With a local-memory
+cache each process keeps its own versions and serves fragments that
+changes made through other processes have made stale, for up to
+``FRAGMENT_TIMEOUT``. ``check --deploy`` reports such a cache as an error.
+"""
+
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+BOARD_LIST_TIMEOUT = 60
+
+BOARD_LIST_VERSION_KEY = "kanban:board-list-version"
+
+
+CONTENT = "content"
+MEMBERS = "members"
+
+
+def board_version_key(board_id, scope):
+    return f"kanban:board-version:{scope}:{board_id}"
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a version evicted from the cache is never
+        # reused for fragments which may still be cached under it
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(key):
+    """
+    Bump a version once the current transaction commits, so readers never
+    cache data from before the change under the new version.
+    """
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def get_board_version(board_id, scope=CONTENT):
+    return get_version(board_version_key(board_id, scope))
+
+
+async def aget_board_version(board_id, scope=CONTENT):
+    return await aget_version(board_version_key(board_id, scope))
+
+
+def bump_board_version(board_id, scope=CONTENT):
+    """Invalidate every cached fragment of a board once the transaction commits."""
+    bump_version(board_version_key(board_id, scope))
+
+
+async def aget_board_list_version():
+    return await aget_version(BOARD_LIST_VERSION_KEY)
+
+
+def bump_board_list_version():
+    """Invalidate every cached page of the home page's board lists."""
+    bump_version(BOARD_LIST_VERSION_KEY)
+
+
+def fragment_key(board_id, version, name, vary_on):
+    parts = [name, board_id, version, *vary_on]
+    return "kanban:board-fragment:" + ":".join(str(part) for part in parts)
+
+
+def get_cached_value(board_id, name, compute, *vary_on):
+    """
+    Return the value produced by ``compute()``, cached under the board's
+    current version. ``vary_on`` values are added to the key for values
+    that differ between viewers.
+    """
+    key = fragment_key(board_id, get_board_version(board_id), name, vary_on)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, FRAGMENT_TIMEOUT)
+    return value
+
+
+def get_cached_fragment(board_id, name, render, *vary_on):
+    """Like get_cached_value, for the HTML produced by ``render()``."""
+    return mark_safe(get_cached_value(board_id, name, render, *vary_on))
+
+
+async def aget_cached_fragment(board_id, name, render, *vary_on):
+    """Like get_cached_fragment, for async views. ``render`` is awaited."""
+    key = fragment_key(board_id, await aget_board_version(board_id), name, vary_on)
+    html = await cache.aget(key)
+    if html is None:
+        html = await render()
+        await cache.aset(key, html, FRAGMENT_TIMEOUT)
+    return mark_safe(html)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """System check that fragments are cached where every process sees them."""
+    if not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        Error(
+            "Board fragments are cached in local memory, so each server "
+            "process keeps its own copy and serves changes made through "
+            "the others stale.",
+            hint="Set REDIS_URL to cache in Redis.",
+            id="kanban.E001",
+        )
+    ]
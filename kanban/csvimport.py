@@ -0,0 +1,220 @@
+"""
+Import of tickets from CSV files, such as the exports of other trackers.
+
+The first row names the columns. ``title`` is required and
+``description``, ``status``, ``sprint`` and ``assignee`` are optional;
+other columns are ignored. Headers are matched regardless of case, and
+``columns`` maps fields to headers named differently.
+
+Statuses and sprints are matched by name, and assignees by username,
+email or full name, against dicts of the board's statuses, sprints and
+members read once up front. A row with a value that matches nothing is
+reported with its line number and skipped, and the others are imported.
+Tickets without a status go in To do and those without a sprint in the
+backlog, below the board's existing tickets in the order of the file.
+
+Rows are read as a stream and inserted with ``bulk_create`` in batches.
+Each batch is saved in its own transaction together with its tickets'
+history and search index, so memory use does not grow with the file and
+a failure keeps the batches before it.
+"""
+
+import csv
+from html import escape
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Max
+
+from kanban import history, richtext, search
+from kanban.cache import bump_board_version
+from kanban.constants import BasicStatuses
+from kanban.models import Sprint, Ticket, TicketStatus, User
+from kanban.ranking import RANK_STEP
+
+FIELDS = ("title", "description", "status", "sprint", "assignee")
+BATCH_SIZE = 1000
+TITLE_LENGTH = Ticket._meta.get_field("title").max_length
+
+
+def no_progress(label, done):
+    pass
+
+
+class RowError(NamedTuple):
+    line: int
+    message: str
+
+
+class ReadError(ValueError):
+    """
+    The file could not be read past a point, after ``created`` tickets from
+    the batches before it had been saved.
+    """
+
+    def __init__(self, message, created):
+        super().__init__(message)
+        self.created = created
+
+
+def key(value):
+    return " ".join(value.split()).casefold()
+
+
+def description_html(value):
+    """
+    Return a description as HTML. Plain text, as most trackers export, gets
+    a paragraph per line; anything with tags is taken to be HTML already.
+    """
+    if "<" in value:
+        return value
+    return "".join(
+        f"<p>{escape(line.strip())}</p>" for line in value.splitlines() if line.strip()
+    )
+
+
+class TicketImporter:
+    """
+    Turn CSV rows into tickets on a board, collecting the errors of rows
+    which cannot be imported in ``errors``.
+    """
+
+    def __init__(self, board, user=None, progress=no_progress):
+        self.board = board
+        self.user = user
+        self.progress = progress
+        self.author_id = user.pk if user and user.is_authenticated else None
+        self.statuses = {
+            key(name): pk
+            for name, pk in TicketStatus.objects.filter(board=board).values_list(
+                "name", "id"
+            )
+        }
+        self.todo_id = self.statuses.get(key(BasicStatuses.TODO))
+        # In id order, so the latest of several sprints with a name wins
+        self.sprints = {
+            key(name): pk
+            for name, pk in Sprint.objects.filter(board=board)
+            .order_by("id")
+            .values_list("name", "id")
+        }
+        self.members = {}
+        for pk, username, email, first_name, last_name in User.objects.filter(
+            memberships__board=board
+        ).values_list("id", "username", "email", "first_name", "last_name"):
+            for name in (username, email, f"{first_name} {last_name}"):
+                if name.strip():
+                    self.members.setdefault(key(name), pk)
+        self.order = (
+            Ticket.objects.filter(board=board).aggregate(Max("order"))["order__max"]
+            or 0
+        )
+        self.tickets = []
+        self.created = 0
+        self.errors = []
+
+    def lookup(self, table, kind, value):
+        """Return the id of a named status, sprint or member, or None if blank."""
+        if not value.strip():
+            return None
+        try:
+            return table[key(value)]
+        except KeyError:
+            raise ValueError(
+                f"No {kind} called “{value.strip()}” on this board"
+            ) from None
+
+    def build_ticket(self, row):
+        title = " ".join(row.get("title", "").split())
+        if not title:
+            raise ValueError("Title is blank")
+        if len(title) > TITLE_LENGTH:
+            raise ValueError(f"Title is longer than {TITLE_LENGTH} characters")
+        status_id = self.lookup(self.statuses, "status", row.get("status", ""))
+        sprint_id = self.lookup(self.sprints, "sprint", row.get("sprint", ""))
+        assignee_id = self.lookup(self.members, "member", row.get("assignee", ""))
+        description, plain = richtext.process(
+            description_html(row.get("description", ""))
+        )
+        self.order += RANK_STEP
+        return Ticket(
+            board=self.board,
+            title=title,
+            description=description,
+            description_plain=plain,
+            description_excerpt=richtext.excerpt(plain),
+            description_word_count=richtext.word_count(plain),
+            status_id=status_id or self.todo_id,
+            sprint_id=sprint_id,
+            assignee_id=assignee_id,
+            author_id=self.author_id,
+            order=self.order,
+        )
+
+    def add(self, line, row):
+        try:
+            ticket = self.build_ticket(row)
+        except ValueError as error:
+            self.errors.append(RowError(line, str(error)))
+            return
+        self.tickets.append(ticket)
+        if len(self.tickets) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.tickets:
+            return
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create(self.tickets)
+            history.record_moves(
+                ((None, history.state(ticket)) for ticket in tickets), self.user
+            )
+            search.index_tickets(ticket.id for ticket in tickets)
+            bump_board_version(self.board.id)
+        self.created += len(tickets)
+        self.progress("tickets", self.created)
+        self.tickets = []
+
+
+def import_tickets(board, file, user=None, columns=None, progress=no_progress):
+    """
+    Create tickets on ``board`` from the CSV text stream ``file`` on behalf
+    of ``user`` and return the TicketImporter, which holds the number of
+    tickets ``created`` and the ``errors`` of rows left out.
+
+    ``columns`` maps fields to the headers they are read from. Raises
+    ValueError if the header has no title column, and ReadError if the
+    file turns out not to be valid CSV part way through, in which case the
+    batches already saved are kept and counted in its ``created``.
+    """
+    reader = csv.reader(file)
+    headers = {key(header): i for i, header in enumerate(next(reader, []))}
+    columns = {**{field: field for field in FIELDS}, **(columns or {})}
+    positions = {
+        field: headers[key(header)]
+        for field, header in columns.items()
+        if key(header) in headers
+    }
+    if "title" not in positions:
+        raise ValueError(f"No “{columns['title']}” column in the first row")
+
+    importer = TicketImporter(board, user, progress)
+    try:
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            importer.add(
+                reader.line_num,
+                {
+                    field: row[position] if position < len(row) else ""
+                    for field, position in positions.items()
+                },
+            )
+    except csv.Error as error:
+        raise ReadError(f"Line {reader.line_num}: {error}", importer.created) from error
+    except UnicodeDecodeError as error:
+        raise ReadError(
+            f"After line {reader.line_num}: {error}", importer.created
+        ) from error
+    importer.flush()
+    return importer
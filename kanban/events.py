@@ -0,0 +1,93 @@
+"""
+Publish and subscribe to changes on a board.
+
+Mutating views publish small deltas describing what moved, and the board
+page listens for them on a server-sent events stream so it can patch the
+page in place instead of reloading it.
+
+The broker is chosen with the ``KANBAN_EVENTS_BACKEND`` setting. The
+default keeps subscribers in memory, so it only reaches clients connected
+to the same process; a deployment running several workers should point
+the setting at a broker backed by a shared channel, such as Redis pub/sub,
+implementing the same methods as BaseBroker.
+"""
+
+import asyncio
+import functools
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "kanban.events.InProcessBroker"
+
+# Events held for a slow subscriber before it starts missing them
+QUEUE_SIZE = 100
+
+
+class BaseBroker:
+    def publish(self, board_id, event):
+        """Send an event to everyone subscribed to a board."""
+        raise NotImplementedError
+
+    def subscribe(self, board_id):
+        """
+        Return an asyncio queue that receives the events published to a
+        board. Call from the event loop that will read the queue.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, board_id, queue):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Fan events out to subscribers in this process through asyncio queues.
+
+    ``publish`` may be called from any thread, including the sync worker
+    threads Django runs ordinary views in, so events are handed to each
+    subscriber's event loop rather than put on its queue directly.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(dict)
+
+    def publish(self, board_id, event):
+        for queue, loop in list(self.subscribers.get(board_id, {}).items()):
+            try:
+                loop.call_soon_threadsafe(self.deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop closed before it could unsubscribe
+                self.unsubscribe(board_id, queue)
+
+    @staticmethod
+    def deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    def subscribe(self, board_id):
+        queue = asyncio.Queue(QUEUE_SIZE)
+        self.subscribers[board_id][queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, board_id, queue):
+        subscribers = self.subscribers.get(board_id, {})
+        subscribers.pop(queue, None)
+        if not subscribers:
+            self.subscribers.pop(board_id, None)
+
+
+@functools.cache
+def get_broker():
+    backend = getattr(settings, "KANBAN_EVENTS_BACKEND", DEFAULT_BACKEND)
+    return import_string(backend)()
+
+
+def publish_board_event(board_id, event_type, **data):
+    """Publish an event to a board once the current transaction commits."""
+    event = {"type": event_type, **data}
+    transaction.on_commit(lambda: get_broker().publish(board_id, event))
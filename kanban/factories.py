@@ -50,3 +50,20 @@ class TicketFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = models.Ticket
+
+
+class SprintFactory(factory.django.DjangoModelFactory):
+    name = factory.Faker("text", max_nb_chars=20)
+    board = factory.SubFactory(BoardFactory)
+
+    class Meta:
+        model = models.Sprint
+
+
+class CommentFactory(factory.django.DjangoModelFactory):
+    text = factory.Faker("paragraph")
+    author = factory.SubFactory(UserFactory)
+    ticket = factory.SubFactory(TicketFactory)
+
+    class Meta:
+        model = models.Comment
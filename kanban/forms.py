@@ -175,18 +175,16 @@ class CreateMembershipForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         self.board_id = kwargs.pop("board_id")
+        member_ids = kwargs.pop("member_ids")
         super().__init__(*args, **kwargs)
 
         back_url = reverse_lazy(
             "board-manage-memberships", kwargs={"pk": self.board_id}
         )
 
-        member_user_pks = BoardMembership.objects.filter(
-            board_id=self.board_id
-        ).values_list("pk")
-        self.fields["user"].queryset = User.objects.exclude(
-            pk__in=member_user_pks
-        ).order_by("last_name")
+        self.fields["user"].queryset = User.objects.exclude(pk__in=member_ids).order_by(
+            "last_name"
+        )
 
         self.helper = FormHelper(self)
         self.helper.layout = layout.Layout(
@@ -344,15 +342,14 @@ class TicketCreateForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         board_id = kwargs.pop("board_id")
         sprint_id = kwargs.pop("sprint_id")
+        member_ids = kwargs.pop("member_ids")
         super().__init__(*args, **kwargs)
 
         self.fields["sprint"].queryset = Sprint.objects.filter(
             completed_date__isnull=True
         )
 
-        self.fields["assignee"].queryset = User.objects.filter(
-            memberships__board__id=board_id
-        )
+        self.fields["assignee"].queryset = User.objects.filter(pk__in=member_ids)
 
         if sprint_id and sprint_id != "backlog":
             sprint = Sprint.objects.get(pk=sprint_id)
@@ -447,14 +444,11 @@ class TicketAssigneeForm(forms.ModelForm):
         fields = ("assignee",)
 
     def __init__(self, *args, **kwargs):
-        board_id = kwargs.pop("board_id")
+        member_ids = kwargs.pop("member_ids")
         super().__init__(*args, **kwargs)
 
-        member_user_pks = BoardMembership.objects.filter(board_id=board_id).values_list(
-            "user__pk"
-        )
         self.fields["assignee"].queryset = User.objects.filter(
-            pk__in=member_user_pks
+            pk__in=member_ids
         ).order_by("last_name")
 
         self.helper = FormHelper(self)
@@ -584,3 +578,39 @@ class CommentCreateForm(forms.ModelForm):
                 data_prevent_double_click="true",
             ),
         )
+
+
+class TicketImportForm(forms.Form):
+    file = forms.FileField(
+        label="CSV file",
+        help_text=(
+            "The first row must name the columns. Title is required, and "
+            "description, status, sprint and assignee are optional. Statuses "
+            "and sprints are matched by name, and assignees by username, "
+            "email or full name."
+        ),
+        error_messages={
+            "required": "Please choose a file",
+        },
+    )
+
+    def __init__(self, *args, **kwargs):
+        board_id = kwargs.pop("board_id")
+        super().__init__(*args, **kwargs)
+
+        back_url = reverse_lazy("board-settings", kwargs={"pk": board_id})
+
+        self.helper = FormHelper(self)
+        self.helper.layout = layout.Layout(
+            layout.HTML(
+                f'<a href="{back_url}" class="govuk-back-link">Back to board settings</a>'
+            ),
+            layout.HTML.h1("Import tickets"),
+            "file",
+            layout.Submit(
+                "submit",
+                "Import",
+                data_module="govuk-button",
+                data_prevent_double_click="true",
+            ),
+        )
@@ -0,0 +1,69 @@
+"""
+History of ticket moves between statuses and sprints.
+
+Views which move tickets take each ticket's ``state`` before the change
+and, once the change is saved, pass the states before and after it to
+``record_moves`` in the same transaction. Every change of status is
+appended to the StatusTransition log with bulk inserts, and the burndown
+snapshots of the sprints involved are updated.
+"""
+
+from typing import NamedTuple
+
+from django.utils import timezone
+
+from kanban import burndown
+from kanban.models import StatusTransition
+
+BATCH_SIZE = 1000
+
+
+class TicketState(NamedTuple):
+    ticket_id: int
+    board_id: int
+    sprint_id: int
+    status_id: int
+
+
+# Columns to read with values_list to build TicketState rows
+STATE_FIELDS = ("id", "board_id", "sprint_id", "status_id")
+
+
+def state(ticket):
+    return TicketState(ticket.id, ticket.board_id, ticket.sprint_id, ticket.status_id)
+
+
+def record_moves(moves, user=None):
+    """
+    Record ticket moves made by ``user``. ``moves`` holds a (before, after)
+    pair of states for each ticket, where before is None for a new ticket
+    and after is None for a deleted one.
+    """
+    moves = list(moves)
+    actor_id = user.pk if user and user.is_authenticated else None
+    now = timezone.now()
+    StatusTransition.objects.bulk_create(
+        (
+            StatusTransition(
+                board_id=after.board_id,
+                ticket_id=after.ticket_id,
+                from_status_id=before and before.status_id,
+                to_status_id=after.status_id,
+                # The sprint the ticket is in, or the one it just left
+                sprint_id=after.sprint_id or (before and before.sprint_id),
+                actor_id=actor_id,
+                created_at=now,
+            )
+            for before, after in moves
+            # Deleted tickets take their transitions with them
+            if after and (before and before.status_id) != after.status_id
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    burndown.record_moves(
+        (
+            (before.sprint_id, before.status_id) if before else (None, None),
+            (after.sprint_id, after.status_id) if after else (None, None),
+        )
+        for before, after in moves
+    )
@@ -0,0 +1,339 @@
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from kanban import seeding
+from kanban.models import Ticket
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list."""
+    rank = max(round(pct / 100 * len(values) + 0.5), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def summarise(timings):
+    timings = sorted(timings)
+    summary = {f"p{pct}": percentile(timings, pct) for pct in PERCENTILES}
+    summary["min"] = timings[0]
+    summary["max"] = timings[-1]
+    summary["mean"] = sum(timings) / len(timings)
+    return {key: round(value * 1000, 3) for key, value in summary.items()}
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the main pages and AJAX endpoints against generated boards of "
+        "several sizes, reporting latency percentiles, query counts and peak "
+        "memory per URL name as JSON. Runs in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            nargs="+",
+            type=int,
+            default=[100, 1000, 10000],
+            help="Ticket counts of the boards to benchmark",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=20, help="Timed requests per URL"
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Untimed requests per URL first, to settle connections and imports",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--url-name",
+            action="append",
+            dest="url_names",
+            help="Only benchmark this URL name, may be repeated",
+        )
+        parser.add_argument(
+            "--output", help="Write the results to this file instead of stdout"
+        )
+        parser.add_argument(
+            "--compare", help="Show the change in p50 from an earlier results file"
+        )
+
+    def get_targets(self, board):
+        """
+        Return (url name, method, url, payload) for each request to time
+        against a seeded board.
+        """
+        first_status = board.statuses.order_by("order").first()
+        column = list(
+            Ticket.objects.live()
+            .filter(board=board, status=first_status)
+            .order_by("order", "id")[:100]
+        )
+        backlog = list(
+            Ticket.objects.filter(board=board, sprint=None).order_by("order", "id")[:3]
+        )
+        completed_sprint = board.sprints.filter(completed_date__isnull=False).first()
+        statuses = list(board.statuses.order_by("order"))
+        ticket = column[0] if column else Ticket.objects.filter(board=board).first()
+
+        targets = [
+            ("index", "get", reverse("index"), None),
+            ("board-detail", "get", reverse("board-detail", args=[board.pk]), None),
+            ("board-backlog", "get", reverse("board-backlog", args=[board.pk]), None),
+            (
+                "board-backlog-tickets",
+                "get",
+                reverse("board-backlog-tickets", args=[board.pk]) + "?group=backlog",
+                None,
+            ),
+            ("board-archive", "get", reverse("board-archive", args=[board.pk]), None),
+            (
+                "board-search",
+                "get",
+                reverse("board-search", args=[board.pk]) + "?q=login",
+                None,
+            ),
+            ("board-changes", "get", reverse("board-changes", args=[board.pk]), None),
+            (
+                "board-analytics",
+                "get",
+                reverse("board-analytics", args=[board.pk]),
+                None,
+            ),
+            ("ticket-detail", "get", reverse("ticket-detail", args=[ticket.pk]), None),
+        ]
+        if completed_sprint:
+            targets.append(
+                (
+                    "sprint-tickets",
+                    "get",
+                    reverse("sprint-tickets", args=[completed_sprint.pk]),
+                    None,
+                )
+            )
+        if len(column) >= 3:
+            # Moving the last ticket between the first two leaves it there,
+            # so the same move can be repeated
+            targets.append(
+                (
+                    "ajax-ticket-update-status",
+                    "post",
+                    reverse("ajax-ticket-update-status"),
+                    {
+                        "id": column[-1].id,
+                        "status": first_status.id,
+                        "previous": column[0].id,
+                        "next": column[1].id,
+                    },
+                )
+            )
+            targets.append(
+                (
+                    "ajax-ticket-bulk-update-status",
+                    "post",
+                    reverse("ajax-ticket-bulk-update-status"),
+                    {
+                        "tickets": [
+                            {"id": t.id, "status": first_status.id, "order": i}
+                            for i, t in enumerate(column)
+                        ]
+                    },
+                )
+            )
+        if len(backlog) >= 3:
+            targets.append(
+                (
+                    "ajax-ticket-update-sprint",
+                    "post",
+                    reverse("ajax-ticket-update-sprint"),
+                    {
+                        "id": backlog[-1].id,
+                        "sprint": "backlog",
+                        "previous": backlog[0].id,
+                        "next": backlog[1].id,
+                    },
+                )
+            )
+        targets.append(
+            (
+                "ajax-statuses-bulk-update",
+                "post",
+                reverse("ajax-statuses-bulk-update"),
+                {
+                    "statuses": [
+                        {"id": s.id, "order": i} for i, s in enumerate(statuses)
+                    ]
+                },
+            )
+        )
+        return targets
+
+    def request(self, client, method, url, payload):
+        if method == "post":
+            return client.post(url, payload, content_type="application/json")
+        return client.get(url)
+
+    def trace(self, client, method, url, payload):
+        """
+        Make a request counting its queries and peak memory, on its own as
+        tracing would skew the timings.
+        """
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            tracemalloc.start()
+            response = self.request(client, method, url, payload)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return response, len(queries), peak
+
+    def time_requests(self, client, method, url, payload, requests, cold):
+        """Time requests, clearing the cache before each one when ``cold``."""
+        timings = []
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            start = time.perf_counter()
+            self.request(client, method, url, payload)
+            timings.append(time.perf_counter() - start)
+        return summarise(timings)
+
+    def measure(self, client, method, url, payload, requests, warmup):
+        """
+        Measure a URL with an empty cache, so the figures cover the loaders
+        behind the cached fragments, and again with a warm one.
+        """
+        for _ in range(warmup):
+            self.request(client, method, url, payload)
+
+        cache.clear()
+        response, queries, peak = self.trace(client, method, url, payload)
+        latency = self.time_requests(client, method, url, payload, requests, cold=True)
+        _, warm_queries, _ = self.trace(client, method, url, payload)
+        warm_latency = self.time_requests(
+            client, method, url, payload, requests, cold=False
+        )
+
+        return {
+            "status": response.status_code,
+            "bytes": len(response.content),
+            "queries": queries,
+            "peak_memory_kib": round(peak / 1024, 1),
+            "latency_ms": latency,
+            "warm": {"queries": warm_queries, "latency_ms": warm_latency},
+        }
+
+    def run(self, scales, requests, warmup, seed, url_names=None):
+        """Seed a board for each scale and benchmark it. Returns the results."""
+        rng = random.Random(seed)
+        results = []
+        for scale in scales:
+            self.stdout.write(f"Seeding a board with {scale} tickets")
+            board = seeding.seed_board(scale, rng)
+            owner = board.members.get(is_owner=True).user
+            client = Client()
+            client.force_login(owner)
+            for url_name, method, url, payload in self.get_targets(board):
+                if url_names and url_name not in url_names:
+                    continue
+                result = self.measure(client, method, url, payload, requests, warmup)
+                results.append(
+                    {"scale": scale, "url_name": url_name, "method": method, **result}
+                )
+                latency = result["latency_ms"]
+                warm = result["warm"]
+                self.stdout.write(
+                    f"  {url_name:<32} {latency['p50']:>9.2f} ms p50 "
+                    f"{latency['p95']:>9.2f} ms p95 {result['queries']:>4} queries "
+                    f"{result['peak_memory_kib']:>9.1f} KiB, warm "
+                    f"{warm['latency_ms']['p50']:>9.2f} ms p50 "
+                    f"{warm['queries']:>4} queries"
+                )
+        return results
+
+    def compare(self, results, path):
+        with open(path) as f:
+            baseline = {(r["scale"], r["url_name"]): r for r in json.load(f)["results"]}
+        self.stdout.write(f"Change in p50 from {path}")
+        for result in results:
+            before = baseline.get((result["scale"], result["url_name"]))
+            if before is None:
+                continue
+            old, new = before["latency_ms"]["p50"], result["latency_ms"]["p50"]
+            change = (new - old) / old * 100 if old else 0
+            self.stdout.write(
+                f"  {result['scale']:>7} {result['url_name']:<32} "
+                f"{old:>9.2f} -> {new:>9.2f} ms ({change:+.1f}%)"
+            )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = self.run(
+                options["scales"],
+                options["requests"],
+                options["warmup"],
+                options["seed"],
+                options["url_names"],
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "warmup": options["warmup"],
+            "seed": options["seed"],
+            "results": results,
+        }
+        if options["compare"]:
+            self.compare(results, options["compare"])
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
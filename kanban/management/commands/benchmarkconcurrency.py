@@ -0,0 +1,184 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from kanban import seeding
+from kanban.management.commands.benchmark import git_revision, summarise
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the sync WSGI and async ASGI request "
+        "handlers serving the read-heavy pages to many concurrent clients. "
+        "Runs in-process against a generated board in a throwaway test "
+        "database, so it measures Django rather than a particular server."
+    )
+
+    url_names = ("index", "board-detail", "board-backlog", "ticket-detail")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tickets", type=int, default=1000, help="Tickets on the generated board"
+        )
+        parser.add_argument(
+            "--concurrency",
+            nargs="+",
+            type=int,
+            default=[8, 32, 128],
+            help="Numbers of concurrent clients to try",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=400, help="Requests per URL and run"
+        )
+        parser.add_argument(
+            "--query-delay",
+            type=float,
+            default=0,
+            help=(
+                "Milliseconds added to every query, to stand in for the round "
+                "trip to a database server"
+            ),
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output", help="Write the results to this file instead of stdout"
+        )
+
+    def add_query_delay(self, delay):
+        def delay_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_wrapper(connection, **kwargs):
+            connection.execute_wrappers.append(delay_query)
+
+        connection_created.connect(add_wrapper, weak=False)
+        for connection in connections.all(initialized_only=True):
+            add_wrapper(connection)
+
+    def run_wsgi(self, url, cookies, concurrency, requests):
+        """Serve the requests from a pool of threads, as a threaded WSGI server would."""
+        local = threading.local()
+
+        def request(_):
+            if not hasattr(local, "client"):
+                local.client = Client()
+                local.client.cookies = cookies
+            start = time.perf_counter()
+            response = local.client.get(url)
+            return time.perf_counter() - start, response.status_code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            results = list(pool.map(request, range(requests)))
+            return time.perf_counter() - start, results
+
+    def run_asgi(self, url, cookies, concurrency, requests):
+        """Serve the requests from one event loop, as an ASGI server would."""
+
+        async def run():
+            client = AsyncClient()
+            client.cookies = cookies
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def request():
+                async with semaphore:
+                    # ASGI servers give each request its own context, so the
+                    # sync parts of different requests run in separate threads
+                    async with ThreadSensitiveContext():
+                        start = time.perf_counter()
+                        response = await client.get(url)
+                        return time.perf_counter() - start, response.status_code
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(request() for _ in range(requests)))
+            return time.perf_counter() - start, results
+
+        return asyncio.run(run())
+
+    def benchmark(self, options):
+        board = seeding.seed_board(options["tickets"], random.Random(options["seed"]))
+        owner = board.members.get(is_owner=True).user
+        client = Client()
+        client.force_login(owner)
+        urls = {
+            "index": reverse("index"),
+            "board-detail": reverse("board-detail", args=[board.pk]),
+            "board-backlog": reverse("board-backlog", args=[board.pk]),
+            "ticket-detail": reverse(
+                "ticket-detail", args=[board.tickets.values_list("pk", flat=True)[0]]
+            ),
+        }
+        if options["query_delay"]:
+            self.add_query_delay(options["query_delay"] / 1000)
+
+        results = []
+        for url_name in self.url_names:
+            # Warm the caches so every run sees the same state
+            client.get(urls[url_name])
+            for concurrency in options["concurrency"]:
+                for handler, run in (("wsgi", self.run_wsgi), ("asgi", self.run_asgi)):
+                    elapsed, responses = run(
+                        urls[url_name], client.cookies, concurrency, options["requests"]
+                    )
+                    timings = [timing for timing, _ in responses]
+                    errors = sum(status != 200 for _, status in responses)
+                    throughput = len(responses) / elapsed
+                    results.append(
+                        {
+                            "url_name": url_name,
+                            "handler": handler,
+                            "concurrency": concurrency,
+                            "requests_per_second": round(throughput, 1),
+                            "errors": errors,
+                            "latency_ms": summarise(timings),
+                        }
+                    )
+                    self.stdout.write(
+                        f"  {url_name:<16} {handler} x{concurrency:<4} "
+                        f"{throughput:>8.1f} req/s "
+                        f"{results[-1]['latency_ms']['p95']:>9.2f} ms p95"
+                        + (f" {errors} errors" if errors else "")
+                    )
+        return results
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = self.benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "revision": git_revision(),
+            "tickets": options["tickets"],
+            "requests": options["requests"],
+            "query_delay_ms": options["query_delay"],
+            "results": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
@@ -1,9 +1,10 @@
 import random
+import time
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
-from kanban import factories
+from kanban import factories, seeding
 from kanban.constants import BasicStatuses
 
 User = get_user_model()
@@ -14,12 +15,42 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("email", nargs="?", type=str)
+        parser.add_argument(
+            "--scale",
+            action="store_true",
+            help=(
+                "Generate a large data set with bulk inserts, using the counts "
+                "below, for load testing"
+            ),
+        )
+        parser.add_argument("--boards", type=int, default=10)
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument(
+            "--tickets", type=int, default=10000, help="Tickets across all boards"
+        )
+        parser.add_argument(
+            "--sprints",
+            type=int,
+            help="Sprints across all boards, one per 50 tickets by default",
+        )
+        parser.add_argument(
+            "--comments",
+            type=int,
+            help="Comments across all tickets, 1.5 per ticket by default",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed for repeatable data"
+        )
 
     def handle(self, *args, **options):
         developer_user = None
         if options["email"]:
             developer_user = User.objects.get(email=options["email"])
 
+        if options["scale"]:
+            self.create_at_scale(developer_user, options)
+            return
+
         test_users = factories.UserFactory.create_batch(10)
         users = ", ".join([f"{u.first_name} {u.last_name}" for u in test_users])
         self.stdout.write(self.style.SUCCESS(f"Created test users: {users}"))
@@ -66,3 +97,44 @@ class Command(BaseCommand):
         )
 
         self.stdout.write(self.style.SUCCESS(f"Created test data"))
+
+    def create_at_scale(self, developer_user, options):
+        tickets = options["tickets"]
+        sprints = options["sprints"]
+        if sprints is None:
+            sprints = tickets // seeding.SPRINT_SIZE
+        comments = options["comments"]
+        if comments is None:
+            comments = int(tickets * seeding.COMMENTS_PER_TICKET)
+
+        started = time.monotonic()
+        reported = {}
+
+        def progress(label, done, total):
+            # Report each tenth of the way, so millions of rows print a
+            # handful of lines per board
+            tenth = done * 10 // max(total, 1)
+            if reported.get(label) == tenth and done != total:
+                return
+            reported[label] = tenth
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  {label}: {done:,}/{total:,} ({elapsed:.0f}s)")
+
+        boards = seeding.seed(
+            options["boards"],
+            options["users"],
+            tickets,
+            sprints,
+            comments,
+            random.Random(options["seed"]),
+            owner=developer_user,
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(boards):,} boards, {options['users']:,} users, "
+                f"{tickets:,} tickets, {sprints:,} sprints and {comments:,} "
+                f"comments in {elapsed:.0f}s"
+            )
+        )
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban import backup
+from kanban.models import Board
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a board's statuses, sprints, memberships, tickets and comments "
+        "as JSON Lines, for importboard to restore. Rows are streamed, so "
+        "boards of any size export in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("board", type=int, help="Id of the board to export")
+        parser.add_argument(
+            "--output", help="Write the export to this file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        if not Board.objects.filter(pk=options["board"]).exists():
+            raise CommandError(f"No board with id {options['board']}")
+
+        started = time.monotonic()
+        reported = {}
+
+        def progress(label, done):
+            # Report every 100,000 rows
+            step = done // (backup.BATCH_SIZE * 100)
+            if reported.get(label, 0) == step:
+                return
+            reported[label] = step
+            elapsed = time.monotonic() - started
+            self.stderr.write(f"  {label}: {done:,} ({elapsed:.0f}s)")
+
+        if options["output"]:
+            with open(options["output"], "w") as out:
+                rows = backup.export_board(options["board"], out, progress)
+        else:
+            rows = backup.export_board(options["board"], self.stdout, progress)
+        elapsed = time.monotonic() - started
+        # Keep stdout for the export itself when there is no file
+        report = self.stdout if options["output"] else self.stderr
+        report.write(self.style.SUCCESS(f"Exported {rows:,} rows in {elapsed:.0f}s"))
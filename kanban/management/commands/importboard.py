@@ -0,0 +1,64 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban import backup
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a new board from a JSON Lines export made by exportboard. "
+        "Rows are read as a stream and inserted in batches, with the ids in "
+        "the file mapped to new ones. Nothing is created if the file is "
+        "invalid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "file", nargs="?", help="Export to read, or stdin if not given"
+        )
+        parser.add_argument("--name", help="Name of the new board")
+        parser.add_argument(
+            "--create-users",
+            action="store_true",
+            help=(
+                "Create the users not found by username, without a usable "
+                "password. Otherwise they are left out."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        reported = {}
+
+        def progress(label, done):
+            # Report every 10,000 rows
+            step = done // (backup.BATCH_SIZE * 10)
+            if reported.get(label, 0) == step:
+                return
+            reported[label] = step
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  {label}: {done:,} ({elapsed:.0f}s)")
+
+        try:
+            if options["file"]:
+                with open(options["file"]) as lines:
+                    importer = backup.import_board(
+                        lines, options["name"], options["create_users"], progress
+                    )
+            else:
+                importer = backup.import_board(
+                    sys.stdin, options["name"], options["create_users"], progress
+                )
+        except ValueError as error:
+            raise CommandError(f"Not a valid board export. {error}")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported board {importer.board.pk}, {importer.board.name}, with "
+                f"{importer.ticket_count:,} tickets and {importer.comment_count:,} "
+                f"comments in {elapsed:.0f}s"
+            )
+        )
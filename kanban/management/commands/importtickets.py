@@ -0,0 +1,86 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kanban import csvimport
+from kanban.models import Board, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Create tickets on a board from a CSV file with a header row. Rows "
+        "are inserted in batches, and rows which cannot be imported are "
+        "listed without stopping the rest."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("board", type=int, help="Id of the board to import to")
+        parser.add_argument("file", help="CSV file to read, in UTF-8")
+        parser.add_argument(
+            "--author", help="Email of the user recorded as creating the tickets"
+        )
+        parser.add_argument(
+            "--column",
+            action="append",
+            default=[],
+            metavar="FIELD=HEADER",
+            help=(
+                "Read a field from a column with another header, for example "
+                "title=Summary. Fields are " + ", ".join(csvimport.FIELDS) + "."
+            ),
+        )
+
+    def parse_columns(self, values):
+        columns = {}
+        for value in values:
+            field, _, header = value.partition("=")
+            if field not in csvimport.FIELDS or not header:
+                raise CommandError(f"--column must be FIELD=HEADER, not {value}")
+            columns[field] = header
+        return columns
+
+    def handle(self, *args, **options):
+        columns = self.parse_columns(options["column"])
+        try:
+            board = Board.objects.get(pk=options["board"])
+        except Board.DoesNotExist:
+            raise CommandError(f"No board with id {options['board']}")
+        author = None
+        if options["author"]:
+            try:
+                author = User.objects.get(email=options["author"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['author']}")
+
+        started = time.monotonic()
+        reported = {}
+
+        def progress(label, done):
+            # Report every 10,000 rows
+            step = done // (csvimport.BATCH_SIZE * 10)
+            if reported.get(label, 0) == step:
+                return
+            reported[label] = step
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  {label}: {done:,} ({elapsed:.0f}s)")
+
+        try:
+            with open(options["file"], encoding="utf-8-sig", newline="") as file:
+                importer = csvimport.import_tickets(
+                    board, file, author, columns, progress
+                )
+        except (ValueError, UnicodeDecodeError) as error:
+            message = f"Could not read {options['file']}. {error}"
+            if isinstance(error, csvimport.ReadError) and error.created:
+                message += f" Imported {error.created:,} ticket(s) before it."
+            raise CommandError(message)
+
+        for error in importer.errors:
+            self.stderr.write(f"Line {error.line}: {error.message}")
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.created:,} ticket(s) to {board} in "
+                f"{elapsed:.0f}s, leaving out {len(importer.errors):,} row(s)"
+            )
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kanban.cache import bump_board_version
+from kanban.models import Board, Ticket, TicketStatus
+from kanban.ranking import needs_respacing, respace, save_ranks
+
+
+class Command(BaseCommand):
+    help = (
+        "Respace the ranks of board columns, sprints and statuses whose gaps "
+        "have been used up by drag and drop. Safe to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--board", type=int, help="Only rebalance the board with this id"
+        )
+
+    def rebalance(self, queryset):
+        objects = list(queryset.order_by("order", "pk"))
+        if not needs_respacing([obj.order for obj in objects]):
+            return 0
+        changed = respace(objects)
+        save_ranks(queryset.model, changed)
+        return len(changed)
+
+    def handle(self, *args, **options):
+        boards = Board.objects.all()
+        if options["board"]:
+            boards = boards.filter(pk=options["board"])
+
+        total = 0
+        for board in boards.iterator():
+            updated = 0
+            with transaction.atomic():
+                statuses = TicketStatus.objects.filter(board=board)
+                updated += self.rebalance(statuses)
+                for status_id in statuses.values_list("pk", flat=True):
+                    updated += self.rebalance(
+                        Ticket.objects.live().filter(board=board, status_id=status_id)
+                    )
+                sprint_ids = list(board.sprints.values_list("pk", flat=True))
+                for sprint_id in sprint_ids + [None]:
+                    updated += self.rebalance(
+                        Ticket.objects.filter(board=board, sprint_id=sprint_id)
+                    )
+            if updated:
+                bump_board_version(board.id)
+                self.stdout.write(f"Rebalanced {updated} rank(s) on board {board}")
+            total += updated
+
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {total} rank(s)"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from kanban import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-create the full-text search index from the tickets table, for "
+        "example after tickets were loaded without sending signals."
+    )
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write("The search index is only used on SQLite")
+            return
+        with transaction.atomic():
+            search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the search index"))
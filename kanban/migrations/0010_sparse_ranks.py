@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:12
+
+from django.db import migrations
+from django.db.models import F
+
+# Copied rather than imported so the migration does not change with the app
+RANK_STEP = 1024
+
+
+def spread_ranks(apps, schema_editor):
+    for model_name in ("Ticket", "TicketStatus"):
+        model = apps.get_model("kanban", model_name)
+        model.objects.update(order=(F("order") + 1) * RANK_STEP)
+
+
+def compact_ranks(apps, schema_editor):
+    for model_name in ("Ticket", "TicketStatus"):
+        model = apps.get_model("kanban", model_name)
+        model.objects.update(order=F("order") / RANK_STEP - 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0009_ticketstatus_colour'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ticket',
+            options={'ordering': ('order', 'id')},
+        ),
+        migrations.AlterModelOptions(
+            name='ticketstatus',
+            options={'ordering': ('order', 'id')},
+        ),
+        migrations.RunPython(spread_ranks, compact_ranks),
+    ]
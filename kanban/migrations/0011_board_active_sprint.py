@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_active_sprints(apps, schema_editor):
+    """
+    Point each board at its most recently started open sprint. Any other
+    open sprints are moved back to the backlog, as starting a sprint does.
+    """
+    Board = apps.get_model("kanban", "Board")
+    Sprint = apps.get_model("kanban", "Sprint")
+    for board in Board.objects.all():
+        started = Sprint.objects.filter(
+            board=board, start_date__isnull=False, completed_date__isnull=True
+        ).order_by("-start_date", "-pk")
+        active_sprint = started.first()
+        if active_sprint:
+            started.exclude(pk=active_sprint.pk).update(start_date=None)
+            board.active_sprint = active_sprint
+            board.save(update_fields=["active_sprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0010_sparse_ranks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='active_sprint',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kanban.sprint'),
+        ),
+        migrations.RunPython(set_active_sprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sprint',
+            constraint=models.UniqueConstraint(condition=models.Q(('completed_date__isnull', True), ('start_date__isnull', False)), fields=('board',), name='one_active_sprint_per_board'),
+        ),
+    ]
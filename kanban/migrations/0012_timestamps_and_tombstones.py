@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0011_board_active_sprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sprint',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='sprint',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='ticketstatus',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ticketstatus',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ticket', 'Ticket'), ('status', 'Status'), ('sprint', 'Sprint')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('board', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='kanban.board')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', 'deleted_at'], name='tombstone_board_deleted_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sprint',
+            index=models.Index(fields=['board', 'updated_at'], name='sprint_board_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['board', 'updated_at'], name='ticket_board_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketstatus',
+            index=models.Index(fields=['board', 'updated_at'], name='status_board_updated_idx'),
+        ),
+    ]
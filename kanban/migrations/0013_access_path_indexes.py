@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0012_timestamps_and_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['ticket', 'created_at'], name='comment_ticket_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sprint',
+            index=models.Index(fields=['board', 'completed_date'], name='sprint_board_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['board', 'sprint', 'order'], name='ticket_board_sprint_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['board', 'status', 'order'], name='ticket_board_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketstatus',
+            index=models.Index(fields=['board', 'order'], name='status_board_order_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:10
+
+import html
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+BATCH_SIZE = 500
+
+
+def html_to_text(value):
+    return html.unescape(strip_tags(value or ""))
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create the FTS5 table used by kanban.search and fill it from the
+    existing tickets. Only SQLite has FTS5; other databases search without
+    an index.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    Ticket = apps.get_model("kanban", "Ticket")
+    Comment = apps.get_model("kanban", "Comment")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE kanban_ticket_search USING fts5("
+        "board, title, description, comments, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    tickets = Ticket.objects.order_by("id").values_list(
+        "id", "board_id", "title", "description"
+    )
+    batch = []
+    for ticket in tickets.iterator(chunk_size=BATCH_SIZE):
+        batch.append(ticket)
+        if len(batch) == BATCH_SIZE:
+            index_tickets(schema_editor, Comment, batch)
+            batch = []
+    if batch:
+        index_tickets(schema_editor, Comment, batch)
+
+
+def index_tickets(schema_editor, Comment, tickets):
+    """Insert the search rows of a batch of tickets along with their comments."""
+    comments = {}
+    for ticket_id, text in (
+        Comment.objects.filter(ticket_id__in=[ticket[0] for ticket in tickets])
+        .order_by("created_at")
+        .values_list("ticket_id", "text")
+    ):
+        comments.setdefault(ticket_id, []).append(html_to_text(text))
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO kanban_ticket_search "
+            "(rowid, board, title, description, comments) VALUES (%s, %s, %s, %s, %s)",
+            [
+                (
+                    ticket_id,
+                    f"board{board_id}",
+                    title,
+                    html_to_text(description),
+                    "\n".join(comments.get(ticket_id, [])),
+                )
+                for ticket_id, board_id, title, description in tickets
+            ],
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE kanban_ticket_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0013_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,203 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:00
+
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+
+# The rich text processing of kanban.richtext at the time of this
+# migration, copied rather than imported so the migration does not change
+# with the app
+
+ALLOWED_TAGS = {
+    "a": {"href", "title"},
+    "b": set(),
+    "blockquote": set(),
+    "br": set(),
+    "em": set(),
+    "i": set(),
+    "li": set(),
+    "ol": set(),
+    "p": set(),
+    "s": set(),
+    "strike": set(),
+    "strong": set(),
+    "sub": set(),
+    "sup": set(),
+    "u": set(),
+    "ul": set(),
+}
+VOID_TAGS = {"br"}
+DROPPED_TAGS = {"script", "style", "iframe", "object", "embed", "template", "head"}
+BLOCK_TAGS = {
+    "blockquote", "br", "div", "h1", "h2", "h3", "h4", "h5", "h6",
+    "li", "ol", "p", "pre", "table", "tr", "ul",
+}
+ALLOWED_URL_SCHEMES = {"", "http", "https", "mailto"}
+EXCERPT_LENGTH = 200
+
+BATCH_SIZE = 500
+
+
+class RichTextParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag not in ALLOWED_TAGS:
+            return
+        kept = "".join(
+            f' {name}="{escape(value)}"'
+            for name, value in attrs
+            if name in ALLOWED_TAGS[tag] and value is not None and is_safe(name, value)
+        )
+        self.html.append(f"<{tag}{kept}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self.open_tags and tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f"</{self.open_tags.pop()}>")
+
+
+def is_safe(name, value):
+    if name != "href":
+        return True
+    return urlsplit(value.strip()).scheme.lower() in ALLOWED_URL_SCHEMES
+
+
+def process(value):
+    parser = RichTextParser()
+    parser.feed(value or "")
+    parser.close()
+    lines = (" ".join(line.split()) for line in "".join(parser.text).splitlines())
+    return "".join(parser.html).strip(), "\n".join(line for line in lines if line)
+
+
+def excerpt(text):
+    text = " ".join(text.split())
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[: EXCERPT_LENGTH - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def word_count(text):
+    return len(re.findall(r"\w+", text))
+
+
+def update_in_batches(queryset, update, fields):
+    """Apply ``update`` to each row, saving them BATCH_SIZE at a time."""
+    batch = []
+    for obj in queryset.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        update(obj)
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            queryset.model.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        queryset.model.objects.bulk_update(batch, fields)
+
+
+def process_ticket(ticket):
+    ticket.description, ticket.description_plain = process(ticket.description)
+    ticket.description_excerpt = excerpt(ticket.description_plain)
+    ticket.description_word_count = word_count(ticket.description_plain)
+
+
+def process_comment(comment):
+    comment.text, comment.text_plain = process(comment.text)
+
+
+def process_rich_text(apps, schema_editor):
+    """Sanitise existing rich text and fill in the fields derived from it."""
+    Ticket = apps.get_model("kanban", "Ticket")
+    Comment = apps.get_model("kanban", "Comment")
+    update_in_batches(
+        Ticket.objects.only("id", "description"),
+        process_ticket,
+        [
+            "description",
+            "description_plain",
+            "description_excerpt",
+            "description_word_count",
+        ],
+    )
+    update_in_batches(
+        Comment.objects.only("id", "text"), process_comment, ["text", "text_plain"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0014_ticket_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_plain',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='description_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='description_plain',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='description_word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(process_rich_text, migrations.RunPython.noop),
+    ]
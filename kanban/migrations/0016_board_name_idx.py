@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0015_rich_text_plain'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='board',
+            index=models.Index(fields=['name', 'id'], name='board_name_idx'),
+        ),
+    ]
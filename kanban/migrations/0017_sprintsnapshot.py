@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0016_board_name_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SprintSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('ticket_count', models.IntegerField(default=0)),
+                ('sprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='kanban.sprint')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='kanban.ticketstatus')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('sprint', 'date', 'status'), name='unique_sprint_snapshot')],
+            },
+        ),
+    ]
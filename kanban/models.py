@@ -1,9 +1,14 @@
+from collections import defaultdict
+
 from django.utils import timezone
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 from ckeditor.fields import RichTextField
 
+from kanban import richtext
 from kanban.constants import BasicStatuses, StatusColours
 
 User = get_user_model()
@@ -19,8 +24,67 @@ class TimestampedMixin(models.Model):
         abstract = True
 
 
+# Annotations added by BoardQuerySet.with_summaries
+SUMMARY_COUNTS = {
+    BasicStatuses.TODO: "todo_count",
+    BasicStatuses.IN_PROGRESS: "in_progress_count",
+    BasicStatuses.BLOCKED: "blocked_count",
+    BasicStatuses.DONE: "done_count",
+}
+
+
+class BoardQuerySet(models.QuerySet):
+    def with_summaries(self):
+        """
+        Annotate each board with its live ticket count for each basic
+        status, named as in ``SUMMARY_COUNTS``, and its ``member_count``,
+        and join in the active sprint.
+
+        The counts are correlated subqueries rather than joins with a GROUP
+        BY, so a page of boards costs one query whose counts each come from
+        the ticket (board, status) index.
+        """
+        counts = {
+            annotation: Coalesce(
+                Subquery(
+                    Ticket.objects.live()
+                    .filter(board=OuterRef("pk"), status__name=name)
+                    .order_by()
+                    .values("board")
+                    .annotate(count=Count("id"))
+                    .values("count")
+                ),
+                0,
+            )
+            for name, annotation in SUMMARY_COUNTS.items()
+        }
+        member_count = (
+            BoardMembership.objects.filter(board=OuterRef("pk"))
+            .order_by()
+            .values("board")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return self.select_related("active_sprint").annotate(
+            **counts, member_count=Coalesce(Subquery(member_count), 0)
+        )
+
+
 class Board(TimestampedMixin):
     name = models.CharField(max_length=200)
+    # Maintained by the sprint start and complete views
+    active_sprint = models.ForeignKey(
+        "Sprint",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    objects = BoardQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=("name", "id"), name="board_name_idx")]
 
     def __str__(self):
         return self.name
@@ -33,12 +97,42 @@ class Board(TimestampedMixin):
     def done_status(self):
         return TicketStatus.objects.get(board=self, name=BasicStatuses.DONE)
 
-    @property
-    def active_sprint(self):
-        today = timezone.now()
-        return Sprint.objects.filter(
-            start_date__lt=today, completed_date__isnull=True
-        ).first()
+    def get_column_querysets(self):
+        tickets = (
+            Ticket.objects.live()
+            .filter(board=self, status__isnull=False)
+            .select_related("assignee", "sprint")
+            .defer("description", "description_plain")
+            .order_by("status_id", "order", "id")
+        )
+        return self.statuses.all().order_by("order"), tickets
+
+    def get_columns(self):
+        """
+        Return the board's statuses, each paired with its live tickets.
+
+        Runs two queries regardless of board size: one for the statuses and
+        one for the tickets with their assignee and sprint joined in.
+        """
+        statuses, tickets = self.get_column_querysets()
+        return self.group_columns(list(statuses), tickets)
+
+    async def aget_columns(self):
+        statuses, tickets = self.get_column_querysets()
+        return self.group_columns(
+            [status async for status in statuses],
+            [ticket async for ticket in tickets],
+        )
+
+    @staticmethod
+    def group_columns(statuses, tickets):
+        tickets_by_status = defaultdict(list)
+        for ticket in tickets:
+            tickets_by_status[ticket.status_id].append(ticket)
+        return [
+            {"status": status, "tickets": tickets_by_status[status.id]}
+            for status in statuses
+        ]
 
 
 class BoardMembership(models.Model):
@@ -53,7 +147,7 @@ class BoardMembership(models.Model):
         unique_together = ("board", "user")
 
 
-class TicketStatus(models.Model):
+class TicketStatus(TimestampedMixin):
     name = models.CharField(max_length=100)
     board = models.ForeignKey(Board, related_name="statuses", on_delete=models.CASCADE)
     order = models.PositiveIntegerField(default=0)
@@ -65,11 +159,17 @@ class TicketStatus(models.Model):
         return self.name
 
     class Meta:
-        ordering = ("order",)
+        ordering = ("order", "id")
         unique_together = ("board", "name")
+        indexes = [
+            models.Index(
+                fields=("board", "updated_at"), name="status_board_updated_idx"
+            ),
+            models.Index(fields=("board", "order"), name="status_board_order_idx"),
+        ]
 
 
-class Sprint(models.Model):
+class Sprint(TimestampedMixin):
     name = models.CharField(max_length=200)
     start_date = models.DateTimeField(null=True, blank=True)
     completed_date = models.DateTimeField(null=True, blank=True)
@@ -90,6 +190,33 @@ class Sprint(models.Model):
     def is_completed(self):
         return self.start_date is not None and self.completed_date is not None
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("board",),
+                condition=models.Q(
+                    start_date__isnull=False, completed_date__isnull=True
+                ),
+                name="one_active_sprint_per_board",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=("board", "updated_at"), name="sprint_board_updated_idx"
+            ),
+            models.Index(
+                fields=("board", "completed_date"), name="sprint_board_completed_idx"
+            ),
+        ]
+
+
+class TicketQuerySet(models.QuerySet):
+    def live(self):
+        """Exclude tickets which belong to a completed sprint."""
+        return self.exclude(
+            sprint__start_date__isnull=False, sprint__completed_date__isnull=False
+        )
+
 
 class Ticket(TimestampedMixin):
     title = models.CharField(max_length=200)
@@ -120,6 +247,29 @@ class Ticket(TimestampedMixin):
     sprint = models.ForeignKey(
         Sprint, related_name="tickets", on_delete=models.SET_NULL, null=True, blank=True
     )
+    # Derived from the description whenever it is saved
+    description_plain = models.TextField(blank=True, editable=False)
+    description_excerpt = models.CharField(max_length=255, blank=True, editable=False)
+    description_word_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TicketQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "description" in update_fields:
+            self.description, self.description_plain = richtext.process(
+                self.description
+            )
+            self.description_excerpt = richtext.excerpt(self.description_plain)
+            self.description_word_count = richtext.word_count(self.description_plain)
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "description_plain",
+                    "description_excerpt",
+                    "description_word_count",
+                }
+        super().save(*args, **kwargs)
 
     @property
     def assignee_initials(self):
@@ -129,12 +279,52 @@ class Ticket(TimestampedMixin):
             return f"{self.assignee.username[0].upper()}"
 
     class Meta:
-        ordering = ("order",)
+        ordering = ("order", "id")
+        indexes = [
+            models.Index(
+                fields=("board", "updated_at"), name="ticket_board_updated_idx"
+            ),
+            models.Index(
+                fields=("board", "sprint", "order"), name="ticket_board_sprint_idx"
+            ),
+            models.Index(
+                fields=("board", "status", "order"), name="ticket_board_status_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Ticket {self.id}: {self.title}"
 
 
+class Tombstone(models.Model):
+    """
+    Record of a ticket, status or sprint deleted from a board, so that the
+    changes feed can tell clients to drop it.
+    """
+
+    class Kinds(models.TextChoices):
+        TICKET = "ticket"
+        STATUS = "status"
+        SPRINT = "sprint"
+
+    board = models.ForeignKey(
+        Board, related_name="tombstones", on_delete=models.CASCADE
+    )
+    kind = models.CharField(choices=Kinds.choices, max_length=10)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("board", "deleted_at"), name="tombstone_board_deleted_idx"
+            )
+        ]
+
+
 class Comment(TimestampedMixin):
     text = RichTextField()
     author = models.ForeignKey(
@@ -147,6 +337,94 @@ class Comment(TimestampedMixin):
     ticket = models.ForeignKey(
         Ticket, related_name="comments", on_delete=models.CASCADE
     )
+    # Derived from the text whenever it is saved
+    text_plain = models.TextField(blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "text" in update_fields:
+            self.text, self.text_plain = richtext.process(self.text)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "text_plain"}
+        super().save(*args, **kwargs)
 
     class Meta:
         ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=("ticket", "created_at"), name="comment_ticket_created_idx"
+            )
+        ]
+
+
+class SprintSnapshot(models.Model):
+    """
+    Number of a sprint's tickets in one status at the end of a day, kept up
+    to date by ``kanban.burndown`` for burndown charts.
+    """
+
+    sprint = models.ForeignKey(
+        Sprint, related_name="snapshots", on_delete=models.CASCADE
+    )
+    status = models.ForeignKey(TicketStatus, related_name="+", on_delete=models.CASCADE)
+    date = models.DateField()
+    ticket_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.sprint} on {self.date}: {self.ticket_count} {self.status}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("sprint", "date", "status"), name="unique_sprint_snapshot"
+            )
+        ]
+
+
+class StatusTransition(models.Model):
+    """
+    A ticket's move from one status to another, appended by
+    ``kanban.history.record_moves`` and never changed afterwards.
+
+    Only the ticket and the (board, created_at) pair are indexed, which is
+    all that time-in-status and throughput queries filter on.
+    """
+
+    board = models.ForeignKey(
+        Board, related_name="+", on_delete=models.CASCADE, db_index=False
+    )
+    ticket = models.ForeignKey(
+        Ticket, related_name="transitions", on_delete=models.CASCADE
+    )
+    # None when the ticket was created, or left the board's columns
+    from_status = models.ForeignKey(
+        TicketStatus,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        db_index=False,
+    )
+    to_status = models.ForeignKey(
+        TicketStatus,
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        db_index=False,
+    )
+    sprint = models.ForeignKey(
+        Sprint, related_name="+", on_delete=models.SET_NULL, null=True, db_index=False
+    )
+    actor = models.ForeignKey(
+        User, related_name="+", on_delete=models.SET_NULL, null=True, db_index=False
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Ticket {self.ticket_id}: {self.from_status_id} to {self.to_status_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("board", "created_at"), name="transition_board_created_idx"
+            )
+        ]
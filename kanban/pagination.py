@@ -0,0 +1,34 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor holds the sort key of the row at the edge of a page, so the next
+page can be fetched with a range condition on an index instead of an
+OFFSET which scans every row before it.
+"""
+
+import base64
+import json
+
+
+def encode_value(value):
+    # Dates keep their full precision, which DjangoJSONEncoder would not
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(*values):
+    data = json.dumps(values, default=encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the values encoded in a cursor, or None if it is missing or invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        return None
+    return values if isinstance(values, list) else None
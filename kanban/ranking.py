@@ -0,0 +1,89 @@
+"""
+Sparse ranks used for the ``order`` of tickets and statuses.
+
+Ranks are spaced ``RANK_STEP`` apart so that an item dropped between two
+neighbours can take the midpoint of their ranks and be saved on its own.
+When two neighbours have no gap left the group is respaced, which is also
+what the ``rebalanceranks`` management command does ahead of time.
+"""
+
+from django.utils import timezone
+
+RANK_STEP = 1024
+
+# Groups whose tightest gap falls below this are respaced by rebalanceranks
+MIN_GAP = RANK_STEP // 64
+
+
+def rank_between(previous_rank, next_rank):
+    """
+    Return a rank strictly between two neighbouring ranks, either of which
+    may be None at the ends of a group. Returns None if there is no room.
+    """
+    if previous_rank is None and next_rank is None:
+        return RANK_STEP
+    if previous_rank is None:
+        rank = next_rank // 2
+        return rank if rank < next_rank else None
+    if next_rank is None:
+        return previous_rank + RANK_STEP
+    if next_rank - previous_rank > 1:
+        return previous_rank + (next_rank - previous_rank) // 2
+    return None
+
+
+def respace(objects):
+    """
+    Give an ordered sequence of objects evenly spaced ranks and return the
+    ones whose rank changed. Nothing is saved.
+    """
+    changed = []
+    for i, obj in enumerate(objects, start=1):
+        rank = i * RANK_STEP
+        if obj.order != rank:
+            obj.order = rank
+            changed.append(obj)
+    return changed
+
+
+def save_ranks(model, objects):
+    """
+    Save the ranks of objects changed by respace, marking them as updated so
+    that they are picked up by the changes feed.
+    """
+    now = timezone.now()
+    for obj in objects:
+        obj.updated_at = now
+    model.objects.bulk_update(objects, ["order", "updated_at"])
+
+
+def needs_respacing(ranks):
+    """Return True if any two consecutive ranks are closer than MIN_GAP."""
+    return any(b - a < MIN_GAP for a, b in zip(ranks, ranks[1:])) or (
+        bool(ranks) and ranks[0] < MIN_GAP
+    )
+
+
+def place(obj, siblings, previous_id=None, next_id=None):
+    """
+    Set ``obj.order`` so that it sits between two of its siblings.
+
+    ``siblings`` is a queryset of the group ``obj`` is being moved into.
+    Only ``obj`` needs saving afterwards unless its neighbours have no gap
+    left, in which case the rest of the group is respaced and saved here.
+    Returns the siblings whose rank changed. Call this inside a transaction.
+    """
+    siblings = siblings.exclude(pk=obj.pk)
+    neighbour_ids = [pk for pk in (previous_id, next_id) if pk is not None]
+    ranks = dict(siblings.filter(pk__in=neighbour_ids).values_list("pk", "order"))
+    rank = rank_between(ranks.get(previous_id), ranks.get(next_id))
+    if rank is not None:
+        obj.order = rank
+        return []
+
+    ordered = list(siblings.order_by("order", "pk"))
+    index = next((i + 1 for i, s in enumerate(ordered) if s.pk == previous_id), 0)
+    ordered.insert(index, obj)
+    changed = [o for o in respace(ordered) if o is not obj]
+    save_ranks(type(obj), changed)
+    return changed
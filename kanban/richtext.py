@@ -0,0 +1,199 @@
+"""
+Cleaning and summarising the HTML produced by the CKEditor fields.
+
+Rich text is processed once, when it is saved: the HTML is reduced to the
+tags the editor toolbar can produce, so it can be rendered as is, and a
+plain-text copy is stored alongside it for excerpts, word counts and the
+search index.
+"""
+
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+# Tags the editor toolbar can produce, with the attributes kept on each
+ALLOWED_TAGS = {
+    "a": {"href", "title"},
+    "b": set(),
+    "blockquote": set(),
+    "br": set(),
+    "em": set(),
+    "i": set(),
+    "li": set(),
+    "ol": set(),
+    "p": set(),
+    "s": set(),
+    "strike": set(),
+    "strong": set(),
+    "sub": set(),
+    "sup": set(),
+    "u": set(),
+    "ul": set(),
+}
+
+VOID_TAGS = {"br"}
+
+# Tags dropped together with everything inside them
+DROPPED_TAGS = {"script", "style", "iframe", "object", "embed", "template", "head"}
+
+# Tags after which plain text starts a new line
+BLOCK_TAGS = {
+    "blockquote",
+    "br",
+    "div",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "li",
+    "ol",
+    "p",
+    "pre",
+    "table",
+    "tr",
+    "ul",
+}
+
+# Block tags which end an open paragraph, as a browser would
+PARAGRAPH_CLOSING_TAGS = BLOCK_TAGS - {"br"}
+
+LIST_TAGS = {"ol", "ul"}
+
+ALLOWED_URL_SCHEMES = {"", "http", "https", "mailto"}
+
+EXCERPT_LENGTH = 200
+
+
+class RichTextParser(HTMLParser):
+    """Build the cleaned HTML and the plain text of a fragment in one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.open_tags = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        self.close_implied(tag)
+        if tag not in ALLOWED_TAGS:
+            return
+        kept = "".join(
+            f' {name}="{escape(value)}"'
+            for name, value in attrs
+            if name in ALLOWED_TAGS[tag] and value is not None and is_safe(name, value)
+        )
+        self.html.append(f"<{tag}{kept}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self.open_tags and tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag in self.open_tags:
+            self.close_tag(tag)
+
+    def close_implied(self, tag):
+        """
+        Close the paragraph or list item which a starting ``tag`` ends
+        without a closing tag, such as the first item of ``<li>a<li>b``.
+        """
+        if tag == "li":
+            # Only an item of the innermost list, not one it is nested in
+            innermost = max(
+                (
+                    i
+                    for i, open_tag in enumerate(self.open_tags)
+                    if open_tag in LIST_TAGS
+                ),
+                default=0,
+            )
+            if "li" in self.open_tags[innermost:]:
+                self.close_tag("li")
+        if tag in PARAGRAPH_CLOSING_TAGS and "p" in self.open_tags:
+            self.close_tag("p")
+
+    def close_tag(self, tag):
+        """Close ``tag`` and anything still open inside it, keeping the nesting."""
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.html.append(f"</{self.open_tags.pop()}>")
+
+
+def is_safe(name, value):
+    if name != "href":
+        return True
+    scheme = urlsplit(value.strip()).scheme.lower()
+    return scheme in ALLOWED_URL_SCHEMES
+
+
+def normalise_whitespace(text):
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def process(value):
+    """
+    Return the cleaned HTML and the plain text of a rich text value. The
+    plain text keeps one line per paragraph or list item.
+    """
+    parser = RichTextParser()
+    parser.feed(value or "")
+    parser.close()
+    return "".join(parser.html).strip(), normalise_whitespace("".join(parser.text))
+
+
+def sanitise(value):
+    return process(value)[0]
+
+
+def html_to_text(value):
+    return process(value)[1]
+
+
+def excerpt(text, length=EXCERPT_LENGTH):
+    """Shorten plain text to at most ``length`` characters on a word break."""
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    cut = text[: length - 1]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def word_count(text):
+    return len(re.findall(r"\w+", text))
@@ -0,0 +1,166 @@
+"""
+Full-text search over ticket titles, descriptions and comments.
+
+On SQLite tickets are indexed in an FTS5 table, ``kanban_ticket_search``,
+whose rowid is the ticket id. Descriptions and comments are indexed from
+the plain text stored with them when they are saved. The board is
+indexed as a token of its own so that a board-scoped search intersects
+posting lists rather than filtering every match afterwards. Other
+databases fall back to a case-insensitive substring search.
+
+The index is kept up to date by the signal receivers in
+``kanban.signals``. Code that creates tickets or comments with
+``bulk_create``, which sends no signals, must call ``index_tickets``
+itself.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from kanban.models import Comment, Ticket
+
+TABLE = "kanban_ticket_search"
+
+# Relative weight of each column in the bm25 ranking
+WEIGHTS = {"board": 0.0, "title": 10.0, "description": 4.0, "comments": 1.0}
+
+# Columns snippets are taken from, by position, in order of preference
+SNIPPET_COLUMNS = (2, 3)
+
+# Stand-ins for <mark> in snippets, which are escaped before being marked up
+MATCH_START, MATCH_END = "\x02", "\x03"
+
+BATCH_SIZE = 500
+
+
+def is_enabled():
+    return connection.vendor == "sqlite"
+
+
+def board_token(board_id):
+    return f"board{board_id}"
+
+
+def index_tickets(ticket_ids):
+    """Add tickets to the index, or refresh them if already there."""
+    if not is_enabled():
+        return
+    ticket_ids = list(ticket_ids)
+    for start in range(0, len(ticket_ids), BATCH_SIZE):
+        batch = ticket_ids[start : start + BATCH_SIZE]
+        comments = {}
+        for ticket_id, text in (
+            Comment.objects.filter(ticket_id__in=batch)
+            .order_by("created_at")
+            .values_list("ticket_id", "text_plain")
+        ):
+            comments.setdefault(ticket_id, []).append(text)
+        rows = [
+            (
+                ticket_id,
+                board_token(board_id),
+                title,
+                description,
+                "\n".join(comments.get(ticket_id, [])),
+            )
+            for ticket_id, board_id, title, description in Ticket.objects.filter(
+                id__in=batch
+            ).values_list("id", "board_id", "title", "description_plain")
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {TABLE} WHERE rowid = %s", [[pk] for pk in batch]
+            )
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, board, title, description, comments) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+
+
+def unindex_tickets(ticket_ids):
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s", [[pk] for pk in ticket_ids]
+        )
+
+
+def rebuild_index():
+    """Re-create the whole index from the tickets table."""
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    index_tickets(Ticket.objects.values_list("id", flat=True).iterator())
+
+
+def build_match(board_id, query):
+    """
+    Turn what the user typed into an FTS5 query scoped to a board. Every
+    word must match and the last one may be a prefix, so results appear
+    while a word is still being typed. Returns None if there are no words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return (
+        f'board : "{board_token(board_id)}" '
+        f'AND {{title description comments}} : ({" ".join(terms)})'
+    )
+
+
+def format_snippet(snippet):
+    return mark_safe(
+        escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+    )
+
+
+def search(board_id, query, limit=50):
+    """
+    Return up to ``limit`` tickets of a board matching the query, best
+    first. Each ticket has a ``snippet`` of matching text when available.
+    """
+    if not is_enabled():
+        tickets = Ticket.objects.filter(board_id=board_id).filter(
+            Q(title__icontains=query) | Q(description_plain__icontains=query)
+        )
+        return list(tickets.select_related("status")[:limit])
+
+    match = build_match(board_id, query)
+    if match is None:
+        return []
+    weights = ", ".join(str(weight) for weight in WEIGHTS.values())
+    snippet = f"snippet({TABLE}, %s, %s, %s, '…', 16)"
+    params = []
+    for column in SNIPPET_COLUMNS:
+        params += [column, MATCH_START, MATCH_END]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, {snippet}, {snippet} FROM {TABLE} "
+            f"WHERE {TABLE} MATCH %s ORDER BY bm25({TABLE}, {weights}) LIMIT %s",
+            [*params, match, limit],
+        )
+        rows = cursor.fetchall()
+    tickets = (
+        Ticket.objects.select_related("status")
+        .defer("description", "description_plain")
+        .in_bulk([row[0] for row in rows])
+    )
+    results = []
+    for ticket_id, *snippets in rows:
+        if ticket_id not in tickets:
+            continue
+        ticket = tickets[ticket_id]
+        ticket.snippet = next(
+            (format_snippet(s) for s in snippets if MATCH_START in s), ""
+        )
+        results.append(ticket)
+    return results
@@ -0,0 +1,295 @@
+"""
+Bulk generation of large boards, for benchmarks and load testing.
+
+Rows are built in memory and inserted with ``bulk_create`` in batches, so
+millions of tickets take minutes rather than the hours the factories would
+need. ``bulk_create`` calls neither ``save`` nor the signal receivers, so
+the derived rich text fields are filled in here and new tickets are added
+to the search index explicitly.
+
+All randomness comes from the ``random.Random`` passed in, so the same
+seed against the same database produces the same data.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from kanban import richtext, search
+from kanban.constants import DEFAULT_COLOUR_MAPPING, BasicStatuses
+from kanban.models import Board, BoardMembership, Comment, Sprint, Ticket, TicketStatus
+from kanban.ranking import RANK_STEP
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+WORDS = (
+    "account admin alert api archive audit backlog banner billing build cache "
+    "calendar checkout config cookie dashboard data deploy docs email error "
+    "export feature feed filter form header import index invoice label layout "
+    "login logout menu metrics migration mobile notification onboarding order "
+    "page password payment permission profile query queue release report "
+    "search session settings signup sprint status styles table template test "
+    "ticket timeout upload user validation view webhook widget"
+).split()
+VERBS = "add fix update remove refactor investigate document migrate test".split()
+
+# Share of tickets in the backlog rather than a sprint
+BACKLOG_SHARE = 0.15
+# Tickets per sprint when the number of sprints is not given
+SPRINT_SIZE = 50
+# Comments per ticket when the number of comments is not given
+COMMENTS_PER_TICKET = 1.5
+# Board members when the users are not given
+TEAM_SIZE = 10
+SPRINT_LENGTH = timedelta(weeks=2)
+
+
+def no_progress(label, done, total):
+    pass
+
+
+def words(rng, count):
+    return " ".join(rng.choices(WORDS, k=count))
+
+
+def title(rng):
+    return f"{rng.choice(VERBS).capitalize()} {words(rng, rng.randint(1, 4))}"
+
+
+def rich_text(rng, max_paragraphs=3, max_words=40):
+    """
+    Return generated rich text and its plain text. Both are built directly,
+    which is what ``richtext.process`` would produce from the HTML, as
+    parsing it back would dominate the time taken by large runs.
+    """
+    paragraphs = [
+        f"{words(rng, rng.randint(3, max_words)).capitalize()}."
+        for _ in range(rng.randint(1, max_paragraphs))
+    ]
+    html = "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+    return html, "\n".join(paragraphs)
+
+
+def allocate(total, weights):
+    """Split ``total`` into whole numbers in proportion to ``weights``."""
+    weight_sum = sum(weights) or 1
+    counts = [int(total * weight / weight_sum) for weight in weights]
+    for i in range(total - sum(counts)):
+        counts[i % len(counts)] += 1
+    return counts
+
+
+def batched(objects, size=BATCH_SIZE):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def create_users(rng, count, progress=no_progress):
+    start = (User.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+
+    def build():
+        for number in range(start, start + count):
+            first_name, last_name = rng.choice(WORDS), rng.choice(WORDS)
+            yield User(
+                username=f"{first_name}.{last_name}.{number}",
+                email=f"{first_name}.{last_name}.{number}@example.com",
+                first_name=first_name.capitalize(),
+                last_name=last_name.capitalize(),
+                password="!",
+            )
+
+    users = []
+    for batch in batched(build()):
+        users += User.objects.bulk_create(batch)
+        progress("users", len(users), count)
+    return users
+
+
+def create_sprints(board, count, now):
+    """
+    Create a run of consecutive sprints ending in an active sprint and one
+    still to be planned. Every earlier sprint is completed.
+    """
+    sprints = []
+    for i in range(count):
+        end = now - SPRINT_LENGTH * (count - i - 2)
+        sprints.append(
+            Sprint(
+                name=f"Sprint {i + 1}",
+                board=board,
+                start_date=end - SPRINT_LENGTH,
+                completed_date=end,
+            )
+        )
+    active = None
+    if count >= 2:
+        planned = sprints[-1]
+        planned.start_date = planned.completed_date = None
+    if count >= 1:
+        active = sprints[-min(count, 2)]
+        active.completed_date = None
+    Sprint.objects.bulk_create(sprints)
+    if active:
+        Board.objects.filter(pk=board.pk).update(active_sprint=active)
+        board.active_sprint = active
+    return sprints
+
+
+def seed_board(
+    ticket_count,
+    rng,
+    users=None,
+    user_count=TEAM_SIZE,
+    sprint_count=None,
+    comment_count=None,
+    progress=no_progress,
+):
+    """
+    Create a board with ``ticket_count`` tickets and return it.
+
+    Tickets are spread over a run of completed sprints, an active sprint,
+    a planned sprint and the backlog. ``users`` become the members if
+    given, otherwise ``user_count`` new users are created; the first
+    member owns the board. Sprints default to one per ``SPRINT_SIZE``
+    tickets and comments to ``COMMENTS_PER_TICKET``, with older tickets
+    more likely to have been commented on.
+
+    ``progress`` is called with a label and the rows done and due after
+    each batch.
+    """
+    if sprint_count is None:
+        sprint_count = max(ticket_count // SPRINT_SIZE, 3)
+    if comment_count is None:
+        comment_count = int(ticket_count * COMMENTS_PER_TICKET)
+    now = timezone.now()
+
+    with transaction.atomic():
+        if users is None:
+            users = create_users(rng, user_count)
+        board = Board.objects.create(name=words(rng, 2).capitalize())
+        BoardMembership.objects.bulk_create(
+            BoardMembership(board=board, user=user, is_owner=i == 0)
+            for i, user in enumerate(users)
+        )
+        statuses = TicketStatus.objects.bulk_create(
+            TicketStatus(
+                name=name,
+                board=board,
+                order=i * RANK_STEP,
+                colour=DEFAULT_COLOUR_MAPPING[name],
+            )
+            for i, name in enumerate(BasicStatuses.values, start=1)
+        )
+        todo, done = statuses[0], statuses[-1]
+        sprints = create_sprints(board, sprint_count, now)
+
+        def build_tickets():
+            ranks = {}
+            for _ in range(ticket_count):
+                sprint = None
+                if sprints and rng.random() >= BACKLOG_SHARE:
+                    sprint = rng.choice(sprints)
+                if sprint is None or sprint.start_date is None:
+                    status = todo
+                elif sprint is board.active_sprint:
+                    status = rng.choice(statuses)
+                else:
+                    status = done
+                key = (sprint and sprint.id, status.id)
+                ranks[key] = ranks.get(key, 0) + RANK_STEP
+                description, plain = rich_text(rng)
+                yield Ticket(
+                    title=title(rng),
+                    description=description,
+                    description_plain=plain,
+                    description_excerpt=richtext.excerpt(plain),
+                    description_word_count=richtext.word_count(plain),
+                    board=board,
+                    status=status,
+                    sprint=sprint,
+                    order=ranks[key],
+                    author=rng.choice(users),
+                    assignee=rng.choice(users),
+                )
+
+        ticket_ids = []
+        for batch in batched(build_tickets()):
+            ticket_ids += [ticket.id for ticket in Ticket.objects.bulk_create(batch)]
+            progress("tickets", len(ticket_ids), ticket_count)
+
+        def build_comments():
+            for _ in range(comment_count):
+                # Squaring skews comments towards the oldest tickets
+                ticket_id = ticket_ids[int(len(ticket_ids) * rng.random() ** 2)]
+                text, text_plain = rich_text(rng, max_paragraphs=1, max_words=25)
+                yield Comment(
+                    ticket_id=ticket_id,
+                    author=rng.choice(users),
+                    text=text,
+                    text_plain=text_plain,
+                )
+
+        created = 0
+        if ticket_ids:
+            for batch in batched(build_comments()):
+                Comment.objects.bulk_create(batch)
+                created += len(batch)
+                progress("comments", created, comment_count)
+
+        for start in range(0, len(ticket_ids), search.BATCH_SIZE * 10):
+            batch = ticket_ids[start : start + search.BATCH_SIZE * 10]
+            search.index_tickets(batch)
+            progress("search index", start + len(batch), len(ticket_ids))
+    return board
+
+
+def seed(
+    board_count,
+    user_count,
+    ticket_count,
+    sprint_count,
+    comment_count,
+    rng,
+    owner=None,
+    progress=no_progress,
+):
+    """
+    Create ``board_count`` boards sharing the given totals of users,
+    tickets, sprints and comments, and return the boards.
+
+    Board sizes are uneven, as in a real install where a few busy boards
+    hold most of the tickets. Each board's team is drawn from the users,
+    with ``owner`` owning every board if given.
+    """
+    users = create_users(rng, user_count, progress)
+    sizes = allocate(ticket_count, [rng.expovariate(1) for _ in range(board_count)])
+    sprint_counts = allocate(sprint_count, sizes)
+    comment_counts = allocate(comment_count, sizes)
+    boards = []
+    for i, size in enumerate(sizes):
+        team = rng.sample(users, min(len(users), rng.randint(3, 2 * TEAM_SIZE)))
+        if owner:
+            team.insert(0, owner)
+        boards.append(
+            seed_board(
+                size,
+                rng,
+                users=team,
+                sprint_count=sprint_counts[i],
+                comment_count=comment_counts[i],
+                progress=progress,
+            )
+        )
+        progress("boards", i + 1, board_count)
+    return boards
@@ -0,0 +1,125 @@
+"""
+Compact JSON for the AJAX endpoints.
+
+Each serializer declares the fields it can output and the attribute each
+one is read from, so responses carry ids rather than related objects and
+never include heavy columns such as the ticket description by accident.
+Clients can ask for a subset or a different selection of fields with a
+comma-separated ``fields`` query parameter.
+
+Responses are encoded with orjson when it is installed, falling back to
+the standard library encoder with compact separators. GET responses carry
+an ETag so that unchanged data is answered with a 304.
+"""
+
+import hashlib
+import json
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Serializer:
+    # Output name mapped to the attribute it is read from
+    fields = {}
+    default_fields = ()
+
+    def __init__(self, fields=None):
+        fields = list(fields or self.default_fields)
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown:
+            raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+        self.getters = [(name, attrgetter(self.fields[name])) for name in fields]
+
+    def for_request(self, request):
+        """
+        Return a serializer for the fields named in the request's ``fields``
+        parameter, or this one if it names none.
+        """
+        fields = [
+            name.strip()
+            for name in request.GET.get("fields", "").split(",")
+            if name.strip()
+        ]
+        return type(self)(fields) if fields else self
+
+    def serialize(self, obj):
+        return {name: getter(obj) for name, getter in self.getters}
+
+    def serialize_many(self, objects):
+        return [self.serialize(obj) for obj in objects]
+
+
+class TicketSerializer(Serializer):
+    fields = {
+        "id": "id",
+        "title": "title",
+        "board": "board_id",
+        "status": "status_id",
+        "sprint": "sprint_id",
+        "assignee": "assignee_id",
+        "author": "author_id",
+        "order": "order",
+        "excerpt": "description_excerpt",
+        "word_count": "description_word_count",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
+    default_fields = ("id", "status", "sprint", "order")
+
+
+class TicketStatusSerializer(Serializer):
+    fields = {
+        "id": "id",
+        "name": "name",
+        "board": "board_id",
+        "order": "order",
+        "colour": "colour",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
+    default_fields = ("id", "order")
+
+
+class SprintSerializer(Serializer):
+    fields = {
+        "id": "id",
+        "name": "name",
+        "board": "board_id",
+        "start_date": "start_date",
+        "completed_date": "completed_date",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
+    default_fields = ("id", "name", "start_date", "completed_date")
+
+
+def dumps(data):
+    """Encode data as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def json_response(request, data, status=200):
+    """
+    Return data as a JSON response. Successful GET responses get an ETag
+    and are replaced by a 304 when it matches the request's If-None-Match.
+    """
+    response = HttpResponse(dumps(data), content_type="application/json", status=status)
+    if request.method not in ("GET", "HEAD") or status != 200:
+        return response
+    etag = quote_etag(hashlib.md5(response.content, usedforsecurity=False).hexdigest())
+    response["ETag"] = etag
+    # Let browsers keep the response but check it is current before use
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
@@ -0,0 +1,102 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from kanban import search
+from kanban.cache import MEMBERS, bump_board_list_version, bump_board_version
+from kanban.models import (
+    Board,
+    BoardMembership,
+    Comment,
+    Sprint,
+    Ticket,
+    TicketStatus,
+    Tombstone,
+)
+
+# Ticket fields copied into the search index
+SEARCHED_FIELDS = {"title", "description"}
+
+TOMBSTONE_KINDS = {
+    Ticket: Tombstone.Kinds.TICKET,
+    TicketStatus: Tombstone.Kinds.STATUS,
+    Sprint: Tombstone.Kinds.SPRINT,
+}
+
+
+def deleted_with(origin, *models):
+    """Return True if a delete was started from an instance of ``models``."""
+    if isinstance(origin, QuerySet):
+        return origin.model in models
+    return isinstance(origin, models)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=TicketStatus)
+@receiver(post_save, sender=Sprint)
+@receiver(post_save, sender=BoardMembership)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=TicketStatus)
+@receiver(post_delete, sender=Sprint)
+@receiver(post_delete, sender=BoardMembership)
+def board_changed(sender, instance, **kwargs):
+    """Invalidate cached fragments of the board the instance belongs to."""
+    bump_board_version(instance.board_id)
+
+
+@receiver(post_save, sender=BoardMembership)
+@receiver(post_delete, sender=BoardMembership)
+def membership_changed(sender, instance, **kwargs):
+    """Invalidate the cached member list of the membership's board."""
+    bump_board_version(instance.board_id, MEMBERS)
+
+
+@receiver(post_save, sender=Board)
+@receiver(post_save, sender=BoardMembership)
+@receiver(post_save, sender=Sprint)
+@receiver(post_delete, sender=Board)
+@receiver(post_delete, sender=BoardMembership)
+@receiver(post_delete, sender=Sprint)
+def board_list_changed(sender, instance, **kwargs):
+    """
+    Invalidate the cached board lists of the home page, which show each
+    board's name, members and active sprint.
+    """
+    bump_board_list_version()
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=TicketStatus)
+@receiver(post_delete, sender=Sprint)
+def record_deletion(sender, instance, origin=None, **kwargs):
+    """
+    Leave a tombstone for the changes feed, unless the whole board is being
+    deleted along with it.
+    """
+    if deleted_with(origin, Board):
+        return
+    Tombstone.objects.create(
+        board_id=instance.board_id,
+        kind=TOMBSTONE_KINDS[sender],
+        object_id=instance.pk,
+    )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search index unless only unsearched fields were saved."""
+    if update_fields is None or SEARCHED_FIELDS & set(update_fields):
+        search.index_tickets([instance.pk])
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    search.unindex_tickets([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, origin=None, **kwargs):
+    """Refresh the comments indexed with a ticket."""
+    if not deleted_with(origin, Ticket, Board):
+        search.index_tickets([instance.ticket_id])
@@ -1,3 +1,1803 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import re
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.core import checks
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import F
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.metrics import registry
+from kanban import (
+    analytics,
+    backup,
+    csvimport,
+    factories,
+    richtext,
+    search,
+    seeding,
+)
+from kanban.constants import BasicStatuses, StatusColours
+from kanban.events import InProcessBroker
+from kanban.management.commands.benchmark import Command as BenchmarkCommand
+from kanban.models import (
+    Board,
+    Comment,
+    Sprint,
+    SprintSnapshot,
+    StatusTransition,
+    Ticket,
+    TicketStatus,
+    Tombstone,
+)
+from kanban.pagination import encode_cursor
+from kanban.ranking import RANK_STEP, place
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class BoardViewQueryTests(TestCase):
+    # Session, user, board with its active sprint, statuses, tickets, has
+    # tickets and board members. Must not grow with the number of tickets.
+    QUERY_BUDGET = 7
+
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        factories.BoardMembershipFactory(
+            board=self.board, user=self.user, is_owner=True
+        )
+        self.statuses = [
+            factories.TicketStatusFactory(board=self.board, name=name, order=i)
+            for i, name in enumerate(BasicStatuses.values)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse("board-detail", kwargs={"pk": self.board.pk})
+
+    def create_tickets(self, count):
+        for i in range(count):
+            factories.TicketFactory(
+                board=self.board, status=self.statuses[i % len(self.statuses)]
+            )
+
+    def test_query_count_is_constant(self):
+        for count in (1, 25):
+            self.create_tickets(count)
+            with self.assertNumQueries(self.QUERY_BUDGET):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_tickets_in_completed_sprints_are_hidden(self):
+        sprint = factories.SprintFactory(
+            board=self.board,
+            start_date=timezone.now(),
+            completed_date=timezone.now(),
+        )
+        hidden = factories.TicketFactory(
+            board=self.board, status=self.statuses[0], sprint=sprint
+        )
+        shown = factories.TicketFactory(board=self.board, status=self.statuses[0])
+        response = self.client.get(self.url)
+        self.assertContains(response, f'data-id="{shown.id}"')
+        self.assertNotContains(response, f'data-id="{hidden.id}"')
+
+
+class BoardFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.status = factories.TicketStatusFactory(board=self.board)
+        self.client.force_login(self.user)
+        self.url = reverse("board-detail", kwargs={"pk": self.board.pk})
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_unchanged_board_is_rendered_from_cache(self):
+        uncached = self.count_queries()
+        self.assertLess(self.count_queries(), uncached)
+
+    def test_ticket_changes_invalidate_the_cache(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = factories.TicketFactory(board=self.board, status=self.status)
+        self.assertContains(self.client.get(self.url), ticket.title)
+
+    def test_bulk_updates_invalidate_the_cache(self):
+        ticket = factories.TicketFactory(board=self.board, status=self.status)
+        other = factories.TicketStatusFactory(board=self.board, name="Other")
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("ajax-ticket-bulk-update-status"),
+                {"tickets": [{"id": ticket.id, "status": other.id, "order": 0}]},
+                content_type="application/json",
+            )
+        html = self.client.get(self.url).content.decode()
+        self.assertGreater(
+            html.index(f'data-id="{ticket.id}"'),
+            html.index(f'data-status="{other.id}"'),
+        )
+
+    def test_deploy_check_requires_a_shared_cache(self):
+        def errors():
+            return [
+                error.id
+                for error in checks.run_checks(
+                    tags=[checks.Tags.caches], include_deployment_checks=True
+                )
+            ]
+
+        self.assertIn("kanban.E001", errors())
+        dummy = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(CACHES=dummy):
+            self.assertNotIn("kanban.E001", errors())
+
+
+class UpdateTicketStatusAJAXViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.status = factories.TicketStatusFactory(board=self.board)
+        self.tickets = [
+            factories.TicketFactory(
+                board=self.board, status=self.status, order=(i + 1) * RANK_STEP
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse("ajax-ticket-update-status")
+
+    def move(self, ticket, previous, next):
+        return self.client.post(
+            self.url,
+            {
+                "id": ticket.id,
+                "status": self.status.id,
+                "previous": previous and previous.id,
+                "next": next and next.id,
+            },
+            content_type="application/json",
+        )
+
+    def column(self):
+        return list(Ticket.objects.filter(status=self.status))
+
+    def test_move_writes_a_single_row(self):
+        first, second, third = self.tickets
+        with CaptureQueriesContext(connection) as queries:
+            self.move(third, first, second)
+        writes = [q for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.column(), [first, third, second])
+
+    def test_column_is_respaced_when_gap_is_used_up(self):
+        first, second, third = self.tickets
+        Ticket.objects.filter(pk=second.pk).update(order=first.order + 1)
+        self.move(third, first, second)
+        self.assertEqual(self.column(), [first, third, second])
+        orders = [ticket.order for ticket in self.column()]
+        self.assertEqual(orders, [RANK_STEP, 2 * RANK_STEP, 3 * RANK_STEP])
+
+    def test_response_only_has_the_moved_fields(self):
+        first, second, third = self.tickets
+        response = self.move(third, first, second)
+        third.refresh_from_db()
+        self.assertEqual(
+            response.json(),
+            {"id": third.id, "status": self.status.id, "order": third.order},
+        )
+
+    def test_fields_can_be_selected(self):
+        first, second, third = self.tickets
+        self.url += "?fields=id,title"
+        response = self.move(third, first, second)
+        self.assertEqual(response.json(), {"id": third.id, "title": third.title})
+
+        self.url += ",description"
+        response = self.move(third, first, second)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"errors": ["Unknown fields: description"]})
+
+    def test_missing_ticket_or_status_is_rejected(self):
+        ticket = self.tickets[0]
+        other_board_status = factories.TicketStatusFactory()
+        for payload, status_code in (
+            ({"id": 0, "status": self.status.id}, 404),
+            ({"id": ticket.id}, 400),
+            ({"id": ticket.id, "status": 0}, 400),
+            ({"id": ticket.id, "status": other_board_status.id}, 400),
+        ):
+            response = self.client.post(
+                self.url, payload, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, status_code, payload)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, self.status)
+
+
+class UpdateTicketSprintAJAXViewTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.sprint = factories.SprintFactory(board=self.board)
+        self.ticket = factories.TicketFactory(board=self.board)
+        self.client.force_login(factories.UserFactory())
+        self.url = reverse("ajax-ticket-update-sprint")
+
+    def post(self, payload):
+        return self.client.post(self.url, payload, content_type="application/json")
+
+    def test_ticket_is_moved_into_the_sprint_and_back(self):
+        response = self.post({"id": self.ticket.id, "sprint": self.sprint.id})
+        self.assertEqual(response.status_code, 200)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.sprint, self.sprint)
+        self.post({"id": self.ticket.id, "sprint": "backlog"})
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.sprint)
+
+    def test_unknown_ticket_or_unavailable_sprint_is_rejected(self):
+        completed = factories.SprintFactory(
+            board=self.board, completed_date=timezone.now()
+        )
+        other_board_sprint = factories.SprintFactory()
+        for payload, status_code in (
+            ({"id": 0, "sprint": self.sprint.id}, 404),
+            ({"id": "one", "sprint": self.sprint.id}, 400),
+            ({"id": self.ticket.id, "sprint": "one"}, 400),
+            ({"id": self.ticket.id, "sprint": 0}, 400),
+            ({"id": self.ticket.id, "sprint": completed.id}, 400),
+            ({"id": self.ticket.id, "sprint": other_board_sprint.id}, 400),
+        ):
+            response = self.post(payload)
+            self.assertEqual(response.status_code, status_code, payload)
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.sprint)
+
+
+class UpdateBoardStatusOrderAJAXViewTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.statuses = [
+            factories.TicketStatusFactory(board=self.board, order=(i + 1) * RANK_STEP)
+            for i in range(3)
+        ]
+        self.client.force_login(factories.UserFactory())
+        self.url = reverse("ajax-status-update-order")
+
+    def post(self, payload):
+        return self.client.post(self.url, payload, content_type="application/json")
+
+    def test_column_is_moved_between_its_neighbours(self):
+        first, second, third = self.statuses
+        response = self.post({"id": third.id, "previous": first.id, "next": second.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(self.board.statuses.order_by("order")), [first, third, second]
+        )
+
+    def test_unknown_status_or_foreign_neighbours_are_rejected(self):
+        first, second, third = self.statuses
+        other = factories.TicketStatusFactory()
+        for payload, status_code in (
+            ({"id": 0}, 404),
+            ({"id": "one"}, 404),
+            ({"id": third.id, "previous": other.id, "next": first.id}, 400),
+            ({"id": third.id, "previous": first.id, "next": "two"}, 400),
+        ):
+            response = self.post(payload)
+            self.assertEqual(response.status_code, status_code, payload)
+        self.assertEqual(
+            list(self.board.statuses.order_by("order")), [first, second, third]
+        )
+
+
+class BulkUpdateTicketStatusAJAXViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.todo = factories.TicketStatusFactory(board=self.board)
+        self.done = factories.TicketStatusFactory(board=self.board)
+        self.client.force_login(self.user)
+        self.url = reverse("ajax-ticket-bulk-update-status")
+
+    def post(self, tickets):
+        return self.client.post(
+            self.url, {"tickets": tickets}, content_type="application/json"
+        )
+
+    def test_column_is_updated_in_a_fixed_number_of_queries(self):
+        tickets = factories.TicketFactory.create_batch(
+            20, board=self.board, status=self.todo
+        )
+        payload = [
+            {"id": ticket.id, "status": self.done.id, "order": i}
+            for i, ticket in enumerate(reversed(tickets))
+        ]
+        # Tickets, statuses, a single UPDATE and a single INSERT into the
+        # transition log wrapped in a savepoint, plus the session and user
+        # recorded as the actor
+        with self.assertNumQueries(8):
+            response = self.post(payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Ticket.objects.filter(status=self.done)), list(reversed(tickets))
+        )
+        self.assertEqual(
+            response.json()["updated"][0],
+            {"id": tickets[0].id, "status": self.done.id, "order": 20 * RANK_STEP},
+        )
+
+    def test_invalid_payload_is_rejected_as_a_whole(self):
+        ticket = factories.TicketFactory(board=self.board, status=self.todo)
+        other_board_status = factories.TicketStatusFactory()
+        response = self.post(
+            [
+                {"id": ticket.id, "status": self.done.id, "order": 0},
+                {"id": ticket.id + 1, "status": other_board_status.id, "order": 1},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, self.todo)
+
+    def test_negative_order_is_rejected(self):
+        ticket = factories.TicketFactory(board=self.board, status=self.todo)
+        response = self.post([{"id": ticket.id, "status": self.done.id, "order": -1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"errors": ["Orders of tickets cannot be negative"]}
+        )
+
+
+class BulkUpdateTicketSprintAJAXViewTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.sprint = factories.SprintFactory(board=self.board)
+        self.tickets = factories.TicketFactory.create_batch(2, board=self.board)
+        self.client.force_login(factories.UserFactory())
+        self.url = reverse("ajax-ticket-bulk-update-sprint")
+
+    def post(self, tickets):
+        return self.client.post(
+            self.url, {"tickets": tickets}, content_type="application/json"
+        )
+
+    def test_tickets_are_moved_between_sprints(self):
+        first, second = self.tickets
+        response = self.post(
+            [
+                {"id": first.id, "sprint": self.sprint.id, "order": 0},
+                {"id": second.id, "sprint": "backlog", "order": 0},
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.sprint, first.order), (self.sprint, RANK_STEP))
+        self.assertEqual((second.sprint, second.order), (None, RANK_STEP))
+
+    def test_negative_order_is_rejected(self):
+        first, second = self.tickets
+        response = self.post(
+            [
+                {"id": first.id, "sprint": self.sprint.id, "order": 0},
+                {"id": second.id, "sprint": self.sprint.id, "order": -2},
+            ]
+        )
+        self.assertEqual(response.status_code, 400)
+        first.refresh_from_db()
+        self.assertIsNone(first.sprint)
+
+
+class BulkUpdateBoardStatusesAJAXViewTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.statuses = factories.TicketStatusFactory.create_batch(2, board=self.board)
+        self.client.force_login(factories.UserFactory())
+        self.url = reverse("ajax-statuses-bulk-update")
+
+    def post(self, statuses):
+        return self.client.post(
+            self.url, {"statuses": statuses}, content_type="application/json"
+        )
+
+    def test_columns_are_reordered(self):
+        first, second = self.statuses
+        response = self.post(
+            [{"id": first.id, "order": 1}, {"id": second.id, "order": 0}]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.board.statuses.order_by("order")), [second, first])
+
+    def test_negative_order_is_rejected(self):
+        first, second = self.statuses
+        orders = [first.order, second.order]
+        response = self.post(
+            [{"id": first.id, "order": 1}, {"id": second.id, "order": -1}]
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"errors": ["Orders of statuses cannot be negative"]}
+        )
+        self.assertEqual(
+            [status.order for status in self.board.statuses.order_by("id")], orders
+        )
+
+
+class SprintStartCompleteViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.todo, _, _, self.done = [
+            factories.TicketStatusFactory(board=self.board, name=name, order=i)
+            for i, name in enumerate(BasicStatuses.values)
+        ]
+        self.client.force_login(self.user)
+
+    def count_queries(self, url_name, sprint):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse(url_name, kwargs={"pk": sprint.pk}))
+        self.assertEqual(response.status_code, 302)
+        return len(queries)
+
+    def create_sprint(self, ticket_count):
+        sprint = factories.SprintFactory(board=self.board)
+        factories.TicketFactory.create_batch(
+            ticket_count, board=self.board, sprint=sprint, status=None
+        )
+        return sprint
+
+    def test_start_query_count_does_not_grow_with_tickets(self):
+        # Both measured starts then replace an active sprint
+        self.count_queries("sprint-start", self.create_sprint(0))
+        small = self.count_queries("sprint-start", self.create_sprint(2))
+        large = self.count_queries("sprint-start", self.create_sprint(40))
+        self.assertEqual(small, large)
+
+    def test_complete_query_count_does_not_grow_with_tickets(self):
+        small = self.create_sprint(2)
+        large = self.create_sprint(40)
+        Ticket.objects.update(status=self.todo)
+        self.assertEqual(
+            self.count_queries("sprint-complete", small),
+            self.count_queries("sprint-complete", large),
+        )
+
+    def test_start_moves_sprint_tickets_onto_the_board(self):
+        old = self.create_sprint(3)
+        self.count_queries("sprint-start", old)
+        new = self.create_sprint(3)
+        self.count_queries("sprint-start", new)
+        self.assertFalse(old.tickets.filter(status__isnull=False).exists())
+        self.assertFalse(new.tickets.exclude(status=self.todo).exists())
+        self.board.refresh_from_db()
+        self.assertEqual(self.board.active_sprint, new)
+
+    def test_new_columns_go_last_and_start_leaves_tickets_in_to_do(self):
+        TicketStatus.objects.filter(board=self.board).update(order=F("order") + 1)
+        response = self.client.post(
+            reverse("status-create", kwargs={"pk": self.board.pk}),
+            {"name": "Review", "colour": StatusColours.values[0]},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.board.statuses.order_by("order").last().name, "Review")
+
+        # To do still wins when it is not the first column
+        TicketStatus.objects.filter(name="Review").update(order=0)
+        sprint = self.create_sprint(2)
+        self.count_queries("sprint-start", sprint)
+        self.assertFalse(sprint.tickets.exclude(status=self.todo).exists())
+
+    def test_only_one_sprint_per_board_can_be_active(self):
+        factories.SprintFactory(board=self.board, start_date=timezone.now())
+        with self.assertRaises(IntegrityError):
+            factories.SprintFactory(board=self.board, start_date=timezone.now())
+
+    def test_complete_returns_unfinished_tickets_to_the_backlog(self):
+        sprint = self.create_sprint(4)
+        self.count_queries("sprint-start", sprint)
+        finished = sprint.tickets.first()
+        Ticket.objects.filter(pk=finished.pk).update(status=self.done)
+        self.count_queries("sprint-complete", sprint)
+        self.assertEqual(list(sprint.tickets.all()), [finished])
+        self.board.refresh_from_db()
+        self.assertIsNone(self.board.active_sprint)
+        self.assertEqual(
+            Ticket.objects.filter(sprint__isnull=True, status__isnull=True).count(), 3
+        )
+
+
+class BoardAccessTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.client.force_login(self.user)
+        self.url = reverse("board-settings", kwargs={"pk": self.board.pk})
+        factories.BoardMembershipFactory(board=self.board, is_owner=True)
+
+    def test_members_are_cached_until_a_membership_changes(self):
+        with CaptureQueriesContext(connection) as uncached:
+            response = self.client.get(self.url)
+        self.assertFalse(response.context["is_member"])
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(self.url)
+        self.assertEqual(len(cached), len(uncached) - 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            factories.BoardMembershipFactory(board=self.board, user=self.user)
+        response = self.client.get(self.url)
+        self.assertTrue(response.context["is_member"])
+        self.assertFalse(response.context["is_owner"])
+
+
+class ArchiveViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        now = timezone.now()
+        self.sprints = [
+            factories.SprintFactory(
+                name=f"Sprint {i}",
+                board=self.board,
+                start_date=now - timedelta(days=i + 14),
+                completed_date=now - timedelta(days=i),
+            )
+            for i in range(5)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse("board-archive", kwargs={"pk": self.board.pk})
+
+    def get_page(self, query=""):
+        html = self.client.get(self.url + query).content.decode()
+        names = re.findall(r"Sprint \d", html)
+        links = dict(re.findall(r'href="(\?(?:after|before)=[^"]+)" rel="(\w+)"', html))
+        return names, {rel: link for link, rel in links.items()}
+
+    @patch("kanban.views.ArchiveView.page_size", 2)
+    def test_pages_follow_cursors_both_ways(self):
+        names, links = self.get_page()
+        self.assertEqual(names, ["Sprint 0", "Sprint 1"])
+        self.assertNotIn("prev", links)
+        names, links = self.get_page(links["next"])
+        self.assertEqual(names, ["Sprint 2", "Sprint 3"])
+        names, links = self.get_page(links["next"])
+        self.assertEqual(names, ["Sprint 4"])
+        self.assertNotIn("next", links)
+        names, links = self.get_page(links["prev"])
+        self.assertEqual(names, ["Sprint 2", "Sprint 3"])
+        names, links = self.get_page(links["prev"])
+        self.assertEqual(names, ["Sprint 0", "Sprint 1"])
+        self.assertNotIn("prev", links)
+
+    @patch("kanban.views.ArchiveView.page_size", 2)
+    def test_invalid_cursors_show_the_first_page(self):
+        for cursor in (encode_cursor("2024-02-30T00:00:00", 1), "not-a-cursor"):
+            response = self.client.get(f"{self.url}?after={cursor}")
+            self.assertEqual(response.status_code, 200)
+            names, links = self.get_page(f"?after={cursor}")
+            self.assertEqual(names, ["Sprint 0", "Sprint 1"], cursor)
+            self.assertNotIn("prev", links)
+
+    def test_tickets_are_counted_not_loaded(self):
+        factories.TicketFactory.create_batch(
+            3, board=self.board, sprint=self.sprints[0]
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, "Tickets (3)")
+        self.assertNotContains(response, "?page=archive")
+        response = self.client.get(
+            reverse("sprint-tickets", kwargs={"pk": self.sprints[0].pk})
+        )
+        self.assertContains(response, "?page=archive", count=3)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class BacklogViewTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.status = factories.TicketStatusFactory(board=self.board)
+        self.sprint = factories.SprintFactory(board=self.board)
+        self.client.force_login(self.user)
+        self.url = reverse("board-backlog", kwargs={"pk": self.board.pk})
+
+    def create_tickets(self, count, sprint=None):
+        return [
+            factories.TicketFactory(
+                board=self.board, status=self.status, sprint=sprint, order=i
+            )
+            for i in range(count)
+        ]
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_groups_or_tickets(self):
+        self.create_tickets(1, sprint=self.sprint)
+        expected = self.count_queries()
+        self.create_tickets(20, sprint=self.sprint)
+        self.create_tickets(20)
+        factories.SprintFactory(board=self.board)
+        self.assertEqual(self.count_queries(), expected)
+
+    @patch("kanban.views.BacklogView.page_size", 2)
+    @patch("kanban.views.BacklogTicketsView.page_size", 2)
+    def test_large_groups_are_paged_in(self):
+        tickets = self.create_tickets(5, sprint=self.sprint)
+        html = self.client.get(self.url).content.decode()
+        for ticket in tickets[:2]:
+            self.assertIn(f'data-id="{ticket.id}"', html)
+        self.assertNotIn(f'data-id="{tickets[2].id}"', html)
+        more_url, after = re.search(
+            rf'data-id="{self.sprint.id}" data-url="([^"]+)" data-after="([^"]+)"',
+            html,
+        ).groups()
+
+        seen = []
+        while after:
+            data = self.client.get(f"{more_url}&after={after}").json()
+            seen += [int(pk) for pk in re.findall(r'data-id="(\d+)"', data["html"])]
+            after = data["next"]
+        self.assertEqual(seen, [ticket.id for ticket in tickets[2:]])
+
+    def test_unknown_groups_are_rejected(self):
+        self.create_tickets(2)
+        url = reverse("board-backlog-tickets", kwargs={"pk": self.board.pk})
+        other_board_sprint = factories.SprintFactory()
+        for group in ("zzz", "", "0", str(other_board_sprint.id)):
+            response = self.client.get(url, {"group": group})
+            self.assertEqual(response.status_code, 400, group)
+        response = self.client.get(url, {"group": self.sprint.id})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_pages_are_not_modified(self):
+        self.create_tickets(2)
+        url = reverse("board-backlog-tickets", kwargs={"pk": self.board.pk})
+        url += "?group=backlog"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.create_tickets(1)
+        response = self.client.get(url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_status_is_a_single_update_then_redirects(self):
+        tickets = self.create_tickets(3)
+        status = factories.TicketStatusFactory(board=self.board)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url,
+                {
+                    "form-action": "update-status",
+                    "status": status.id,
+                    "selected_tickets": [ticket.id for ticket in tickets],
+                },
+            )
+        updates = [q for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertRedirects(response, self.url)
+        self.assertEqual(Ticket.objects.filter(status=status).count(), 3)
+
+
+class InProcessBrokerTests(TestCase):
+    async def test_events_reach_subscribers_of_the_board(self):
+        broker = InProcessBroker()
+        queue = broker.subscribe(1)
+        other = broker.subscribe(2)
+        broker.publish(1, {"type": "tickets"})
+        self.assertEqual(await asyncio.wait_for(queue.get(), 1), {"type": "tickets"})
+        self.assertTrue(other.empty())
+        broker.unsubscribe(1, queue)
+        broker.unsubscribe(2, other)
+        self.assertEqual(broker.subscribers, {})
+
+    async def test_publishing_from_another_thread(self):
+        broker = InProcessBroker()
+        queue = broker.subscribe(1)
+        await sync_to_async(broker.publish)(1, {"type": "statuses"})
+        self.assertEqual(await asyncio.wait_for(queue.get(), 1), {"type": "statuses"})
+
+
+class BoardEventPublishingTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.statuses = factories.TicketStatusFactory.create_batch(2, board=self.board)
+        self.ticket = factories.TicketFactory(board=self.board, status=self.statuses[0])
+        self.client.force_login(factories.UserFactory())
+
+    def post(self, url_name, payload):
+        with patch("kanban.events.get_broker") as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse(url_name), payload, content_type="application/json"
+                )
+        return [call.args for call in get_broker.return_value.publish.call_args_list]
+
+    def test_moving_a_ticket_publishes_its_new_position(self):
+        published = self.post(
+            "ajax-ticket-update-status",
+            {"id": self.ticket.id, "status": self.statuses[1].id},
+        )
+        self.assertEqual(
+            published,
+            [
+                (
+                    self.board.id,
+                    {
+                        "type": "tickets",
+                        "tickets": [
+                            {
+                                "id": self.ticket.id,
+                                "status": self.statuses[1].id,
+                                "order": RANK_STEP,
+                            }
+                        ],
+                    },
+                )
+            ],
+        )
+
+    def test_rejected_bulk_update_publishes_nothing(self):
+        published = self.post(
+            "ajax-ticket-bulk-update-status",
+            {"tickets": [{"id": self.ticket.id, "status": 0, "order": 0}]},
+        )
+        self.assertEqual(published, [])
+
+
+class BoardChangesViewTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.status = factories.TicketStatusFactory(board=self.board)
+        self.tickets = factories.TicketFactory.create_batch(
+            3, board=self.board, status=self.status
+        )
+        self.url = reverse("board-changes", kwargs={"pk": self.board.pk})
+
+    def age_board(self):
+        """Backdate everything on the board and return a cursor after it."""
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Ticket.objects.update(updated_at=an_hour_ago)
+        TicketStatus.objects.update(updated_at=an_hour_ago)
+        return encode_cursor(an_hour_ago + timedelta(minutes=1))
+
+    def test_without_a_cursor_the_whole_board_is_returned(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data["tickets"]), 3)
+        self.assertEqual([s["id"] for s in data["statuses"]], [self.status.id])
+        self.assertTrue(data["next"])
+
+    def test_only_changes_since_the_cursor_are_returned(self):
+        since = self.age_board()
+        moved, deleted, _ = self.tickets
+        moved.title = "Moved"
+        moved.save()
+        deleted_id = deleted.id
+        deleted.delete()
+
+        data = self.client.get(self.url, {"since": since}).json()
+        self.assertEqual([t["id"] for t in data["tickets"]], [moved.id])
+        self.assertEqual(data["tickets"][0]["title"], "Moved")
+        self.assertEqual(data["statuses"], [])
+        self.assertEqual(data["deleted"]["tickets"], [deleted_id])
+
+        data = self.client.get(self.url, {"since": data["next"]}).json()
+        self.assertLessEqual(len(data["tickets"]), 1)
+
+    def test_respaced_ranks_count_as_changes(self):
+        since = self.age_board()
+        Ticket.objects.update(order=0)
+        first, previous, next = self.tickets
+        place(
+            first,
+            Ticket.objects.filter(status=self.status),
+            previous_id=previous.id,
+            next_id=next.id,
+        )
+        data = self.client.get(self.url, {"since": since}).json()
+        self.assertEqual(len(data["tickets"]), 2)
+
+    def test_deleting_a_board_leaves_no_tombstones(self):
+        self.board.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_invalid_cursor_is_rejected(self):
+        for since in ("nonsense", encode_cursor("2024-02-30T00:00:00")):
+            response = self.client.get(self.url, {"since": since})
+            self.assertEqual(response.status_code, 400, since)
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are SQLite specific")
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class QueryPlanTests(TestCase):
+    """
+    Explain every query a page runs against the kanban tables and check
+    that each one is answered from an index rather than a scan and sort.
+    """
+
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        factories.BoardMembershipFactory(
+            board=self.board, user=self.user, is_owner=True
+        )
+        self.status = factories.TicketStatusFactory(board=self.board)
+        self.sprint = factories.SprintFactory(
+            board=self.board,
+            start_date=timezone.now(),
+            completed_date=timezone.now(),
+        )
+        self.ticket = factories.TicketFactory(
+            board=self.board, status=self.status, sprint=self.sprint
+        )
+        factories.CommentFactory(ticket=self.ticket)
+        factories.TicketFactory(board=self.board, status=self.status)
+        self.client.force_login(self.user)
+
+    def get_plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        plans = {}
+        for query in queries:
+            sql = query["sql"]
+            if sql.startswith("SELECT") and '"kanban_' in sql:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                    plans[sql] = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(plans)
+        return plans
+
+    def assertIndexed(self, url, sorts=0):
+        for sql, plan in self.get_plans(url).items():
+            with self.subTest(sql=sql):
+                scans = [step for step in plan if step.startswith("SCAN kanban_")]
+                self.assertEqual(scans, [], plan)
+                sorted_steps = [step for step in plan if "TEMP B-TREE" in step]
+                self.assertLessEqual(len(sorted_steps), sorts, plan)
+
+    def test_board(self):
+        self.assertIndexed(reverse("board-detail", kwargs={"pk": self.board.pk}))
+
+    def test_backlog(self):
+        url = reverse("board-backlog", kwargs={"pk": self.board.pk})
+        # The windows are computed in index order, leaving only the rows
+        # capped at page_size per group to be sorted
+        self.assertIndexed(url, sorts=1)
+        plans = "\n".join(sum(self.get_plans(url).values(), []))
+        self.assertIn("USING INDEX ticket_board_sprint_idx", plans)
+
+    def test_backlog_tickets(self):
+        url = reverse("board-backlog-tickets", kwargs={"pk": self.board.pk})
+        self.assertIndexed(f"{url}?group=backlog")
+
+    def test_archive(self):
+        self.assertIndexed(reverse("board-archive", kwargs={"pk": self.board.pk}))
+        self.assertIndexed(reverse("sprint-tickets", kwargs={"pk": self.sprint.pk}))
+
+    def test_ticket(self):
+        self.assertIndexed(reverse("ticket-detail", kwargs={"pk": self.ticket.pk}))
+
+    def test_changes(self):
+        url = reverse("board-changes", kwargs={"pk": self.board.pk})
+        self.assertIndexed(url)
+        since = encode_cursor(timezone.now() - timedelta(minutes=5))
+        self.assertIndexed(f"{url}?since={since}")
+
+
+@skipUnless(search.is_enabled(), "The search index needs SQLite FTS5")
+class SearchTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.status = factories.TicketStatusFactory(board=self.board)
+
+    def create_ticket(self, **kwargs):
+        kwargs.setdefault("description", "")
+        return factories.TicketFactory(board=self.board, status=self.status, **kwargs)
+
+    def search(self, query, board=None):
+        return [ticket.id for ticket in search.search((board or self.board).id, query)]
+
+    def test_titles_descriptions_and_comments_are_searched(self):
+        title = self.create_ticket(title="Broken login page")
+        description = self.create_ticket(
+            title="Other", description="<p>The <strong>login</strong> form</p>"
+        )
+        comment = self.create_ticket(title="Another")
+        factories.CommentFactory(ticket=comment, text="<p>Also seen on login</p>")
+        self.assertEqual(self.search("login"), [title.id, description.id, comment.id])
+        self.assertEqual(self.search("strong"), [])
+
+    def test_search_is_scoped_to_the_board(self):
+        self.create_ticket(title="Deploy pipeline")
+        other_board = factories.BoardFactory()
+        self.assertEqual(self.search("deploy", board=other_board), [])
+
+    def test_last_word_matches_as_a_prefix(self):
+        ticket = self.create_ticket(title="Refactor scheduler")
+        self.assertEqual(self.search("refactor sched"), [ticket.id])
+        self.assertEqual(self.search("refac scheduler"), [])
+
+    def test_query_syntax_is_treated_as_text(self):
+        ticket = self.create_ticket(title="Fix NEAR the OR operator")
+        self.assertEqual(self.search('near OR "operator'), [ticket.id])
+        self.assertEqual(self.search("***"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        ticket = self.create_ticket(title="Old title")
+        ticket.title = "New title"
+        ticket.save()
+        self.assertEqual(self.search("old"), [])
+        self.assertEqual(self.search("new"), [ticket.id])
+        ticket.delete()
+        self.assertEqual(self.search("new"), [])
+
+    def test_moves_do_not_reindex(self):
+        ticket = self.create_ticket(title="Moved")
+        with patch("kanban.search.index_tickets") as index_tickets:
+            ticket.save(update_fields=["status", "order", "updated_at"])
+        index_tickets.assert_not_called()
+
+    def test_snippets_are_escaped(self):
+        self.create_ticket(title="Markup", description="<p>a &lt;script&gt; tag</p>")
+        ticket = search.search(self.board.id, "script")[0]
+        self.assertEqual(ticket.snippet, "a &lt;<mark>script</mark>&gt; tag")
+
+    def test_search_page(self):
+        self.create_ticket(title="Searchable ticket")
+        self.client.force_login(factories.UserFactory())
+        url = reverse("board-search", kwargs={"pk": self.board.pk})
+        response = self.client.get(url, {"q": "searchable"})
+        self.assertContains(response, "Searchable ticket")
+        self.assertContains(response, "1 ticket found")
+
+        url = reverse("board-search", kwargs={"pk": 0})
+        self.assertEqual(self.client.get(url, {"q": "x"}).status_code, 404)
+
+
+class RichTextTests(TestCase):
+    def test_sanitise_drops_scripts_and_unsafe_links(self):
+        html = (
+            '<p onclick="x()">Hi <script>alert(1)</script>'
+            '<a href="javascript:alert(1)">bad</a> '
+            '<a href="https://example.com" target="_blank">good</a></p>'
+        )
+        self.assertEqual(
+            richtext.sanitise(html),
+            '<p>Hi <a>bad</a> <a href="https://example.com">good</a></p>',
+        )
+
+    def test_unclosed_tags_are_closed(self):
+        self.assertEqual(
+            richtext.sanitise("<ul><li>one<li>two</ul>"),
+            "<ul><li>one</li><li>two</li></ul>",
+        )
+        self.assertEqual(
+            richtext.sanitise("<ul><li>one<ul><li>a<li>b</ul><li>two"),
+            "<ul><li>one<ul><li>a</li><li>b</li></ul></li><li>two</li></ul>",
+        )
+        self.assertEqual(
+            richtext.sanitise("<p>one<p><b>two<ul><li>three"),
+            "<p>one</p><p><b>two</b></p><ul><li>three</li></ul>",
+        )
+
+    def test_plain_text_keeps_paragraph_breaks(self):
+        html = "<p>First&nbsp;line</p><ul><li>one</li><li>two</li></ul>"
+        self.assertEqual(richtext.html_to_text(html), "First line\none\ntwo")
+
+    def test_excerpt_cuts_on_a_word_break(self):
+        self.assertEqual(richtext.excerpt("short text"), "short text")
+        self.assertEqual(richtext.excerpt("one two three four", 12), "one two…")
+
+    def test_derived_fields_are_stored_on_save(self):
+        ticket = factories.TicketFactory(
+            description="<p>Fix the <em>login</em> page</p><script>x</script>"
+        )
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.description, "<p>Fix the <em>login</em> page</p>")
+        self.assertEqual(ticket.description_plain, "Fix the login page")
+        self.assertEqual(ticket.description_excerpt, "Fix the login page")
+        self.assertEqual(ticket.description_word_count, 4)
+
+        comment = factories.CommentFactory(
+            ticket=ticket, text="<p>Seen <b>again</b></p>"
+        )
+        comment.refresh_from_db()
+        self.assertEqual(comment.text_plain, "Seen again")
+
+    def test_moves_do_not_reprocess_the_description(self):
+        ticket = factories.TicketFactory(description="<p>Text</p>")
+        with patch("kanban.richtext.process") as process:
+            ticket.save(update_fields=["order", "updated_at"])
+        process.assert_not_called()
+
+    def test_edit_view_stores_excerpt(self):
+        ticket = factories.TicketFactory()
+        self.client.force_login(factories.UserFactory())
+        self.client.post(
+            reverse("ticket-detail", kwargs={"pk": ticket.pk}),
+            {
+                "form_name": "description",
+                "description": "<p>New <strong>words</strong></p>",
+            },
+        )
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.description_excerpt, "New words")
+
+
+class SeedingTests(TestCase):
+    def test_seeded_board_has_every_kind_of_sprint(self):
+        board = seeding.seed_board(200, random.Random(1))
+        self.assertEqual(board.tickets.count(), 200)
+        self.assertTrue(board.active_sprint.is_active)
+        self.assertTrue(board.sprints.filter(completed_date__isnull=False).exists())
+        self.assertTrue(board.sprints.filter(start_date__isnull=True).exists())
+        self.assertTrue(board.tickets.filter(sprint=None).exists())
+        ticket = board.tickets.first()
+        self.assertTrue(ticket.description_excerpt)
+        self.assertIn(ticket.id, [t.id for t in search.search(board.id, ticket.title)])
+
+    def test_same_seed_gives_the_same_tickets(self):
+        titles = [
+            list(
+                seeding.seed_board(20, random.Random(3)).tickets.values_list(
+                    "title", flat=True
+                )
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(titles[0], titles[1])
+
+    def test_scale_mode_creates_the_requested_totals(self):
+        owner = factories.UserFactory()
+        call_command(
+            "createtestdata",
+            owner.email,
+            "--scale",
+            "--boards=3",
+            "--users=12",
+            "--tickets=90",
+            "--sprints=9",
+            "--comments=40",
+            stdout=StringIO(),
+        )
+        self.assertEqual(Board.objects.count(), 3)
+        self.assertEqual(Ticket.objects.count(), 90)
+        self.assertEqual(Sprint.objects.count(), 9)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(owner.memberships.filter(is_owner=True).count(), 3)
+
+    def test_benchmark_requests_succeed(self):
+        command = BenchmarkCommand(stdout=StringIO())
+        results = command.run([30], requests=1, warmup=0, seed=0)
+        self.assertIn("board-detail", [result["url_name"] for result in results])
+        for result in results:
+            self.assertEqual(result["status"], 200, result["url_name"])
+            self.assertGreater(result["queries"], 0, result["url_name"])
+        detail = next(r for r in results if r["url_name"] == "board-detail")
+        self.assertLess(detail["warm"]["queries"], detail["queries"])
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.board = factories.BoardFactory()
+        self.client.force_login(factories.UserFactory())
+
+    def test_requests_are_recorded_by_url_name(self):
+        self.client.get(reverse("board-detail", kwargs={"pk": self.board.pk}))
+        series = registry.queries.series[("board-detail", "GET")]
+        self.assertEqual(series[2], 1)
+        self.assertGreater(series[1], 0)
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response["Content-Type"].split(";")[0], "text/plain")
+        self.assertContains(
+            response,
+            'kanban_request_duration_seconds_count{view="board-detail",method="GET"} 1',
+        )
+        self.assertContains(
+            response,
+            'kanban_responses_total{view="board-detail",method="GET",status="200"} 1',
+        )
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_nothing_is_recorded_when_disabled(self):
+        self.client.get(reverse("board-detail", kwargs={"pk": self.board.pk}))
+        self.assertEqual(registry.duration.series, {})
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.board = factories.BoardFactory()
+        status = factories.TicketStatusFactory(board=self.board)
+        self.ticket = factories.TicketFactory(board=self.board, status=status)
+        factories.CommentFactory(ticket=self.ticket)
+        self.user = factories.UserFactory()
+        factories.BoardMembershipFactory(board=self.board, user=self.user)
+
+    async def test_read_pages_are_served_asynchronously(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        pages = [
+            (reverse("index"), self.board.name),
+            (reverse("board-detail", kwargs={"pk": self.board.pk}), self.ticket.title),
+            (reverse("board-backlog", kwargs={"pk": self.board.pk}), self.ticket.title),
+            (
+                reverse("ticket-detail", kwargs={"pk": self.ticket.pk}),
+                self.ticket.title,
+            ),
+        ]
+        for url, text in pages:
+            response = await client.get(url)
+            self.assertContains(response, text, msg_prefix=url)
+
+    async def test_board_subscribes_to_events_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(
+            reverse("board-detail", kwargs={"pk": self.board.pk})
+        )
+        self.assertContains(response, "new EventSource(")
+
+    def test_events_are_not_streamed_under_wsgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse("board-detail", kwargs={"pk": self.board.pk})
+        )
+        self.assertNotContains(response, "new EventSource(")
+        response = self.client.get(
+            reverse("board-events", kwargs={"pk": self.board.pk})
+        )
+        self.assertEqual(response.status_code, 204)
+
+
+class HomeViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = factories.UserFactory()
+        self.client.force_login(self.user)
+        self.url = reverse("index")
+
+    def create_board(self, name, tickets=0):
+        board = factories.BoardFactory(name=name)
+        factories.BoardMembershipFactory(board=board, user=self.user)
+        todo = factories.TicketStatusFactory(board=board, name=BasicStatuses.TODO)
+        factories.TicketFactory.create_batch(tickets, board=board, status=todo)
+        return board
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_boards_are_annotated_with_summaries(self):
+        board = self.create_board("Board", tickets=2)
+        factories.BoardMembershipFactory(board=board)
+        done = factories.TicketStatusFactory(board=board, name=BasicStatuses.DONE)
+        now = timezone.now()
+        completed = factories.SprintFactory(
+            board=board, start_date=now, completed_date=now
+        )
+        factories.TicketFactory(board=board, status=done, sprint=completed)
+        active = factories.SprintFactory(board=board, name="Sprint 7", start_date=now)
+        board.active_sprint = active
+        board.save()
+        factories.TicketFactory(board=board, status=done, sprint=active)
+
+        response = self.client.get(self.url)
+
+        summary = response.context["your_boards"]["boards"][0]
+        self.assertEqual(summary.todo_count, 2)
+        self.assertEqual(summary.in_progress_count, 0)
+        # The ticket in the completed sprint is no longer on the board
+        self.assertEqual(summary.done_count, 1)
+        self.assertEqual(summary.member_count, 2)
+        self.assertContains(response, "Sprint 7")
+
+    def test_query_count_does_not_grow_with_boards(self):
+        self.create_board("First", tickets=3)
+        few = self.count_queries()
+        cache.clear()
+        for i in range(5):
+            self.create_board(f"Board {i}", tickets=i)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_pages_are_cached_until_boards_change(self):
+        self.create_board("First")
+        uncached = self.count_queries()
+        self.assertLess(self.count_queries(), uncached)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_board("Second")
+        self.assertContains(self.client.get(self.url), "Second")
+
+    @patch("core.views.HomeView.page_size", 2)
+    def test_keyset_pagination(self):
+        names = ["Alpha", "Bravo", "Charlie", "Delta", "Echo"]
+        for name in reversed(names):
+            self.create_board(name)
+
+        seen = []
+        url = self.url
+        while url:
+            page = self.client.get(url).context["all_boards"]
+            seen += [board.name for board in page["boards"]]
+            url = page["next_url"] and self.url + page["next_url"]
+        self.assertEqual(seen, names)
+
+        page = self.client.get(self.url + page["previous_url"]).context["all_boards"]
+        self.assertEqual([board.name for board in page["boards"]], names[2:4])
+        self.assertIsNotNone(page["previous_url"])
+
+    @patch("core.views.HomeView.page_size", 1)
+    def test_paging_one_list_keeps_the_others_page(self):
+        first = self.create_board("Alpha")
+        self.create_board("Bravo")
+        self.create_board("Charlie")
+        cursor = encode_cursor(first.name, first.pk)
+
+        response = self.client.get(f"{self.url}?yours_after={cursor}")
+
+        yours, everything = (
+            response.context["your_boards"],
+            response.context["all_boards"],
+        )
+        self.assertEqual([board.name for board in yours["boards"]], ["Bravo"])
+        self.assertEqual([board.name for board in everything["boards"]], ["Alpha"])
+        self.assertIn(f"yours_after={cursor}", everything["next_url"])
+        self.assertNotIn("all_", yours["next_url"])
+
+
+class BurndownTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.todo, self.in_progress, _, self.done = [
+            factories.TicketStatusFactory(board=self.board, name=name, order=i)
+            for i, name in enumerate(BasicStatuses.values)
+        ]
+        self.sprint = factories.SprintFactory(board=self.board)
+        self.tickets = factories.TicketFactory.create_batch(
+            4, board=self.board, sprint=self.sprint, status=None
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse("sprint-start", kwargs={"pk": self.sprint.pk}))
+
+    def snapshot(self, date=None):
+        return dict(
+            SprintSnapshot.objects.filter(
+                sprint=self.sprint, date=date or timezone.localdate()
+            ).values_list("status", "ticket_count")
+        )
+
+    def move(self, ticket, status):
+        self.client.post(
+            reverse("ajax-ticket-update-status"),
+            {"id": ticket.id, "status": status.id},
+            content_type="application/json",
+        )
+
+    def test_start_counts_the_sprint(self):
+        self.assertEqual(self.snapshot(), {self.todo.id: 4})
+
+    def test_moves_update_todays_snapshot(self):
+        self.move(self.tickets[0], self.done)
+        self.client.post(
+            reverse("ajax-ticket-bulk-update-status"),
+            {
+                "tickets": [
+                    {"id": ticket.id, "status": self.in_progress.id, "order": i}
+                    for i, ticket in enumerate(self.tickets[1:3])
+                ]
+            },
+            content_type="application/json",
+        )
+        self.client.post(
+            reverse("ajax-ticket-update-sprint"),
+            {"id": self.tickets[3].id, "sprint": "backlog"},
+            content_type="application/json",
+        )
+        self.assertEqual(
+            self.snapshot(),
+            {self.todo.id: 0, self.in_progress.id: 2, self.done.id: 1},
+        )
+
+    def test_first_move_of_a_day_counts_the_sprint_in_full(self):
+        SprintSnapshot.objects.all().delete()
+        # A count left by a change the views did not record
+        yesterday = timezone.localdate() - timedelta(days=1)
+        SprintSnapshot.objects.create(
+            sprint=self.sprint, status=self.todo, date=yesterday, ticket_count=9
+        )
+        self.move(self.tickets[0], self.done)
+        self.assertEqual(self.snapshot(), {self.todo.id: 3, self.done.id: 1})
+
+    def test_complete_closes_out_the_burndown(self):
+        self.move(self.tickets[0], self.done)
+        self.client.post(reverse("sprint-complete", kwargs={"pk": self.sprint.pk}))
+        self.assertEqual(self.snapshot(), {self.todo.id: 3, self.done.id: 1})
+
+        response = self.client.get(
+            reverse("sprint-burndown-data", kwargs={"pk": self.sprint.pk})
+        )
+        day = response.json()["days"][-1]
+        self.assertEqual(day["counts"], [3, 0, 0, 1])
+        self.assertEqual(day["remaining"], 3)
+
+    def test_burndown_reads_only_snapshots(self):
+        started = timezone.now() - timedelta(days=3)
+        Sprint.objects.filter(pk=self.sprint.pk).update(start_date=started)
+        SprintSnapshot.objects.update(date=timezone.localdate(started))
+        url = reverse("sprint-burndown-data", kwargs={"pk": self.sprint.pk})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        days = response.json()["days"]
+        self.assertEqual(len(days), 4)
+        # Days without a snapshot carry the last counts forward
+        self.assertEqual([day["remaining"] for day in days], [4, 4, 4, 4])
+        self.assertFalse(
+            any('"kanban_ticket"' in query["sql"] for query in queries.captured_queries)
+        )
+        page = self.client.get(
+            reverse("sprint-burndown", kwargs={"pk": self.sprint.pk})
+        )
+        self.assertContains(page, "Remaining")
+
+
+class StatusTransitionTests(TestCase):
+    def setUp(self):
+        self.user = factories.UserFactory()
+        self.board = factories.BoardFactory()
+        self.todo, _, _, self.done = [
+            factories.TicketStatusFactory(board=self.board, name=name, order=i)
+            for i, name in enumerate(BasicStatuses.values)
+        ]
+        factories.BoardMembershipFactory(board=self.board, user=self.user)
+        self.client.force_login(self.user)
+
+    def transitions(self):
+        return list(
+            StatusTransition.objects.order_by("id").values_list(
+                "ticket", "from_status", "to_status", "sprint"
+            )
+        )
+
+    def test_status_changes_are_logged_with_their_actor(self):
+        ticket = factories.TicketFactory(board=self.board, status=self.todo)
+        self.client.post(
+            reverse("ajax-ticket-update-status"),
+            {"id": ticket.id, "status": self.done.id},
+            content_type="application/json",
+        )
+        transition = StatusTransition.objects.get()
+        self.assertEqual(
+            (transition.board, transition.ticket, transition.actor),
+            (self.board, ticket, self.user),
+        )
+        self.assertEqual(
+            (transition.from_status, transition.to_status), (self.todo, self.done)
+        )
+
+    def test_moves_within_a_status_are_not_logged(self):
+        tickets = factories.TicketFactory.create_batch(
+            2, board=self.board, status=self.todo
+        )
+        self.client.post(
+            reverse("ajax-ticket-bulk-update-status"),
+            {
+                "tickets": [
+                    {"id": ticket.id, "status": self.todo.id, "order": i}
+                    for i, ticket in enumerate(reversed(tickets))
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(self.transitions(), [])
+
+    def test_created_tickets_are_logged(self):
+        self.client.post(
+            reverse("create-ticket", kwargs={"pk": self.board.pk}),
+            {"title": "New ticket", "assignee": self.user.pk},
+        )
+        ticket = Ticket.objects.get()
+        self.assertEqual(self.transitions(), [(ticket.id, None, self.todo.id, None)])
+
+    def test_sprint_start_and_complete_are_logged(self):
+        sprint = factories.SprintFactory(board=self.board)
+        unfinished, finished = factories.TicketFactory.create_batch(
+            2, board=self.board, sprint=sprint, status=None
+        )
+        self.client.post(reverse("sprint-start", kwargs={"pk": sprint.pk}))
+        Ticket.objects.filter(pk=finished.pk).update(status=self.done)
+        StatusTransition.objects.all().delete()
+
+        self.client.post(reverse("sprint-complete", kwargs={"pk": sprint.pk}))
+
+        self.assertEqual(
+            self.transitions(), [(unfinished.id, self.todo.id, None, sprint.id)]
+        )
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.board = factories.BoardFactory()
+        self.todo, self.in_progress, _, self.done = [
+            factories.TicketStatusFactory(board=self.board, name=name, order=i)
+            for i, name in enumerate(BasicStatuses.values)
+        ]
+        self.user = factories.UserFactory()
+
+    def create_ticket(self, created, started=None, completed=None, **kwargs):
+        """A ticket with its transitions, at times given in days ago."""
+        ticket = factories.TicketFactory(
+            board=self.board,
+            status=self.done if completed is not None else self.todo,
+            **kwargs,
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(
+            created_at=self.now - timedelta(days=created)
+        )
+        for status, days in ((self.in_progress, started), (self.done, completed)):
+            if days is not None:
+                StatusTransition.objects.create(
+                    board=self.board,
+                    ticket=ticket,
+                    to_status=status,
+                    created_at=self.now - timedelta(days=days),
+                )
+        return ticket
+
+    def test_lead_and_cycle_times(self):
+        self.create_ticket(10, started=6, completed=4, assignee=self.user)
+        self.create_ticket(10, started=8, completed=2, assignee=self.user)
+        # Unfinished tickets only count towards the total
+        self.create_ticket(5, started=1)
+        data = analytics.board_analytics(self.board.id, now=self.now)
+
+        self.assertEqual((data["tickets"], data["completed"]), (3, 2))
+        self.assertEqual(data["lead_time"]["count"], 2)
+        self.assertEqual(data["lead_time"]["percentiles"]["p50"], 7)
+        self.assertEqual(data["cycle_time"]["mean"], 4)
+        histogram = {b["max_days"]: b["count"] for b in data["cycle_time"]["histogram"]}
+        self.assertEqual((histogram[3], histogram[8]), (1, 1))
+        [assignee] = data["assignees"]
+        self.assertEqual(
+            (assignee["id"], assignee["completed"], assignee["median_cycle_time"]),
+            (self.user.id, 2, 4),
+        )
+
+    def test_sprint_completion_stands_in_for_missing_transitions(self):
+        sprint = factories.SprintFactory(
+            board=self.board,
+            start_date=self.now - timedelta(days=20),
+            completed_date=self.now - timedelta(days=14),
+        )
+        self.create_ticket(21, completed=None, sprint=sprint)
+        Ticket.objects.update(status=self.done)
+        data = analytics.board_analytics(self.board.id, now=self.now)
+
+        self.assertEqual(data["lead_time"]["percentiles"]["p50"], 7)
+        self.assertEqual(data["cycle_time"]["count"], 0)
+        self.assertEqual(data["weekly_throughput"][-3]["count"], 1)
+        self.assertEqual(len(data["weekly_throughput"]), analytics.THROUGHPUT_WEEKS)
+
+    def test_starting_the_next_sprint_keeps_completed_tickets(self):
+        self.client.force_login(self.user)
+        first, second = factories.SprintFactory.create_batch(2, board=self.board)
+        done, reopened, unfinished = factories.TicketFactory.create_batch(
+            3, board=self.board, sprint=first, status=None
+        )
+        self.client.post(reverse("sprint-start", kwargs={"pk": first.pk}))
+        for ticket, statuses in (
+            (done, [self.in_progress, self.done]),
+            (reopened, [self.done, self.in_progress]),
+            (unfinished, [self.in_progress]),
+        ):
+            for status in statuses:
+                self.client.post(
+                    reverse("ajax-ticket-update-status"),
+                    {"id": ticket.id, "status": status.id},
+                    content_type="application/json",
+                )
+        self.client.post(reverse("sprint-complete", kwargs={"pk": first.pk}))
+        before = analytics.board_analytics(self.board.id)
+
+        self.client.post(reverse("sprint-start", kwargs={"pk": second.pk}))
+        after = analytics.board_analytics(self.board.id)
+        self.assertEqual(before["completed"], 1)
+        for name in ("completed", "lead_time", "cycle_time", "assignees"):
+            self.assertEqual(after[name], before[name], name)
+        self.assertEqual(sum(week["count"] for week in after["weekly_throughput"]), 1)
+
+    def test_boards_without_a_done_status_have_nothing_completed(self):
+        self.done.delete()
+        self.create_ticket(3, started=2)
+        self.assertEqual(analytics.board_analytics(self.board.id)["completed"], 0)
+
+    def test_group_medians_ignore_missing_values(self):
+        groups = np.array([0, 0, 0, 1, 1, 2])
+        values = np.array([3.0, 1.0, 2.0, 4.0, float("nan"), float("nan")])
+        medians = analytics.group_medians(groups, values, 3)
+        self.assertEqual(medians[:2].tolist(), [2.0, 4.0])
+        self.assertTrue(math.isnan(medians[2]))
+
+    def test_endpoint_is_cached_until_the_board_changes(self):
+        self.create_ticket(3, started=2, completed=1)
+        url = reverse("board-analytics", kwargs={"pk": self.board.pk})
+        self.assertEqual(self.client.get(url).json()["completed"], 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(
+            any("kanban_statustransition" in q["sql"] for q in queries.captured_queries)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_ticket(3, started=2, completed=1)
+        self.assertEqual(self.client.get(url).json()["completed"], 2)
+
+
+class BackupTests(TestCase):
+    def setUp(self):
+        self.board = seeding.seed_board(40, random.Random(2), user_count=4)
+
+    def export(self):
+        out = StringIO()
+        backup.export_board(self.board.id, out)
+        return out.getvalue().splitlines(keepends=True)
+
+    def test_import_copies_the_board(self):
+        copy = backup.import_board(self.export(), name="Copy").board
+        self.assertEqual(copy.name, "Copy")
+        self.assertEqual(copy.active_sprint.name, self.board.active_sprint.name)
+        for related, fields in (
+            ("statuses", ("name", "order", "colour")),
+            ("sprints", ("name", "start_date", "completed_date", "created_at")),
+            ("members", ("user", "is_owner")),
+            (
+                "tickets",
+                ("title", "status__name", "sprint__name", "assignee", "created_at"),
+            ),
+        ):
+            self.assertEqual(
+                list(getattr(copy, related).order_by("id").values_list(*fields)),
+                list(getattr(self.board, related).order_by("id").values_list(*fields)),
+                related,
+            )
+        comments = [
+            list(
+                Comment.objects.filter(ticket__board=board)
+                .order_by("ticket_id", "created_at")
+                .values_list("ticket__title", "text", "created_at")
+            )
+            for board in (self.board, copy)
+        ]
+        self.assertEqual(comments[1], comments[0])
+        ticket = copy.tickets.first()
+        self.assertIn(ticket.id, [t.id for t in search.search(copy.id, ticket.title)])
+
+    def test_rich_text_is_cleaned_on_import(self):
+        lines = []
+        for line in self.export():
+            row = json.loads(line)
+            if row["type"] == "ticket":
+                row["description"] = "<p>Hi</p><script>alert(1)</script>"
+                row["description_plain"] = "<script>alert(1)</script>"
+                row["description_word_count"] = 100
+            elif row["type"] == "comment":
+                row["text"] = '<p onclick="alert(1)">Hi</p><script>alert(1)</script>'
+            lines.append(json.dumps(row) + "\n")
+
+        copy = backup.import_board(lines).board
+        ticket = copy.tickets.first()
+        self.assertEqual(
+            (ticket.description, ticket.description_plain),
+            ("<p>Hi</p>", "Hi"),
+        )
+        self.assertEqual(ticket.description_word_count, 1)
+        comment = Comment.objects.filter(ticket__board=copy).first()
+        self.assertEqual((comment.text, comment.text_plain), ("<p>Hi</p>", "Hi"))
+
+    def test_missing_users_are_created_only_when_asked(self):
+        lines = self.export()
+        user = self.board.members.get(is_owner=True).user
+        username = user.username
+        user.username = "renamed"
+        user.save()
+
+        copy = backup.import_board(lines).board
+        self.assertFalse(copy.members.filter(is_owner=True).exists())
+        self.assertFalse(copy.tickets.filter(assignee=user).exists())
+
+        copy = backup.import_board(lines, create_users=True).board
+        self.assertEqual(copy.members.get(is_owner=True).user.username, username)
+
+    def test_invalid_file_creates_nothing(self):
+        lines = self.export()
+        boards = Board.objects.count()
+        with self.assertRaisesMessage(ValueError, "Line 3: missing field 'name'"):
+            backup.import_board(lines[:2] + ['{"type": "status"}\n'] + lines[2:])
+        with self.assertRaisesMessage(ValueError, "Line 1: "):
+            backup.import_board(lines[1:])
+        self.assertEqual(Board.objects.count(), boards)
+
+    def test_commands(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "board.jsonl")
+            call_command("exportboard", self.board.id, output=path, stdout=StringIO())
+            out = StringIO()
+            call_command("importboard", path, name="Restored", stdout=out)
+        copy = Board.objects.get(name="Restored")
+        self.assertIn(f"Imported board {copy.id}", out.getvalue())
+        self.assertEqual(copy.tickets.count(), 40)
+        with self.assertRaises(CommandError):
+            call_command("exportboard", 0, stdout=StringIO())
+
+
+class CsvImportTests(TestCase):
+    def setUp(self):
+        self.board = factories.BoardFactory()
+        self.todo, self.in_progress, _, _ = [
+            factories.TicketStatusFactory(board=self.board, name=name, order=i)
+            for i, name in enumerate(BasicStatuses.values)
+        ]
+        self.sprint = factories.SprintFactory(board=self.board, name="Sprint 4")
+        self.user = factories.UserFactory(first_name="Ada", last_name="Lovelace")
+        factories.BoardMembershipFactory(board=self.board, user=self.user)
+
+    def csv(self, *rows):
+        return StringIO("\n".join(rows) + "\n")
+
+    def test_rows_are_mapped_and_bad_rows_reported(self):
+        importer = csvimport.import_tickets(
+            self.board,
+            self.csv(
+                "Summary,Status,Sprint,Assignee,Description,Priority",
+                'Fix login,in progress,sprint 4,ada lovelace,"First line\nSecond",High',
+                "Add export,Shipped,,,,",
+                ",,,,,",
+                "  ,To do,,,Blank title,",
+                "Write docs,,,,,",
+            ),
+            self.user,
+            columns={"title": "Summary"},
+        )
+
+        self.assertEqual(importer.created, 2)
+        self.assertEqual(
+            importer.errors,
+            [
+                csvimport.RowError(4, "No status called “Shipped” on this board"),
+                csvimport.RowError(6, "Title is blank"),
+            ],
+        )
+        fix, docs = self.board.tickets.order_by("order")
+        self.assertEqual(
+            (fix.status, fix.sprint, fix.assignee, fix.author),
+            (self.in_progress, self.sprint, self.user, self.user),
+        )
+        self.assertEqual(fix.description, "<p>First line</p><p>Second</p>")
+        self.assertEqual(fix.description_excerpt, "First line Second")
+        self.assertEqual((docs.status, docs.sprint), (self.todo, None))
+        self.assertEqual(
+            StatusTransition.objects.filter(board=self.board, actor=self.user).count(),
+            2,
+        )
+        self.assertIn(fix.id, [t.id for t in search.search(self.board.id, "login")])
+
+    def test_tickets_are_inserted_in_batches_after_existing_ones(self):
+        existing = factories.TicketFactory(board=self.board, order=5000)
+        with patch.object(csvimport, "BATCH_SIZE", 2):
+            with CaptureQueriesContext(connection) as queries:
+                importer = csvimport.import_tickets(
+                    self.board, self.csv("title", *(f"Ticket {i}" for i in range(5)))
+                )
+        self.assertEqual(importer.created, 5)
+        inserts = [
+            q
+            for q in queries.captured_queries
+            if q["sql"].startswith('INSERT INTO "kanban_ticket"')
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(
+            list(self.board.tickets.order_by("order").values_list("title", flat=True)),
+            [existing.title, *(f"Ticket {i}" for i in range(5))],
+        )
+
+    def test_file_without_a_title_column_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "No “title” column"):
+            csvimport.import_tickets(self.board, self.csv("name,status", "A,To do"))
+
+    def test_upload_form(self):
+        self.client.force_login(self.user)
+        url = reverse("board-import-tickets", kwargs={"pk": self.board.pk})
+        self.assertContains(self.client.get(url), "Import tickets")
+
+        response = self.client.post(
+            url, {"file": SimpleUploadedFile("t.csv", b"\xef\xbb\xbfTitle\nOne\n")}
+        )
+        self.assertRedirects(
+            response, reverse("board-backlog", kwargs={"pk": self.board.pk})
+        )
+        self.assertTrue(self.board.tickets.filter(title="One").exists())
+
+        response = self.client.post(
+            url, {"file": SimpleUploadedFile("t.csv", b"title,sprint\nTwo,Nope\n")}
+        )
+        self.assertContains(response, "No sprint called “Nope” on this board")
+
+        response = self.client.post(
+            url, {"file": SimpleUploadedFile("t.csv", b"title\n\xff\n")}
+        )
+        self.assertContains(response, "The file could not be read as CSV")
+        self.assertEqual(self.board.tickets.count(), 1)
+
+    def test_upload_reports_tickets_saved_before_an_unreadable_line(self):
+        self.client.force_login(self.user)
+        url = reverse("board-import-tickets", kwargs={"pk": self.board.pk})
+        rows = "".join(f"Ticket {i}\n" for i in range(5))
+        content = f"title\n{rows}\"{'x' * (csv.field_size_limit() + 1)}\"\n"
+        with patch.object(csvimport, "BATCH_SIZE", 2):
+            response = self.client.post(
+                url, {"file": SimpleUploadedFile("t.csv", content.encode())}
+            )
+        self.assertContains(response, "Line 7: field larger than field limit")
+        self.assertContains(response, "The 4 tickets before it were imported.")
+        self.assertEqual(self.board.tickets.count(), 4)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tickets.csv")
+            with open(path, "w") as f:
+                f.write("Summary,Assignee\nOne,nobody\nTwo,\n")
+            out, err = StringIO(), StringIO()
+            call_command(
+                "importtickets",
+                self.board.id,
+                path,
+                column=["title=Summary"],
+                author=self.user.email,
+                stdout=out,
+                stderr=err,
+            )
+        self.assertIn("Imported 1 ticket(s)", out.getvalue())
+        self.assertIn("Line 2: No member called “nobody”", err.getvalue())
+        self.assertEqual(self.board.tickets.get().author, self.user)
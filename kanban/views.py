@@ -1,8 +1,22 @@
+import asyncio
+import io
 import json
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, RowRange, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
 from django.contrib import messages
 from django.urls import reverse
-from django.shortcuts import redirect
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect
+from django.template.defaultfilters import pluralize
+from django.template.loader import render_to_string
 from django.views.generic import (
     DetailView,
     View,
@@ -11,7 +25,8 @@ from django.views.generic import (
     UpdateView,
     TemplateView,
 )
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from kanban.models import (
     Board,
     BoardMembership,
@@ -19,10 +34,72 @@ from kanban.models import (
     TicketStatus,
     Sprint,
     Comment,
+    Tombstone,
     User,
 )
-from kanban import forms
+from kanban import analytics, burndown, csvimport, forms, history
+from kanban.access import aget_board_access, get_board_access
+from kanban.cache import (
+    aget_cached_fragment,
+    bump_board_version,
+    get_cached_fragment,
+    get_cached_value,
+)
+from kanban.events import get_broker, publish_board_event
+from kanban.pagination import decode_cursor, encode_cursor
 from kanban.constants import BasicStatuses, DEFAULT_COLOUR_MAPPING
+from kanban.ranking import RANK_STEP, place, rank_between
+from kanban.search import search
+from kanban.serializers import TicketSerializer, TicketStatusSerializer, json_response
+
+
+def parse_id(value):
+    """Return an id posted by the drag and drop scripts as an int, or None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_time(value):
+    """Return a time read from a cursor as a datetime, or None if invalid."""
+    try:
+        return parse_datetime(str(value))
+    except ValueError:
+        # Well formed but impossible, such as February 30th
+        return None
+
+
+def is_asgi(request):
+    """Return True if the request is served by an ASGI server."""
+    return isinstance(request, ASGIRequest)
+
+
+class BoardAccessMixin:
+    """
+    Resolve the current user's access to the board once per request and add
+    ``is_member`` and ``is_owner`` to the template context.
+    """
+
+    def get_board_id(self):
+        return self.kwargs["pk"]
+
+    @cached_property
+    def board_access(self):
+        return get_board_access(self.request, self.get_board_id())
+
+    async def aresolve_board_access(self):
+        """
+        Resolve the access up front in async views, where reading the lazy
+        ``board_access`` would query the database from the event loop.
+        """
+        self.board_access = await aget_board_access(self.request, self.get_board_id())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["is_member"] = self.board_access.is_member
+        context["is_owner"] = self.board_access.is_owner
+        return context
 
 
 class CreateBoardView(FormView):
@@ -38,9 +115,12 @@ class CreateBoardView(FormView):
             name=data["name"],
         )
         # create basic statuses by default
-        for i, name in enumerate(BasicStatuses.values):
+        for i, name in enumerate(BasicStatuses.values, start=1):
             TicketStatus.objects.create(
-                name=name, board=board, order=i, colour=DEFAULT_COLOUR_MAPPING[name]
+                name=name,
+                board=board,
+                order=i * RANK_STEP,
+                colour=DEFAULT_COLOUR_MAPPING[name],
             )
 
         BoardMembership.objects.create(
@@ -70,44 +150,204 @@ class EditBoardView(UpdateView):
         return kwargs
 
 
-class BoardView(DetailView):
+class BoardView(BoardAccessMixin, DetailView):
+    """
+    The board's columns. Served asynchronously, like the other read-heavy
+    pages, so that under ASGI a request waiting on the database does not
+    hold a worker thread. Everything the template needs is loaded before
+    it renders.
+    """
+
     template_name = "kanban/board.html"
-    model = Board
+    queryset = Board.objects.select_related("active_sprint")
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await aget_object_or_404(self.get_queryset(), pk=kwargs["pk"])
+        await self.aresolve_board_access()
+        is_member = self.board_access.is_member
+        context = self.get_context_data(
+            object=self.object,
+            live_updates=is_asgi(request),
+            has_tickets=await self.object.tickets.aexists(),
+            columns_html=await aget_cached_fragment(
+                self.object.id, "board-columns", self.render_columns, is_member
+            ),
+        )
+        return self.render_to_response(context)
+
+    async def render_columns(self):
+        return render_to_string(
+            "kanban/fragments/board_columns.html",
+            {
+                "columns": await self.object.aget_columns(),
+                "is_member": self.board_access.is_member,
+            },
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["statuses"] = self.object.statuses.all().order_by("order")
-        user_member = BoardMembership.objects.filter(
-            board=self.object, user=self.request.user
-        )
-        context["is_member"] = user_member.exists()
-        if user_member.exists():
-            context["is_owner"] = user_member.first().is_owner
-        else:
-            context["is_owner"] = False
+        context["active_sprint"] = self.object.active_sprint
         return context
 
 
-class BoardSettingsView(DetailView):
+class BoardEventsView(View):
+    """
+    Server-sent events stream of the changes published to a board, used by
+    the board page to move tickets and columns without reloading. Served
+    asynchronously so that open streams do not each hold a worker thread.
+
+    Only available under ASGI. A WSGI handler collects an async stream in
+    full before sending any of it, which for an endless stream means never,
+    so there the view answers 204 No Content, which tells EventSource to
+    stop reconnecting. The board page leaves the stream out altogether.
+    """
+
+    # Seconds between comments that keep idle connections open
+    heartbeat = 15
+
+    async def get(self, request, *args, **kwargs):
+        board_id = self.kwargs["pk"]
+        if not await Board.objects.filter(pk=board_id).aexists():
+            raise Http404("No board found matching the query")
+        if not is_asgi(request):
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(
+            self.stream(board_id), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def stream(self, board_id):
+        broker = get_broker()
+        queue = broker.subscribe(board_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(board_id, queue)
+
+
+def parse_since_cursor(cursor):
+    """Return the time held in a changes feed cursor, or None."""
+    values = decode_cursor(cursor)
+    if not values or len(values) != 1:
+        return None
+    return parse_time(values[0])
+
+
+class BoardChangesView(View):
+    """
+    Tickets, statuses and sprints of a board changed since the time held in
+    the ``since`` cursor, along with the ids of those deleted. Without a
+    cursor the whole board is returned. Each response carries the cursor to
+    send next time.
+    """
+
+    # Rows saved by transactions still open when the request starts can
+    # commit with an earlier updated_at, so the next cursor reaches back
+    # this far. Clients may therefore see a change twice.
+    overlap = timedelta(seconds=5)
+
+    ticket_fields = ("id", "title", "status", "sprint", "assignee", "order")
+    status_fields = ("id", "name", "order", "colour")
+    sprint_fields = ("id", "name", "start_date", "completed_date")
+
+    deleted_keys = {
+        Tombstone.Kinds.TICKET: "tickets",
+        Tombstone.Kinds.STATUS: "statuses",
+        Tombstone.Kinds.SPRINT: "sprints",
+    }
+
+    def get(self, request, *args, **kwargs):
+        board_id = self.kwargs["pk"]
+        if not Board.objects.filter(pk=board_id).exists():
+            raise Http404("No board found matching the query")
+        started_at = timezone.now()
+
+        changed = Q(board_id=board_id)
+        deleted = {key: [] for key in self.deleted_keys.values()}
+        if "since" in request.GET:
+            since = parse_since_cursor(request.GET["since"])
+            if since is None:
+                return json_response(
+                    request, {"errors": ["Invalid since cursor"]}, status=400
+                )
+            changed &= Q(updated_at__gt=since)
+            tombstones = Tombstone.objects.filter(
+                board_id=board_id, deleted_at__gt=since
+            ).values_list("kind", "object_id")
+            for kind, object_id in tombstones:
+                deleted[self.deleted_keys[kind]].append(object_id)
+
+        return json_response(
+            request,
+            {
+                "next": encode_cursor(started_at - self.overlap),
+                "tickets": list(
+                    Ticket.objects.filter(changed)
+                    .order_by("updated_at")
+                    .values(*self.ticket_fields, "updated_at")
+                ),
+                "statuses": list(
+                    TicketStatus.objects.filter(changed)
+                    .order_by("updated_at")
+                    .values(*self.status_fields, "updated_at")
+                ),
+                "sprints": list(
+                    Sprint.objects.filter(changed)
+                    .order_by("updated_at")
+                    .values(*self.sprint_fields, "updated_at")
+                ),
+                "deleted": deleted,
+            },
+        )
+
+
+class BoardAnalyticsView(View):
+    """
+    Lead time, cycle time, weekly throughput and per-assignee figures of a
+    board as JSON. They are cached under the board's version, and the
+    current week so that throughput moves on even on a quiet board.
+    """
+
+    def get(self, request, *args, **kwargs):
+        board_id = self.kwargs["pk"]
+        if not Board.objects.filter(pk=board_id).exists():
+            raise Http404("No board found matching the query")
+        week = timezone.now().isocalendar()[:2]
+        data = get_cached_value(
+            board_id,
+            "analytics",
+            lambda: analytics.board_analytics(board_id),
+            *week,
+        )
+        return json_response(request, data)
+
+
+class BoardSettingsView(BoardAccessMixin, DetailView):
     template_name = "kanban/board_settings.html"
     model = Board
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["statuses"] = self.object.statuses.all().order_by("order")
-        context["owner"] = self.object.members.filter(is_owner=True).first().user
-        user_member = BoardMembership.objects.filter(
-            board=self.object, user=self.request.user
+        context["owner"] = (
+            self.object.members.filter(is_owner=True)
+            .select_related("user")
+            .first()
+            .user
         )
-        context["is_member"] = user_member.exists()
-        if user_member.exists():
-            context["is_owner"] = user_member.first().is_owner
-        else:
-            context["is_owner"] = False
         return context
 
 
-class BoardEditColumnsView(DetailView):
+class BoardEditColumnsView(BoardAccessMixin, DetailView):
     template_name = "kanban/board_edit_columns.html"
     model = Board
 
@@ -115,14 +355,6 @@ class BoardEditColumnsView(DetailView):
         context = super().get_context_data(**kwargs)
         statuses = self.object.statuses.all().order_by("order")
         context["statuses"] = statuses
-        user_member = BoardMembership.objects.filter(
-            board=self.object, user=self.request.user
-        )
-        context["is_member"] = user_member.exists()
-        if user_member.exists():
-            context["is_owner"] = user_member.first().is_owner
-        else:
-            context["is_owner"] = False
         context["ids"] = json.dumps(
             [
                 status.id
@@ -143,9 +375,8 @@ class BoardEditColumnsView(DetailView):
             )
             column_names = ", ".join([f"“{status.name}”" for status in statuses])
             tickets = Ticket.objects.filter(status__id__in=statuses)
-            tickets.update(status=board.todo_status)
-            for ticket in tickets:
-                ticket.save()
+            tickets.update(status=board.todo_status, updated_at=timezone.now())
+            bump_board_version(board.id)
             statuses.delete()
             messages.success(
                 request,
@@ -154,7 +385,7 @@ class BoardEditColumnsView(DetailView):
         return redirect(reverse("board-edit-columns", kwargs={"pk": board.pk}))
 
 
-class ManageMembershipsView(ListView):
+class ManageMembershipsView(BoardAccessMixin, ListView):
     template_name = "kanban/manage_memberships.html"
     model = BoardMembership
 
@@ -167,14 +398,6 @@ class ManageMembershipsView(ListView):
         board = Board.objects.get(pk=self.kwargs["pk"])
         context["board"] = board
         context["statuses"] = board.statuses.all().order_by("order")
-        user_member = BoardMembership.objects.filter(
-            board=board, user=self.request.user
-        )
-        context["is_member"] = user_member.exists()
-        if user_member.exists():
-            context["is_owner"] = user_member.first().is_owner
-        else:
-            context["is_owner"] = False
         return context
 
     def post(self, request, *args, **kwargs):
@@ -218,13 +441,14 @@ class ManageMembershipsView(ListView):
         )
 
 
-class CreateMembershipView(FormView):
+class CreateMembershipView(BoardAccessMixin, FormView):
     form_class = forms.CreateMembershipForm
     template_name = "core/form.html"
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs["board_id"] = self.kwargs["pk"]
+        kwargs["member_ids"] = self.board_access.member_ids
         return kwargs
 
     def form_valid(self, form):
@@ -237,125 +461,432 @@ class CreateMembershipView(FormView):
         )
 
 
-class BacklogView(ListView):
-    template_name = "kanban/backlog.html"
-    model = Ticket
+class ImportTicketsView(BoardAccessMixin, FormView):
+    """
+    Create tickets from an uploaded CSV file. Rows which cannot be imported
+    are listed with the form, so they can be fixed and uploaded again.
+    """
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.filter(board__id=self.kwargs["pk"], sprint__isnull=True)
+    form_class = forms.TicketImportForm
+    template_name = "kanban/import_tickets.html"
+    # Rows listed with the form when an import leaves some out
+    max_row_errors = 100
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        board = Board.objects.get(pk=self.kwargs["pk"])
-        context["board"] = board
-        context["statuses"] = board.statuses.all().order_by("order")
-        user_member = BoardMembership.objects.filter(
-            board=board, user=self.request.user
+        context["board"] = get_object_or_404(Board, pk=self.kwargs["pk"])
+        return context
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["board_id"] = self.kwargs["pk"]
+        return kwargs
+
+    def form_valid(self, form):
+        board = get_object_or_404(Board, pk=self.kwargs["pk"])
+        file = io.TextIOWrapper(
+            form.cleaned_data["file"].file, encoding="utf-8-sig", newline=""
         )
-        context["is_member"] = user_member.exists()
-        if user_member.exists():
-            context["is_owner"] = user_member.first().is_owner
-        else:
-            context["is_owner"] = False
-        board_sprints = Sprint.objects.filter(board=board, completed_date__isnull=True)
-        sprints = [
-            {
-                "name": "Backlog",
-                "is_active": False,
-                "id": "backlog",
-                "tickets": self.object_list,
-            }
-        ]
-        tickets_by_sprint = [
-            {
-                "name": sprint.name,
-                "is_active": sprint.is_active,
-                "id": sprint.id,
-                "tickets": sprint.tickets.all(),
+        try:
+            importer = csvimport.import_tickets(board, file, self.request.user)
+        except (ValueError, UnicodeDecodeError) as error:
+            message = f"The file could not be read as CSV. {error}"
+            if isinstance(error, csvimport.ReadError) and error.created:
+                message += (
+                    f" The {error.created} ticket{pluralize(error.created)} before"
+                    f" it {pluralize(error.created, 'was,were')} imported."
+                )
+            form.add_error("file", message)
+            return self.form_invalid(form)
+
+        if importer.created:
+            messages.success(
+                self.request,
+                f"{importer.created} ticket{pluralize(importer.created)} imported",
+            )
+        if not importer.errors:
+            return redirect(reverse("board-backlog", kwargs={"pk": board.id}))
+        return self.render_to_response(
+            self.get_context_data(
+                form=self.get_form_class()(board_id=board.id),
+                row_errors=importer.errors[: self.max_row_errors],
+                row_error_count=len(importer.errors),
+            )
+        )
+
+
+class SearchView(BoardAccessMixin, TemplateView):
+    """Tickets of a board matching a full-text query, best matches first."""
+
+    template_name = "kanban/search.html"
+    limit = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["board"] = get_object_or_404(Board, pk=self.kwargs["pk"])
+        context["query"] = query = self.request.GET.get("q", "").strip()
+        context["limit"] = self.limit
+        if query:
+            context["results"] = search(self.kwargs["pk"], query, limit=self.limit)
+        return context
+
+
+def parse_rank_cursor(cursor):
+    """Return the order and id held in a backlog cursor, or None."""
+    values = decode_cursor(cursor)
+    if not values or len(values) != 2:
+        return None
+    order, pk = parse_id(values[0]), parse_id(values[1])
+    if order is None or pk is None:
+        return None
+    return order, pk
+
+
+class BacklogView(BoardAccessMixin, ListView):
+    """
+    Open sprints of a board and the tickets not in any sprint. Tickets come
+    from a single query that numbers them within their sprint, so only the
+    first ``page_size`` of each group are loaded and the rest are paged in
+    from BacklogTicketsView.
+    """
+
+    template_name = "kanban/backlog.html"
+    model = Ticket
+    page_size = 50
+
+    def get_queryset(self):
+        # Both windows share the order of the (board, sprint, order) index,
+        # so neither needs its own sort
+        partition = {
+            "partition_by": [F("sprint_id")],
+            "order_by": [F("order").asc(), F("id").asc()],
+        }
+        return (
+            Ticket.objects.filter(board_id=self.kwargs["pk"])
+            .filter(Q(sprint__isnull=True) | Q(sprint__completed_date__isnull=True))
+            .select_related("status")
+            .defer("description", "description_plain")
+            .annotate(
+                position=Window(RowNumber(), **partition),
+                group_size=Window(
+                    Count("id"), frame=RowRange(start=None, end=None), **partition
+                ),
+            )
+            .filter(position__lte=self.page_size)
+            .order_by("sprint_id", "order", "id")
+        )
+
+    async def aget_groups(self, board):
+        """
+        Return the backlog as a list of groups, active sprint first and the
+        tickets not in a sprint last.
+        """
+        tickets_by_sprint = defaultdict(list)
+        async for ticket in self.object_list:
+            tickets_by_sprint[ticket.sprint_id].append(ticket)
+
+        def group(sprint_id, name, is_active):
+            tickets = tickets_by_sprint.get(sprint_id, [])
+            count = tickets[0].group_size if tickets else 0
+            next_cursor = None
+            if count > len(tickets):
+                next_cursor = encode_cursor(tickets[-1].order, tickets[-1].id)
+            return {
+                "name": name,
+                "is_active": is_active,
+                "id": sprint_id or "backlog",
+                "tickets": tickets,
+                "ticket_count": count,
+                "next_cursor": next_cursor,
             }
-            for sprint in board_sprints
+
+        sprints = Sprint.objects.filter(board=board, completed_date__isnull=True)
+        groups = [
+            group(sprint.id, sprint.name, sprint.is_active) async for sprint in sprints
         ]
-        tickets_by_sprint += sprints
-        active_sprint_tickets = list(
-            filter(lambda x: x["is_active"], tickets_by_sprint)
-        )
-        inactive_sprint_tickets = list(
-            filter(lambda x: not x["is_active"], tickets_by_sprint)
+        groups.append(group(None, "Backlog", False))
+        return sorted(groups, key=lambda group: not group["is_active"])
+
+    async def get(self, request, *args, **kwargs):
+        board = await aget_object_or_404(Board, pk=kwargs["pk"])
+        await self.aresolve_board_access()
+        is_member = self.board_access.is_member
+        self.object_list = self.get_queryset()
+
+        async def render_sprints():
+            return render_to_string(
+                "kanban/fragments/backlog_sprints.html",
+                {
+                    "board": board,
+                    "sprints": await self.aget_groups(board),
+                    "is_member": is_member,
+                },
+            )
+
+        context = self.get_context_data(
+            board=board,
+            statuses=[status async for status in board.statuses.order_by("order")],
+            sprints_html=await aget_cached_fragment(
+                board.id, "backlog-sprints", render_sprints, is_member
+            ),
         )
-        context["sprints"] = active_sprint_tickets + inactive_sprint_tickets
-        return context
+        return self.render_to_response(context)
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.update_tickets)(request)
+
+    def update_tickets(self, request):
         selected_tickets = request.POST.getlist("selected_tickets")
         action = request.POST.get("form-action")
-        tickets = Ticket.objects.filter(id__in=selected_tickets)
-        ticket_titles = ", ".join([f"“{ticket.title}”" for ticket in tickets])
+        tickets = Ticket.objects.filter(
+            board_id=self.kwargs["pk"], id__in=selected_tickets
+        )
+        ticket_titles = ", ".join(
+            [f"“{title}”" for title in tickets.values_list("title", flat=True)]
+        )
 
         if action == "delete":
-            tickets.delete()
+            with transaction.atomic():
+                moves = [
+                    (history.TicketState(*row), None)
+                    for row in tickets.values_list(*history.STATE_FIELDS)
+                ]
+                tickets.delete()
+                history.record_moves(moves, request.user)
             messages.success(
                 request,
                 f"Ticket(s) {ticket_titles} deleted",
             )
         elif action == "update-status":
-            status_id = request.POST.get("status")
-            status = TicketStatus.objects.get(id=status_id)
-            for ticket in tickets:
-                ticket.status = status
-                ticket.save()
-            messages.success(
-                request,
-                f"Ticket(s) {ticket_titles} moved to “{status.name}”",
+            status = TicketStatus.objects.filter(
+                board_id=self.kwargs["pk"], id=parse_id(request.POST.get("status"))
+            ).first()
+            if status is None:
+                messages.error(request, "Select a status")
+            else:
+                with transaction.atomic():
+                    before = [
+                        history.TicketState(*row)
+                        for row in tickets.values_list(*history.STATE_FIELDS)
+                    ]
+                    tickets.update(status=status, updated_at=timezone.now())
+                    history.record_moves(
+                        (
+                            (state, state._replace(status_id=status.id))
+                            for state in before
+                        ),
+                        request.user,
+                    )
+                    bump_board_version(self.kwargs["pk"])
+                messages.success(
+                    request,
+                    f"Ticket(s) {ticket_titles} moved to “{status.name}”",
+                )
+        return redirect("board-backlog", pk=self.kwargs["pk"])
+
+
+class BacklogTicketsView(View):
+    """
+    The next page of tickets in one backlog group, after the ticket in the
+    ``after`` cursor. ``group`` is a sprint id or "backlog".
+    """
+
+    page_size = BacklogView.page_size
+
+    def get(self, request, *args, **kwargs):
+        group = request.GET.get("group")
+        tickets = Ticket.objects.filter(board_id=self.kwargs["pk"])
+        if group == "backlog":
+            tickets = tickets.filter(sprint__isnull=True)
+        else:
+            sprint_id = parse_id(group)
+            sprints = Sprint.objects.filter(pk=sprint_id, board_id=self.kwargs["pk"])
+            if sprint_id is None or not sprints.exists():
+                return json_response(
+                    request, {"errors": [f"Unknown group: {group}"]}, status=400
+                )
+            tickets = tickets.filter(
+                sprint_id=sprint_id, sprint__completed_date__isnull=True
             )
-        return self.get(request)
+        after = parse_rank_cursor(request.GET.get("after"))
+        if after:
+            order, pk = after
+            tickets = tickets.filter(Q(order__gt=order) | Q(order=order, pk__gt=pk))
+        tickets = list(
+            tickets.select_related("status")
+            .defer("description", "description_plain")
+            .order_by("order", "id")[: self.page_size + 1]
+        )
+        next_cursor = None
+        if len(tickets) > self.page_size:
+            tickets = tickets[: self.page_size]
+            next_cursor = encode_cursor(tickets[-1].order, tickets[-1].id)
+        html = render_to_string(
+            "kanban/fragments/backlog_tickets.html",
+            {"tickets": tickets, "sprint_id": group},
+        )
+        return json_response(request, {"html": html, "next": next_cursor})
+
 
+def parse_completed_cursor(cursor):
+    """Return the completion date and id held in an archive cursor, or None."""
+    values = decode_cursor(cursor)
+    if not values or len(values) != 2:
+        return None
+    completed_date = parse_time(values[0])
+    pk = parse_id(values[1])
+    if completed_date is None or pk is None:
+        return None
+    return completed_date, pk
+
+
+class ArchiveView(BoardAccessMixin, ListView):
+    """
+    Completed sprints of a board, newest first, paginated on completion date
+    with keyset cursors. Each sprint shows its ticket count, and its tickets
+    are fetched from SprintTicketsView when expanded.
+    """
 
-class ArchiveView(ListView):
     template_name = "kanban/archive.html"
-    model = Ticket
+    model = Sprint
+    page_size = 20
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.filter(board__id=self.kwargs["pk"])
+        # Counted in a subquery rather than a join and GROUP BY so that the
+        # (board, completed_date) index also provides the page order
+        ticket_count = (
+            Ticket.objects.filter(sprint=OuterRef("pk"))
+            .order_by()
+            .values("sprint")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return Sprint.objects.filter(
+            board_id=self.kwargs["pk"], completed_date__isnull=False
+        ).annotate(ticket_count=Coalesce(Subquery(ticket_count), 0))
+
+    def get_page(self):
+        """
+        Return the sprints on the requested page along with cursors for the
+        pages either side of it, which are None at either end.
+        """
+        queryset = self.get_queryset()
+        after, before = self.after, self.before
+
+        if before:
+            completed_date, pk = before
+            sprints = list(
+                queryset.filter(
+                    Q(completed_date__gt=completed_date)
+                    | Q(completed_date=completed_date, pk__gt=pk)
+                ).order_by("completed_date", "pk")[: self.page_size + 1]
+            )
+            has_previous = len(sprints) > self.page_size
+            has_next = True
+            sprints = sprints[: self.page_size][::-1]
+        else:
+            if after:
+                completed_date, pk = after
+                queryset = queryset.filter(
+                    Q(completed_date__lt=completed_date)
+                    | Q(completed_date=completed_date, pk__lt=pk)
+                )
+            sprints = list(
+                queryset.order_by("-completed_date", "-pk")[: self.page_size + 1]
+            )
+            has_previous = after is not None
+            has_next = len(sprints) > self.page_size
+            sprints = sprints[: self.page_size]
+
+        previous_cursor = next_cursor = None
+        if sprints and has_previous:
+            previous_cursor = encode_cursor(sprints[0].completed_date, sprints[0].pk)
+        if sprints and has_next:
+            next_cursor = encode_cursor(sprints[-1].completed_date, sprints[-1].pk)
+        return sprints, previous_cursor, next_cursor
+
+    def render_sprints(self):
+        sprints, previous_cursor, next_cursor = self.get_page()
+        return render_to_string(
+            "kanban/fragments/archive_sprints.html",
+            {
+                "sprints": sprints,
+                "previous_cursor": previous_cursor,
+                "next_cursor": next_cursor,
+                "is_first_page": not (self.after or self.before),
+            },
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         board = Board.objects.get(pk=self.kwargs["pk"])
         context["board"] = board
-        context["statuses"] = board.statuses.all().order_by("order")
-        user_member = BoardMembership.objects.filter(
-            board=board, user=self.request.user
+        self.after = parse_completed_cursor(self.request.GET.get("after"))
+        self.before = parse_completed_cursor(self.request.GET.get("before"))
+        # Keyed on the parsed cursors, so that invalid or differently encoded
+        # ones share the fragment of the page they show
+        context["sprints_html"] = get_cached_fragment(
+            board.id,
+            "archive-sprints",
+            self.render_sprints,
+            encode_cursor(*self.after) if self.after else "",
+            encode_cursor(*self.before) if self.before else "",
         )
-        context["is_member"] = user_member.exists()
-        if user_member.exists():
-            context["is_owner"] = user_member.first().is_owner
-        else:
-            context["is_owner"] = False
-        board_sprints = Sprint.objects.filter(
-            board=board, completed_date__isnull=False
-        ).order_by("-completed_date")
-        tickets_by_sprint = [
-            {
-                "name": sprint.name,
-                "start_date": sprint.start_date,
-                "completed_date": sprint.completed_date,
-                "id": sprint.id,
-                "tickets": sprint.tickets.all(),
-            }
-            for sprint in board_sprints
-        ]
-        context["sprints"] = tickets_by_sprint
         return context
 
 
+class SprintTicketsView(DetailView):
+    """Ticket list of a single sprint, loaded by the archive on demand."""
+
+    template_name = "kanban/fragments/sprint_tickets.html"
+    model = Sprint
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["tickets"] = Ticket.objects.filter(
+            board_id=self.object.board_id, sprint=self.object
+        ).only("id", "title")
+        return context
+
+
+class SprintBurndownView(BoardAccessMixin, DetailView):
+    """
+    Daily ticket counts of a started sprint, read from its snapshots. The
+    same data is served as JSON by SprintBurndownDataView.
+    """
+
+    template_name = "kanban/burndown.html"
+    queryset = Sprint.objects.select_related("board").filter(start_date__isnull=False)
+
+    def get_board_id(self):
+        return self.object.board_id
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        statuses = list(self.object.board.statuses.order_by("order"))
+        context["board"] = self.object.board
+        context["burndown"] = burndown.get_burndown(self.object, statuses)
+        return context
+
+
+class SprintBurndownDataView(View):
+    def get(self, request, *args, **kwargs):
+        sprint = get_object_or_404(
+            Sprint.objects.filter(start_date__isnull=False), pk=self.kwargs["pk"]
+        )
+        statuses = list(
+            TicketStatus.objects.filter(board_id=sprint.board_id).order_by("order")
+        )
+        return json_response(request, burndown.get_burndown(sprint, statuses))
+
+
 class SprintStartView(FormView):
     template_name = "core/form.html"
     form_class = forms.SprintStartForm
 
-    @property
+    @cached_property
     def sprint(self):
-        return Sprint.objects.get(pk=self.kwargs["pk"])
+        return Sprint.objects.select_related("board").get(pk=self.kwargs["pk"])
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -363,36 +894,71 @@ class SprintStartView(FormView):
         return kwargs
 
     def form_valid(self, form):
-        active_sprint = self.sprint.board.active_sprint
-        if active_sprint:
-            active_sprint.start_date = None
-            active_sprint.save()
-
-        tickets = Ticket.objects.filter(board=self.sprint.board, status__isnull=False)
-        for ticket in tickets:
-            ticket.status = None
-            ticket.save()
-
         sprint = self.sprint
-        sprint.start_date = timezone.now()
-        sprint.save()
+        now = timezone.now()
 
-        first_status = (
-            TicketStatus.objects.filter(board=sprint.board).order_by("order").first()
-        )
-        for ticket in sprint.tickets.all():
-            ticket.status = first_status
-            ticket.save()
-        return redirect(reverse("board-detail", kwargs={"pk": sprint.board.pk}))
+        with transaction.atomic():
+            board = (
+                Board.objects.select_for_update()
+                .select_related("active_sprint")
+                .get(pk=sprint.board_id)
+            )
+            # Boards whose To do column has gone start tickets in the first
+            first_status = (
+                board.statuses.filter(name=BasicStatuses.TODO).first()
+                or board.statuses.order_by("order").first()
+            )
+            # Clear the current active sprint first so the two are never
+            # active at once
+            active_sprint = board.active_sprint
+            if active_sprint:
+                active_sprint.start_date = None
+                active_sprint.save()
+
+            before = [
+                history.TicketState(*row)
+                for row in Ticket.objects.filter(
+                    Q(board=board, status__isnull=False) | Q(sprint=sprint)
+                ).values_list(*history.STATE_FIELDS)
+            ]
+            Ticket.objects.filter(board=board, status__isnull=False).update(
+                status=None, updated_at=now
+            )
+
+            sprint.start_date = now
+            sprint.save()
+            board.active_sprint = sprint
+            board.save(update_fields=["active_sprint", "updated_at"])
+
+            sprint.tickets.update(status=first_status, updated_at=now)
+            history.record_moves(
+                (
+                    (
+                        state,
+                        state._replace(
+                            status_id=(
+                                first_status and first_status.id
+                                if state.sprint_id == sprint.id
+                                else None
+                            )
+                        ),
+                    )
+                    for state in before
+                ),
+                self.request.user,
+            )
+            burndown.take_snapshot(sprint.id)
+            bump_board_version(board.id)
+        return redirect(reverse("board-detail", kwargs={"pk": board.pk}))
 
 
 class SprintCompleteView(FormView):
     template_name = "core/form.html"
     form_class = forms.SprintCompleteForm
 
-    @property
+    @cached_property
     def sprint(self):
-        return Sprint.objects.get(pk=self.kwargs["pk"])
+        return Sprint.objects.select_related("board").get(pk=self.kwargs["pk"])
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -401,30 +967,79 @@ class SprintCompleteView(FormView):
 
     def form_valid(self, form):
         sprint = self.sprint
-        done = TicketStatus.objects.get(board=sprint.board, name="Done")
-        all_tickets = Ticket.objects.filter(board=sprint.board, sprint=sprint)
-        unfinished_tickets = all_tickets.exclude(status=done)
-
-        for ticket in unfinished_tickets:
-            ticket.status = None
-            ticket.sprint = None
-            ticket.save()
-
-        sprint.completed_date = timezone.now()
-        sprint.save()
+        now = timezone.now()
+
+        with transaction.atomic():
+            done = sprint.board.done_status
+            # Close out the burndown before unfinished tickets leave the sprint
+            burndown.take_snapshot(sprint.id)
+            unfinished_tickets = Ticket.objects.filter(
+                board=sprint.board, sprint=sprint
+            ).exclude(status=done)
+            before = [
+                history.TicketState(*row)
+                for row in unfinished_tickets.values_list(*history.STATE_FIELDS)
+            ]
+            unfinished_tickets.update(status=None, sprint=None, updated_at=now)
+
+            sprint.completed_date = now
+            sprint.save()
+            # Recorded once the sprint is completed, so its closing burndown
+            # counts stay as they are
+            history.record_moves(
+                (
+                    (state, state._replace(sprint_id=None, status_id=None))
+                    for state in before
+                ),
+                self.request.user,
+            )
+            Board.objects.filter(pk=sprint.board_id, active_sprint=sprint).update(
+                active_sprint=None, updated_at=now
+            )
+            bump_board_version(sprint.board_id)
 
         return redirect(reverse("board-detail", kwargs={"pk": sprint.board.pk}))
 
 
-class TicketView(TemplateView):
+class TicketView(BoardAccessMixin, TemplateView):
+    """
+    A ticket with its comments and the forms editing it. Read
+    asynchronously; edits run in a worker thread as before.
+    """
+
     template_name = "kanban/ticket.html"
+    queryset = Ticket.objects.select_related(
+        "board", "status", "sprint", "author", "assignee"
+    )
+
+    @cached_property
+    def ticket(self):
+        return self.queryset.get(pk=self.kwargs["pk"])
+
+    def get_board_id(self):
+        return self.ticket.board_id
+
+    def get_comments(self):
+        return self.ticket.comments.select_related("author").order_by("-created_at")
+
+    async def get(self, request, *args, **kwargs):
+        self.ticket = await aget_object_or_404(self.queryset, pk=kwargs["pk"])
+        await self.aresolve_board_access()
+        context = self.get_context_data(
+            ticket_comments=[comment async for comment in self.get_comments()]
+        )
+        return self.render_to_response(context)
 
     def form_invalid(self, form, form_name):
         return self.render_to_response(self.get_context_data(**{form_name: form}))
 
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.update_ticket)(request)
+
+    def update_ticket(self, request):
         data = request.POST
-        obj = Ticket.objects.get(pk=self.kwargs["pk"])
+        obj = self.ticket
+        before = history.state(obj)
 
         if data["form_name"] == "comment":
             form = forms.CommentCreateForm(data=data, instance=obj)
@@ -437,7 +1052,7 @@ class TicketView(TemplateView):
             )
         if data["form_name"] == "assignee":
             form = forms.TicketAssigneeForm(
-                data=data, instance=obj, board_id=obj.board.id
+                data=data, instance=obj, member_ids=self.board_access.member_ids
             )
             if not form.is_valid():
                 return self.form_invalid(form, "assignee_form")
@@ -470,13 +1085,14 @@ class TicketView(TemplateView):
             else:
                 obj.description = ""
 
-        obj.save()
-        print(obj.__dict__)
+        with transaction.atomic():
+            obj.save()
+            history.record_moves([(before, history.state(obj))], self.request.user)
         return redirect(reverse("ticket-detail", kwargs={"pk": obj.pk}))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        obj = Ticket.objects.get(pk=self.kwargs["pk"])
+        obj = self.ticket
         page = self.request.GET.get("page")
         context["from_page"] = None
         if page == "archive":
@@ -486,12 +1102,12 @@ class TicketView(TemplateView):
             context["from_page"] = reverse("board-backlog", kwargs={"pk": obj.board.pk})
             context["from_page_title"] = "Backlog"
         context["object"] = obj
-        context["ticket_comments"] = obj.comments.all().order_by("-created_at")
+        context.setdefault("ticket_comments", self.get_comments())
         context["users"] = User.objects.all()
         context["comment_form"] = forms.CommentCreateForm(instance=obj)
         context["title_form"] = forms.TicketTitleForm(instance=obj)
         context["assignee_form"] = forms.TicketAssigneeForm(
-            instance=obj, board_id=obj.board.id
+            instance=obj, member_ids=self.board_access.member_ids
         )
         context["status_form"] = forms.TicketStatusForm(
             instance=obj,
@@ -500,11 +1116,6 @@ class TicketView(TemplateView):
         )
         context["description_form"] = forms.TicketDescriptionForm(instance=obj)
         context["fields"] = json.dumps(["title", "assignee", "status", "description"])
-        is_member = BoardMembership.objects.filter(
-            board=obj.board, user=self.request.user
-        ).exists()
-        context["is_member"] = is_member
-
         form = kwargs.get("comment_form")
         if form:
             context["comment_form_errored"] = json.dumps(hasattr(form, "errors"))
@@ -514,7 +1125,7 @@ class TicketView(TemplateView):
         return context
 
 
-class CreateTicketView(FormView):
+class CreateTicketView(BoardAccessMixin, FormView):
     form_class = forms.TicketCreateForm
     template_name = "core/form.html"
 
@@ -530,21 +1141,24 @@ class CreateTicketView(FormView):
     def form_valid(self, form):
         author = User.objects.get(id=self.request.user.id)
         board = Board.objects.get(pk=self.kwargs.get("pk"))
-        Ticket.objects.create(
-            title=form.cleaned_data["title"],
-            description=form.cleaned_data["description"],
-            board=board,
-            author=author,
-            assignee=form.cleaned_data["assignee"],
-            sprint=form.cleaned_data["sprint"],
-            status=board.todo_status,
-        )
+        with transaction.atomic():
+            ticket = Ticket.objects.create(
+                title=form.cleaned_data["title"],
+                description=form.cleaned_data["description"],
+                board=board,
+                author=author,
+                assignee=form.cleaned_data["assignee"],
+                sprint=form.cleaned_data["sprint"],
+                status=board.todo_status,
+            )
+            history.record_moves([(None, history.state(ticket))], self.request.user)
         return self.get_success_url(board.id)
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs["sprint_id"] = self.request.GET.get("sprint_id")
         kwargs["board_id"] = self.kwargs.get("pk")
+        kwargs["member_ids"] = self.board_access.member_ids
         return kwargs
 
 
@@ -558,10 +1172,13 @@ class CreateStatusView(FormView):
     def form_valid(self, form):
         data = form.cleaned_data
         board = Board.objects.get(pk=self.kwargs.get("pk"))
+        # New columns go after the existing ones, leaving To do first
+        last = board.statuses.aggregate(Max("order"))["order__max"]
         TicketStatus.objects.create(
             name=data["name"],
             board=board,
             colour=data["colour"],
+            order=rank_between(last, None),
         )
         return self.get_success_url(board.id)
 
@@ -614,10 +1231,15 @@ class EditTicketView(UpdateView):
 
     def form_valid(self, form):
         data = form.cleaned_data
+        before = history.state(self.object)
         self.object.title = data["title"]
         self.object.description = data["description"]
         self.object.status = data["status"]
-        self.object.save()
+        with transaction.atomic():
+            self.object.save()
+            history.record_moves(
+                [(before, history.state(self.object))], self.request.user
+            )
         return self.get_success_url()
 
     def get_form_kwargs(self):
@@ -629,66 +1251,318 @@ class EditTicketView(UpdateView):
 
 
 class UpdateTicketStatusAJAXView(View):
+    """
+    Move a ticket into a board column between two neighbouring tickets.
+
+    Expects ``id`` and ``status``, plus the ids of the tickets directly
+    above and below the drop point as ``previous`` and ``next``. The status
+    must be on the ticket's board.
+    """
+
+    serializer = TicketSerializer(["id", "status", "order"])
+
     def post(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer.for_request(request)
+        except ValidationError as e:
+            return json_response(request, {"errors": e.messages}, status=400)
         data = json.loads(request.body)
-        ticket = Ticket.objects.get(id=data.get("id"))
-        status_id = data.get("status")
-        order = data.get("order")
-        ticket.status = TicketStatus.objects.get(id=status_id)
-        ticket.order = order
-        ticket.save()
-        response = ticket.__dict__
-        del response["_state"]
-        return JsonResponse(response)
-
-
-class BulkUpdateTicketStatusAJAXView(View):
-    def post(self, request, *args, **kwargs):
-        data = json.loads(request.body)
-        updated_tickets = []
-        for ticket_data in data.get("tickets"):
-            ticket = Ticket.objects.get(id=ticket_data.get("id"))
-            status_id = ticket_data.get("status")
-            order = ticket_data.get("order")
-            ticket.status = TicketStatus.objects.get(id=status_id)
-            ticket.order = order
-            ticket.save()
-            response = ticket.__dict__
-            del response["_state"]
-            updated_tickets.append(response)
-        return JsonResponse({"updated": updated_tickets})
-
-
-class BulkUpdateTicketSprintAJAXView(View):
+        ticket = Ticket.objects.filter(id=parse_id(data.get("id"))).first()
+        if ticket is None:
+            return json_response(request, {"errors": ["Ticket not found"]}, status=404)
+        status = TicketStatus.objects.filter(
+            id=parse_id(data.get("status")), board_id=ticket.board_id
+        ).first()
+        if status is None:
+            return json_response(
+                request,
+                {"errors": [f"Status not on the board of ticket {ticket.id}"]},
+                status=400,
+            )
+        before = history.state(ticket)
+        ticket.status = status
+        siblings = Ticket.objects.live().filter(
+            board_id=ticket.board_id, status=ticket.status
+        )
+        with transaction.atomic():
+            respaced = place(
+                ticket,
+                siblings,
+                previous_id=parse_id(data.get("previous")),
+                next_id=parse_id(data.get("next")),
+            )
+            ticket.save(update_fields=["status", "order", "updated_at"])
+            history.record_moves([(before, history.state(ticket))], request.user)
+            publish_board_event(
+                ticket.board_id,
+                "tickets",
+                tickets=self.serializer.serialize_many([ticket, *respaced]),
+            )
+        return json_response(request, serializer.serialize(ticket))
+
+
+class UpdateTicketSprintAJAXView(View):
+    """
+    Move a ticket into a sprint, or the backlog, between two neighbouring
+    tickets. Expects ``id``, ``sprint``, ``previous`` and ``next``. The
+    sprint must be an uncompleted one on the ticket's board.
+    """
+
+    serializer = TicketSerializer(["id", "sprint", "order"])
+
     def post(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer.for_request(request)
+        except ValidationError as e:
+            return json_response(request, {"errors": e.messages}, status=400)
         data = json.loads(request.body)
-        updated_tickets = []
-        for ticket_data in data.get("tickets"):
-            ticket = Ticket.objects.get(id=ticket_data.get("id"))
-            sprint_id = ticket_data.get("sprint")
-            if sprint_id == "backlog":
-                ticket.sprint = None
-            else:
-                ticket.sprint = Sprint.objects.get(id=sprint_id)
-            order = ticket_data.get("order")
-            ticket.order = order
-            ticket.save()
-            response = ticket.__dict__
-            del response["_state"]
-            updated_tickets.append(response)
-        return JsonResponse({"updated": updated_tickets})
+        ticket_id = parse_id(data.get("id"))
+        if ticket_id is None:
+            return json_response(request, {"errors": ["Invalid ticket id"]}, status=400)
+        ticket = Ticket.objects.filter(id=ticket_id).first()
+        if ticket is None:
+            return json_response(request, {"errors": ["Ticket not found"]}, status=404)
+        sprint = None
+        if data.get("sprint") != "backlog":
+            sprint = Sprint.objects.filter(
+                id=parse_id(data.get("sprint")),
+                board_id=ticket.board_id,
+                completed_date__isnull=True,
+            ).first()
+            if sprint is None:
+                return json_response(
+                    request,
+                    {"errors": [f"Sprint not open on the board of ticket {ticket.id}"]},
+                    status=400,
+                )
+        before = history.state(ticket)
+        ticket.sprint = sprint
+        siblings = Ticket.objects.filter(board_id=ticket.board_id, sprint=ticket.sprint)
+        with transaction.atomic():
+            respaced = place(
+                ticket,
+                siblings,
+                previous_id=parse_id(data.get("previous")),
+                next_id=parse_id(data.get("next")),
+            )
+            ticket.save(update_fields=["sprint", "order", "updated_at"])
+            history.record_moves([(before, history.state(ticket))], request.user)
+            publish_board_event(
+                ticket.board_id,
+                "tickets",
+                tickets=self.serializer.serialize_many([ticket, *respaced]),
+            )
+        return json_response(request, serializer.serialize(ticket))
+
 
+class UpdateBoardStatusOrderAJAXView(View):
+    """
+    Move a board column between two neighbouring columns. Expects ``id``,
+    ``previous`` and ``next``, which must be columns of the same board.
+    """
+
+    serializer = TicketStatusSerializer(["id", "order"])
 
-class BulkUpdateBoardStatusesAJAXView(View):
     def post(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer.for_request(request)
+        except ValidationError as e:
+            return json_response(request, {"errors": e.messages}, status=400)
         data = json.loads(request.body)
-        updated_statuses = []
-        for status_data in data.get("statuses"):
-            status = TicketStatus.objects.get(id=status_data.get("id"))
-            order = status_data.get("order")
-            status.order = order
-            status.save()
-            response = status.__dict__
-            del response["_state"]
-            updated_statuses.append(response)
-        return JsonResponse({"updated": updated_statuses})
+        status = TicketStatus.objects.filter(id=parse_id(data.get("id"))).first()
+        if status is None:
+            return json_response(request, {"errors": ["Status not found"]}, status=404)
+        siblings = TicketStatus.objects.filter(board_id=status.board_id)
+        neighbour_ids = {
+            key: parse_id(data.get(key))
+            for key in ("previous", "next")
+            if data.get(key) is not None
+        }
+        found = set(
+            siblings.filter(pk__in=neighbour_ids.values()).values_list("pk", flat=True)
+        )
+        if any(pk not in found for pk in neighbour_ids.values()):
+            return json_response(
+                request,
+                {"errors": [f"Neighbours not on the board of status {status.id}"]},
+                status=400,
+            )
+        with transaction.atomic():
+            respaced = place(
+                status,
+                siblings,
+                previous_id=neighbour_ids.get("previous"),
+                next_id=neighbour_ids.get("next"),
+            )
+            status.save(update_fields=["order", "updated_at"])
+            publish_board_event(
+                status.board_id,
+                "statuses",
+                statuses=self.serializer.serialize_many([status, *respaced]),
+            )
+        return json_response(request, serializer.serialize(status))
+
+
+class BulkUpdateAJAXMixin:
+    """
+    Shared payload handling for the bulk AJAX endpoints.
+
+    Each endpoint takes a list of items with an ``id`` and an ``order``,
+    where ``order`` is the item's position in its column. Referenced rows
+    are fetched with one query per table and the whole payload is
+    rejected if any item is invalid.
+
+    The response lists the updated items with the fields of ``serializer``,
+    or those named in the ``fields`` query parameter.
+    """
+
+    payload_key = None
+    serializer = None
+
+    def get_items(self, request):
+        try:
+            items = json.loads(request.body)[self.payload_key]
+            for item in items:
+                item["id"] = int(item["id"])
+                item["order"] = int(item["order"])
+        except (ValueError, KeyError, TypeError):
+            raise ValidationError(
+                f"Expected a list of {self.payload_key} with an id and order"
+            )
+        if len({item["id"] for item in items}) != len(items):
+            raise ValidationError(f"Each of the {self.payload_key} must be unique")
+        if any(item["order"] < 0 for item in items):
+            raise ValidationError(f"Orders of {self.payload_key} cannot be negative")
+        for item in items:
+            item["order"] = (item["order"] + 1) * RANK_STEP
+        return items
+
+    def get_objects(self, model, ids):
+        objects = model.objects.in_bulk(set(ids))
+        missing = set(ids) - objects.keys()
+        if missing:
+            missing_ids = ", ".join(str(pk) for pk in sorted(missing))
+            raise ValidationError(
+                f"{model._meta.verbose_name_plural.capitalize()} not found: {missing_ids}"
+            )
+        return objects
+
+    def post(self, request, *args, **kwargs):
+        try:
+            serializer = self.serializer.for_request(request)
+            updated = self.update(self.get_items(request))
+        except ValidationError as e:
+            return json_response(request, {"errors": e.messages}, status=400)
+        return json_response(request, {"updated": serializer.serialize_many(updated)})
+
+
+class BulkUpdateTicketStatusAJAXView(BulkUpdateAJAXMixin, View):
+    payload_key = "tickets"
+    serializer = TicketSerializer(["id", "status", "order"])
+
+    def update(self, items):
+        tickets = self.get_objects(Ticket, [item["id"] for item in items])
+        before = {ticket.id: history.state(ticket) for ticket in tickets.values()}
+        statuses = self.get_objects(
+            TicketStatus, [parse_id(item.get("status")) for item in items]
+        )
+        now = timezone.now()
+        for item in items:
+            ticket = tickets[item["id"]]
+            ticket.status = statuses[parse_id(item["status"])]
+            if ticket.status.board_id != ticket.board_id:
+                raise ValidationError(f"Status not on the board of ticket {ticket.id}")
+            ticket.order = item["order"]
+            ticket.updated_at = now
+
+        updated = list(tickets.values())
+        with transaction.atomic():
+            Ticket.objects.bulk_update(updated, ["status", "order", "updated_at"])
+            history.record_moves(
+                ((before[ticket.id], history.state(ticket)) for ticket in updated),
+                self.request.user,
+            )
+            for board_id in {ticket.board_id for ticket in updated}:
+                bump_board_version(board_id)
+                publish_board_event(
+                    board_id,
+                    "tickets",
+                    tickets=self.serializer.serialize_many(
+                        ticket for ticket in updated if ticket.board_id == board_id
+                    ),
+                )
+        return updated
+
+
+class BulkUpdateTicketSprintAJAXView(BulkUpdateAJAXMixin, View):
+    payload_key = "tickets"
+    serializer = TicketSerializer(["id", "sprint", "order"])
+
+    def update(self, items):
+        tickets = self.get_objects(Ticket, [item["id"] for item in items])
+        before = {ticket.id: history.state(ticket) for ticket in tickets.values()}
+        sprints = self.get_objects(
+            Sprint,
+            [
+                parse_id(item.get("sprint"))
+                for item in items
+                if item.get("sprint") != "backlog"
+            ],
+        )
+        now = timezone.now()
+        for item in items:
+            ticket = tickets[item["id"]]
+            if item["sprint"] == "backlog":
+                ticket.sprint = None
+            else:
+                ticket.sprint = sprints[parse_id(item["sprint"])]
+                if ticket.sprint.board_id != ticket.board_id:
+                    raise ValidationError(
+                        f"Sprint not on the board of ticket {ticket.id}"
+                    )
+            ticket.order = item["order"]
+            ticket.updated_at = now
+
+        updated = list(tickets.values())
+        with transaction.atomic():
+            Ticket.objects.bulk_update(updated, ["sprint", "order", "updated_at"])
+            history.record_moves(
+                ((before[ticket.id], history.state(ticket)) for ticket in updated),
+                self.request.user,
+            )
+            for board_id in {ticket.board_id for ticket in updated}:
+                bump_board_version(board_id)
+                publish_board_event(
+                    board_id,
+                    "tickets",
+                    tickets=self.serializer.serialize_many(
+                        ticket for ticket in updated if ticket.board_id == board_id
+                    ),
+                )
+        return updated
+
+
+class BulkUpdateBoardStatusesAJAXView(BulkUpdateAJAXMixin, View):
+    payload_key = "statuses"
+    serializer = TicketStatusSerializer(["id", "order"])
+
+    def update(self, items):
+        statuses = self.get_objects(TicketStatus, [item["id"] for item in items])
+        if len({status.board_id for status in statuses.values()}) > 1:
+            raise ValidationError("Statuses must all be on the same board")
+        now = timezone.now()
+        for item in items:
+            statuses[item["id"]].order = item["order"]
+            statuses[item["id"]].updated_at = now
+
+        updated = list(statuses.values())
+        with transaction.atomic():
+            TicketStatus.objects.bulk_update(updated, ["order", "updated_at"])
+            for board_id in {status.board_id for status in updated}:
+                bump_board_version(board_id)
+                publish_board_event(
+                    board_id,
+                    "statuses",
+                    statuses=self.serializer.serialize_many(updated),
+                )
+        return updated